@@ -23,6 +23,8 @@ from plotly.subplots import make_subplots
 matplotlib.rcParams.update({'font.size': 16})
 
 from fleetrl.agent_eval.evaluation import Evaluation
+from fleetrl.utils.data_logger.kpi_aggregator import KpiAggregator
+from fleetrl.utils.observation.observation_spec import ObservationSpec
 
 
 class BasicEvaluation(Evaluation):
@@ -33,6 +35,7 @@ class BasicEvaluation(Evaluation):
         self.n_envs = n_envs
         self.n_episodes = n_episodes
         self.env_kwargs = None
+        self.obs_spec = None
 
     @staticmethod
     def _change_param(env_kwargs: dict, key: str, val):
@@ -78,6 +81,8 @@ class BasicEvaluation(Evaluation):
                                          clip_reward=10.0)
 
         eval_norm_vec_env.load(load_path=norm_stats_path, venv=eval_norm_vec_env)
+        # observation layout, used to read the parts of the logged observations
+        self.obs_spec = eval_norm_vec_env.get_attr("obs_spec")[0]
         model = PPO.load(model_path, env=eval_norm_vec_env,
                          custom_objects={"observation_space": eval_norm_vec_env.observation_space,
                                          "action_space": eval_norm_vec_env.action_space})
@@ -91,68 +96,57 @@ class BasicEvaluation(Evaluation):
 
         return log_RL
 
-    def compare(self, rl_log: pd.DataFrame, benchmark_log: pd.DataFrame):
-
-        rl_cashflow = rl_log["Cashflow"].sum()
-        rl_reward = rl_log["Reward"].sum()
-        rl_deg = rl_log["Degradation"].sum()
-        rl_overloading = rl_log["Grid overloading"].sum()
-        rl_soc_violation = rl_log["SOC violation"].sum()
-        rl_n_violations = rl_log[rl_log["SOC violation"] > 0]["SOC violation"].size
-        rl_soh = rl_log["SOH"].iloc[-1]
-
-        benchmark_cashflow = benchmark_log["Cashflow"].sum()
-        benchmark_reward = benchmark_log["Reward"].sum()
-        benchmark_deg = benchmark_log["Degradation"].sum()
-        benchmark_overloading = benchmark_log["Grid overloading"].sum()
-        benchmark_soc_violation = benchmark_log["SOC violation"].sum()
-        benchmark_n_violations = benchmark_log[benchmark_log["SOC violation"] > 0]["SOC violation"].size
-        benchmark_soh = benchmark_log["SOH"].iloc[-1]
-
-        print(f"RL reward: {rl_reward}")
-        print(f"DC reward: {benchmark_reward}")
-        print(f"RL cashflow: {rl_cashflow}")
-        print(f"DC cashflow: {benchmark_cashflow}")
+    def compare(self,
+                rl_log: pd.DataFrame | KpiAggregator,
+                benchmark_log: pd.DataFrame | KpiAggregator,
+                obs_spec: ObservationSpec = None):
+        """
+        Compares the totals of two runs and plots the mean charging power over the time of day.
+        Instead of a log, the KPIs of the env can be given (env_method("get_kpis")[0]), if the run was not logged.
 
-        total_results = pd.DataFrame()
-        total_results["Category"] = ["Reward", "Cashflow", "Average degradation per EV", "Overloading", "SOC violation",
-                                     "# Violations", "SOH"]
+        :param rl_log: Log or KpiAggregator of the RL agent
+        :param benchmark_log: Log or KpiAggregator of the benchmark
+        :param obs_spec: Observation spec of the env that wrote the logs (env.obs_spec), used to read the EVSE power.
+            Default: spec of the evaluated env, or built from env_kwargs. The y-axis is not limited without a spec
+        :return: None
+        """
 
-        total_results["RL-based charging"] = [rl_reward,
-                                              rl_cashflow,
-                                              np.round(np.mean(rl_deg), 5),
-                                              rl_overloading,
-                                              rl_soc_violation,
-                                              rl_n_violations,
-                                              np.round(np.mean(rl_soh), 5)]
-
-        total_results["benchmark charging"] = [benchmark_reward,
-                                               benchmark_cashflow,
-                                               np.round(np.mean(benchmark_deg), 5),
-                                               benchmark_overloading,
-                                               benchmark_soc_violation,
-                                               benchmark_n_violations,
-                                               np.round(np.mean(benchmark_soh), 5)]
+        rl_kpis = self._get_kpis(rl_log)
+        benchmark_kpis = self._get_kpis(benchmark_log)
 
-        print(total_results)
+        rl = rl_kpis.summary()
+        benchmark = benchmark_kpis.summary()
 
-        rl_log["hour_id"] = (rl_log["Time"].dt.hour + rl_log["Time"].dt.minute / 60)
+        print(f"RL reward: {rl['Reward']}")
+        print(f"DC reward: {benchmark['Reward']}")
+        print(f"RL cashflow: {rl['Cashflow']}")
+        print(f"DC cashflow: {benchmark['Cashflow']}")
 
-        benchmark_log["hour_id"] = (benchmark_log["Time"].dt.hour + benchmark_log["Time"].dt.minute / 60)
+        total_results = pd.DataFrame()
+        total_results["Category"] = ["Reward", "Cashflow", "Average degradation per EV", "Overloading", "SOC violation",
+                                     "# Violations", "SOH"]
 
-        mean_per_hid_rl = rl_log.groupby("hour_id").mean()["Charging energy"].reset_index(drop=True)
-        mean_all_rl = []
-        for i in range(mean_per_hid_rl.__len__()):
-            mean_all_rl.append(np.mean(mean_per_hid_rl[i]))
+        total_results["RL-based charging"] = [rl["Reward"],
+                                              rl["Cashflow"],
+                                              np.round(rl["Average degradation per EV"], 5),
+                                              rl["Overloading"],
+                                              rl["SOC violation"],
+                                              rl["# Violations"],
+                                              np.round(rl["SOH"], 5)]
+
+        total_results["benchmark charging"] = [benchmark["Reward"],
+                                               benchmark["Cashflow"],
+                                               np.round(benchmark["Average degradation per EV"], 5),
+                                               benchmark["Overloading"],
+                                               benchmark["SOC violation"],
+                                               benchmark["# Violations"],
+                                               np.round(benchmark["SOH"], 5)]
 
-        mean_per_hid_benchmark = benchmark_log.groupby("hour_id").mean()["Charging energy"].reset_index(drop=True)
-        mean_all_benchmark = []
-        for i in range(mean_per_hid_benchmark.__len__()):
-            mean_all_benchmark.append(np.mean(mean_per_hid_benchmark[i]))
+        print(total_results)
 
         mean_both = pd.DataFrame()
-        mean_both["RL"] = np.multiply(mean_all_rl, 4)
-        mean_both["benchmark charging"] = np.multiply(mean_all_benchmark, 4)
+        mean_both["RL"] = rl_kpis.mean_charging_power()
+        mean_both["benchmark charging"] = benchmark_kpis.mean_charging_power()
 
         mean_both.plot()
 
@@ -165,8 +159,10 @@ class BasicEvaluation(Evaluation):
         plt.grid(alpha=0.2)
 
         plt.ylabel("Charging power in kW")
-        max = rl_log.loc[0, "Observation"][-10]
-        plt.ylim([-max * 1.2, max * 1.2])
+        # evse power, see the observation spec of the env. Only available from the observations of a log
+        max = self._get_evse_power(rl_log, obs_spec)
+        if max is not None:
+            plt.ylim([-max * 1.2, max * 1.2])
 
         plt.show()
 
@@ -257,7 +253,8 @@ class BasicEvaluation(Evaluation):
                               uc_log: pd.DataFrame=None,
                               dist_log: pd.DataFrame=None,
                               night_log: pd.DataFrame=None,
-                              lp_log: pd.DataFrame=None):
+                              lp_log: pd.DataFrame=None,
+                              obs_spec: ObservationSpec = None):
 
         evse_power = self.env_kwargs["env_config"]["custom_ev_charger_power_in_kw"]
 
@@ -268,27 +265,27 @@ class BasicEvaluation(Evaluation):
 
         if rl_log is not None:
             rl_log = rl_log[(rl_log["Time"] >= start_date) & (rl_log["Time"] <= end_date)]
-            chosen_dfs.append(self._get_from_obs(rl_log))
+            chosen_dfs.append(self._get_from_obs(rl_log, obs_spec))
             log_names.append("RL-based charging")
 
         if uc_log is not None:
             uc_log = uc_log[(uc_log["Time"] >= start_date) & (uc_log["Time"] <= end_date)]
-            chosen_dfs.append(self._get_from_obs(uc_log))
+            chosen_dfs.append(self._get_from_obs(uc_log, obs_spec))
             log_names.append("Uncontrolled charging")
 
         if dist_log is not None:
             dist_log = dist_log[(dist_log["Time"] >= start_date) & (dist_log["Time"] <= end_date)]
-            chosen_dfs.append(self._get_from_obs(dist_log))
+            chosen_dfs.append(self._get_from_obs(dist_log, obs_spec))
             log_names.append("Distributed charging")
 
         if night_log is not None:
             night_log = night_log[(night_log["Time"] >= start_date) & (night_log["Time"] <= end_date)]
-            chosen_dfs.append(self._get_from_obs(log=night_log))
+            chosen_dfs.append(self._get_from_obs(log=night_log, obs_spec=obs_spec))
             log_names.append("Night charging")
 
         if lp_log is not None:
             lp_log = lp_log[(lp_log["Time"] >= start_date) & (lp_log["Time"] <= end_date)]
-            chosen_dfs.append(self._get_from_obs(log=lp_log))
+            chosen_dfs.append(self._get_from_obs(log=lp_log, obs_spec=obs_spec))
             log_names.append("Linear optimization")
 
         # Create a subplot with 3 rows and 1 column, without sharing the x-axis
@@ -406,62 +403,78 @@ class BasicEvaluation(Evaluation):
         # return the plot
         return fig
 
-    def _get_from_obs(self, log: dict):
+    def _get_kpis(self, log: pd.DataFrame | KpiAggregator) -> KpiAggregator:
+        """
+        :param log: Log of a run, or the KPIs of the env
+        :return: KpiAggregator
+        """
+
+        if isinstance(log, KpiAggregator):
+            return log
+        time_steps_per_hour = 4
+        if self.env_kwargs is not None:
+            time_steps_per_hour = self.env_kwargs["env_config"]["time_steps_per_hour"]
+        return KpiAggregator.from_log(log, time_steps_per_hour)
+
+    def _get_spec(self, obs_spec: ObservationSpec = None) -> ObservationSpec | None:
+        """
+        :param obs_spec: Observation spec of the env that wrote the logs, used if given
+        :return: Observation spec: the given one, the spec of the evaluated env, or built from env_kwargs (e.g. for
+            saved logs). None if neither is available
+        """
+
+        if obs_spec is not None:
+            return obs_spec
+        if self.obs_spec is None and self.env_kwargs is not None:
+            self.obs_spec = FleetEnv.make_obs_spec(self.env_kwargs["env_config"], self.n_evs)
+        return self.obs_spec
+
+    def _get_evse_power(self, log: pd.DataFrame | KpiAggregator, obs_spec: ObservationSpec = None) -> float | None:
+        """
+        :param log: Log of a run, or the KPIs of the env
+        :param obs_spec: Observation spec of the env that wrote the log
+        :return: EVSE power in kW from the first observation of the log. None for KPIs, an empty log, without a spec
+            or if the observations have no auxiliary information
+        """
+
+        if not isinstance(log, pd.DataFrame) or len(log) == 0:
+            return None
+        spec = self._get_spec(obs_spec)
+        if spec is None or "evse_power" not in spec:
+            return None
+        return log["Observation"].iloc[0][spec.index("evse_power")]
+
+    def _get_from_obs(self, log: dict, obs_spec: ObservationSpec = None):
 
-        obs = log["Observation"]
-        act = log["Charging energy"]
+        # observations stacked into a (T, dim) matrix, the parts are read as views with the slices of the spec
+        spec = self._get_spec(obs_spec)
+        if spec is None:
+            raise ValueError("The observation spec is needed to read the observations: pass obs_spec=env.obs_spec, "
+                             "or evaluate an agent first.")
+        obs = spec.stack(log["Observation"])
+        act = np.stack(list(log["Charging energy"])) if len(log) > 0 else np.zeros((0, self.n_evs))
         cf = log["Cashflow"]
         env_config = self.env_kwargs["env_config"]
 
-        bl_pv_lookahead = env_config["bl_pv_lookahead"]
-        pr_lookahead = env_config["price_lookahead"]
-
         length = len(log)
-
-        # Check observer class to see how observation list is built up
+        missing = np.full(length, np.nan)
 
         date = log["Time"]
-        first = 0  # first entry has index 0
-        last = self.n_evs - 1  # soc for each car
-        if self.n_evs > 1:
-            soc = [obs[i][first:last].mean() for i in range(length)]
+        soc = spec.view(obs, "soc").mean(axis=1)  # mean soc of the cars
+        price = spec.view(obs, "price")[:, 0] if "price" in spec else missing  # price in the current hour
+        building_load = spec.view(obs, "building_load")[:, 0] if "building_load" in spec else missing
+        pv = spec.view(obs, "pv")[:, 0] if "pv" in spec else missing
+
+        # free grid capacity / total grid capacity
+        if "avail_grid_cap" in spec:
+            free_cap = spec.view(obs, "avail_grid_cap")[:, 0] / spec.view(obs, "grid_cap")[:, 0]
         else:
-            soc = [obs[i][first] for i in range(length)]
-
-        first = self.n_evs
-        last = self.n_evs * 2 - 1  # hours left at charger for each car
-        if self.n_evs > 1:
-            hours_left = [obs[i][first:last].mean() for i in range(length)]
-        else:
-            hours_left = [obs[i][first] for i in range(length)]
-
-        first = self.n_evs * 2
-        last = self.n_evs * 2 + pr_lookahead  # price lookahead gives price in hour, hour+1, etc.
-        price = [obs[i][first] for i in range(length)]
-
-        first = self.n_evs * 2 + pr_lookahead + 1
-        last = self.n_evs * 2 + pr_lookahead * 2 + 1  # tariff paid when discharging, with lookahead
-        tariff = [obs[i][first] for i in range(length)]
-
-        first = self.n_evs * 2 + pr_lookahead * 2 + 2
-        last = self.n_evs * 2 + pr_lookahead * 2 + 2 + bl_pv_lookahead  # building load lookahead
-        building_load = [obs[i][first] for i in range(length)]
-
-        first = self.n_evs * 2 + pr_lookahead * 2 + 2 + bl_pv_lookahead + 1
-        last = self.n_evs * 2 + pr_lookahead * 2 + bl_pv_lookahead * 2 + 1  # pv has same lookahead as building
-        pv = [obs[i][first] for i in range(length)]
-
-        free_cap = [obs[i][-8] / obs[i][-9] for i in range(length)]  # free grid capacity in MW / total grid capacity
+            free_cap = missing
 
         time_steps_per_hour = env_config["time_steps_per_hour"]
 
         # act is charging energy in kWh, we want to display the currently drawn power in kW
-        first = 0  # first entry has index 0
-        last = self.n_evs - 1  # soc for each car
-        if self.n_evs > 1:
-            action = [act[i][first:last].sum() * time_steps_per_hour for i in range(length)]  # Going from kWh to kW
-        else:
-            action = [act[i][first] * time_steps_per_hour for i in range(length)]  # Going from kWh to kW
+        action = act.sum(axis=1) * time_steps_per_hour  # Going from kWh to kW
 
         df = pd.DataFrame({
             'Date': date,
@@ -6,7 +6,7 @@ class Evaluation:
 
         raise NotImplementedError("This is an abstract class.")
 
-    def compare(self, rl_log, benchmark_log):
+    def compare(self, rl_log, benchmark_log, obs_spec=None):
 
         raise NotImplementedError("This is an abstract class")
 
@@ -29,7 +29,8 @@ class Evaluation:
                               uc_log: pd.DataFrame=None,
                               dist_log: pd.DataFrame=None,
                               night_log: pd.DataFrame=None,
-                              lp_log: pd.DataFrame=None):
+                              lp_log: pd.DataFrame=None,
+                              obs_spec=None):
 
         raise NotImplementedError("This is an abstract class")
 
@@ -38,6 +39,6 @@ class Evaluation:
 
         raise NotImplementedError("This is an abstract class")
 
-    def _get_from_obs(self, log: dict) -> pd.DataFrame:
+    def _get_from_obs(self, log: dict, obs_spec=None) -> pd.DataFrame:
 
         raise NotImplementedError("This is an abstract class")
\ No newline at end of file
@@ -1,11 +1,18 @@
 import pandas as pd
 
+from fleetrl.fleet_env.fleet_environment import FleetEnv
+from fleetrl.utils.observation.observation_spec import ObservationSpec
+
 
 class Benchmark:
     """
     Parent class for benchmark modules.
     """
 
+    env_config: str | dict = None  # env config of the last run
+    obs_spec: ObservationSpec = None  # observation layout of the env of the last run
+    n_evs: int = None  # number of cars
+
     def run_benchmark(self,
                       use_case: str,
                       env_kwargs: dict,
@@ -31,3 +38,20 @@ class Benchmark:
         :return: None, plots the benchmark
         """
         raise NotImplementedError("This is an abstract class.")
+
+    def _get_evse_power(self, log: pd.DataFrame) -> float | None:
+        """
+        Reads the EVSE power from the first observation of the log. The observation spec of the last run is used, or
+        a spec built from its env config (e.g. for a saved log).
+
+        :param log: Log dataframe
+        :return: EVSE power in kW. None for an empty log, without spec or env config, or without auxiliary
+            observations
+        """
+
+        spec = self.obs_spec
+        if spec is None and self.env_config is not None:
+            spec = FleetEnv.make_obs_spec(self.env_config, self.n_evs)
+        if len(log) == 0 or spec is None or "evse_power" not in spec:
+            return None
+        return log["Observation"].iloc[0][spec.index("evse_power")]
@@ -26,6 +26,7 @@ class LinearOptimization(Benchmark):
         self.n_envs = n_envs
         self.time_steps_per_hour = time_steps_per_hour
         self.env_config = None
+        self.obs_spec = None
 
     def run_benchmark(self,
                       use_case: str,
@@ -50,6 +51,7 @@ class LinearOptimization(Benchmark):
         env = FleetEnv(env_config)
         # config needed for later use in plotting
         self.env_config = env_config
+        self.obs_spec = env.obs_spec
 
         # reading the input file as a pandas DataFrame
         df: pd.DataFrame = env.db
@@ -295,12 +297,9 @@ class LinearOptimization(Benchmark):
         plt.grid(alpha=0.2)
 
         plt.ylabel("Charging power in kW")
-        price_lookahead = self.env_config["price_lookahead"] * int(self.env_config["include_price"])
-        bl_pv_lookahead = self.env_config["bl_pv_lookahead"]
-        number_of_lookaheads = sum([int(self.env_config["include_pv"]), int(self.env_config["include_building"])])
-        # check observer module for building of observation list
-        power_index = self.n_evs * 6 + 2 * (price_lookahead+1) + number_of_lookaheads * (bl_pv_lookahead+1) + 1
-        max_val = lin_log.loc[0, "Observation"][power_index]
-        plt.ylim([-max_val * 1.2, max_val * 1.2])
+        # index of the evse power in the observation, see the observation spec of the env
+        max_val = self._get_evse_power(lin_log)
+        if max_val is not None:
+            plt.ylim([-max_val * 1.2, max_val * 1.2])
 
         plt.show()
@@ -26,6 +26,7 @@ class NightCharging(Benchmark):
         self.n_envs = n_envs
         self.time_steps_per_hour = time_steps_per_hour
         self.env_config = None
+        self.obs_spec = None
 
     def run_benchmark(self,
                       use_case: str,
@@ -50,7 +51,7 @@ class NightCharging(Benchmark):
         env = FleetEnv(env_config)
 
         df = env.db
-        df_leaving_home = df[(df['Location'].shift() == 'home') & (df['Location'] == 'driving')]
+        df_leaving_home = df[(df['There'].shift() == 1) & (df['There'] == 0)]
         earliest_dep_time = df_leaving_home['date'].dt.time.min()
         day_of_earliest_dep = df_leaving_home[df_leaving_home['date'].dt.time == earliest_dep_time]['date'].min()
         earliest_dep = earliest_dep_time.hour + earliest_dep_time.minute / 60
@@ -103,6 +104,8 @@ class NightCharging(Benchmark):
         night_log = night_log.iloc[0:-2]
 
         self.env_config = env_kwargs["env_config"]
+        # observation layout needed for later use in plotting
+        self.obs_spec = env.obs_spec
 
         return night_log
 
@@ -131,11 +134,8 @@ class NightCharging(Benchmark):
         plt.grid(alpha=0.2)
 
         plt.ylabel("Charging power in kW")
-        price_lookahead = self.env_config["price_lookahead"] * int(self.env_config["include_price"])
-        bl_pv_lookahead = self.env_config["bl_pv_lookahead"]
-        number_of_lookaheads = sum([int(self.env_config["include_pv"]), int(self.env_config["include_building"])])
-        # check observer module for building of observation list
-        power_index = self.n_evs * 6 + 2 * (price_lookahead+1) + number_of_lookaheads * (bl_pv_lookahead+1) + 1
-        max_val = night_log.loc[0, "Observation"][power_index]
-        plt.ylim([-max_val * 1.2, max_val * 1.2])
+        # index of the evse power in the observation, see the observation spec of the env
+        max_val = self._get_evse_power(night_log)
+        if max_val is not None:
+            plt.ylim([-max_val * 1.2, max_val * 1.2])
         plt.show()
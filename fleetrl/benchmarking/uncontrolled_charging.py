@@ -23,6 +23,7 @@ class Uncontrolled(Benchmark):
         self.n_envs = n_envs
         self.time_steps_per_hour = time_steps_per_hour
         self.env_config = None
+        self.obs_spec = None
 
     def run_benchmark(self,
                       use_case: str,
@@ -47,6 +48,8 @@ class Uncontrolled(Benchmark):
         dumb_norm_vec_env.reset()
 
         self.env_config = env_kwargs["env_config"]
+        # observation layout needed for later use in plotting
+        self.obs_spec = dumb_norm_vec_env.get_attr("obs_spec")[0]
 
         for i in range(episode_length * self.time_steps_per_hour * n_episodes):
             if dumb_norm_vec_env.env_method("is_done")[0]:
@@ -85,11 +88,8 @@ class Uncontrolled(Benchmark):
         plt.grid(alpha=0.2)
 
         plt.ylabel("Charging power in kW")
-        price_lookahead = self.env_config["price_lookahead"] * int(self.env_config["include_price"])
-        bl_pv_lookahead = self.env_config["bl_pv_lookahead"]
-        number_of_lookaheads = sum([int(self.env_config["include_pv"]), int(self.env_config["include_building"])])
-        # check observer module for building of observation list
-        power_index = self.n_evs * 6 + 2 * (price_lookahead+1) + number_of_lookaheads * (bl_pv_lookahead+1) + 1
-        max_val = dumb_log.loc[0, "Observation"][power_index]
-        plt.ylim([-max_val * 1.2, max_val * 1.2])
+        # index of the evse power in the observation, see the observation spec of the env
+        max_val = self._get_evse_power(dumb_log)
+        if max_val is not None:
+            plt.ylim([-max_val * 1.2, max_val * 1.2])
         plt.show()
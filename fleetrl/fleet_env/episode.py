@@ -2,6 +2,7 @@ import numpy as np
 import pandas as pd
 
 from fleetrl.fleet_env.config.time_config import TimeConfig
+from fleetrl.utils.data_processing.timeseries_store import TimeSeriesStore
 
 
 class Episode:
@@ -18,7 +19,9 @@ class Episode:
 
         self.time_conf = time_conf  # time config object
 
-        self.time: pd.Timestamp = None  # information of current time of the model
+        self.store: TimeSeriesStore = None  # time series store of the env, used to materialize timestamps
+        self.t: int = None  # integer index of the current time step in the store
+        self.finish_t: int = None  # integer index of the ending time step
         self.start_time: pd.Timestamp = None  # starting date of the model (year needs to be the same as the schedule's)
         self.finish_time: pd.Timestamp = None  # ending date of the model (year needs to be the same as the schedule's)
 
@@ -46,3 +49,15 @@ class Episode:
         self.events: int = 0  # Variable that counts up if relevant events have been detected
 
         self.current_actions = None
+
+    @property
+    def time(self) -> pd.Timestamp:
+        """
+        Current time of the model. Only materialized on demand (logging, get_time), the env itself works with the
+        integer time index t.
+
+        :return: Timestamp of the current time step
+        """
+        if self.t is None:
+            return None
+        return self.store.timestamp(self.t)
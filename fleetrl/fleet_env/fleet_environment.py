@@ -1,4 +1,6 @@
 import os
+import copy
+import tempfile
 import json
 import gymnasium as gym
 import numpy as np
@@ -15,6 +17,8 @@ from fleetrl.fleet_env.config.time_config import TimeConfig
 from fleetrl.fleet_env.episode import Episode
 
 from fleetrl.utils.data_processing.data_processing import DataLoader
+from fleetrl.utils.data_processing.timeseries_store import TimeSeriesStore
+from fleetrl.utils.data_processing.data_cache import DataCache
 from fleetrl.utils.ev_charging.ev_charger import EvCharger
 from fleetrl.utils.load_calculation.load_calculation import LoadCalculation, CompanyType
 
@@ -25,6 +29,7 @@ from fleetrl.utils.normalization.unit_normalization import UnitNormalization
 from fleetrl.utils.observation.observer_with_building_load import ObserverWithBuildingLoad
 from fleetrl.utils.observation.observer_price_only import ObserverPriceOnly
 from fleetrl.utils.observation.observer import Observer
+from fleetrl.utils.observation.observation_spec import ObservationSpec
 from fleetrl.utils.observation.observer_with_pv import ObserverWithPV
 from fleetrl.utils.observation.observer_bl_pv import ObserverWithBoth
 from fleetrl.utils.observation.observer_soc_time_only import ObserverSocTimeOnly
@@ -38,12 +43,17 @@ from fleetrl.utils.battery_degradation.batt_deg import BatteryDegradation
 from fleetrl.utils.battery_degradation.empirical_degradation import EmpiricalDegradation
 from fleetrl.utils.battery_degradation.rainflow_sei_degradation import RainflowSeiDegradation
 from fleetrl.utils.battery_degradation.log_data_deg import LogDataDeg
+from fleetrl.utils.battery_degradation.degradation_scheduler import DegradationScheduler
 
 from fleetrl.utils.event_manager.event_manager import EventManager
 
 from fleetrl.utils.data_logger.data_logger import DataLogger
+from fleetrl.utils.data_logger.log_sink import ParquetLogSink
+from fleetrl.utils.data_logger.kpi_aggregator import KpiAggregator
 
-from fleetrl.utils.schedule.schedule_generator import ScheduleGenerator, ScheduleType
+from fleetrl.utils.schedule.schedule_generator import ScheduleType
+from fleetrl.utils.schedule.fleet_schedule_generator import FleetScheduleGenerator
+from fleetrl.utils.schedule.schedule_writer import ScheduleReader
 
 from fleetrl.utils.rendering.render import ParkingLotRenderer
 
@@ -73,10 +83,13 @@ class FleetEnv(gym.Env):
     the SOC and time left at the charger, regardless of whether the vehicle is matching the charger one-to-one or not.
     """
 
-    def __init__(self, env_config: str | dict):
+    def __init__(self, env_config: str | dict, store: TimeSeriesStore | str = None):
 
         """
         :param env_config: String to specify path of json config file, or dict with config
+        :param store: Optional shared time series store (see TimeSeriesStore.share), or the path to it. If specified,
+            the input files are not loaded and the processed data of the store is used instead. The store must have
+            been built with the same data settings (use-case, data files, markups, flags).
 
         The following items are to be specified in the json or dict config:
         - data_path: String to specify the absolute path of the input folder
@@ -98,6 +111,9 @@ class FleetEnv(gym.Env):
         - episode_length: Length of episode in hours
         - log_data: Log SOC and SOH to csv files
         - calculate_degradation: Calculate degradation flag
+        - deg_cadence: When degradation is calculated: "daily", a number of time steps, "episode_end", "plug_out",
+          or a list of these (see DegradationScheduler). Default "daily", every time step for empirical degradation
+        - deg_time_of_day: Time of day of the daily degradation calculation, "HH:MM". Default "14:45"
         - verbose: Print statements
         - normalize_in_env: Conduct normalization in environment
         - use_case: String to specify the use-case
@@ -107,11 +123,19 @@ class FleetEnv(gym.Env):
         - gen_end_date: End date of the schedule
         - gen_name: File name of the schedule
         - gen_n_evs: How many EVs a schedule should be generated for
+        - gen_workers: Number of processes that generate the schedule. Default 1 (in the env process). Ignored in
+          daemon processes such as SubprocVecEnv workers, which cannot start a process pool
+        - gen_format: "csv" or "parquet" (directory of columnar files with a manifest). Default "csv"
         - spot_markup: markup on the spot price: new_price = spot + X ct/kWh
         - spot_mul: Multiplied on the price: New price = (spot + markup) * (1+X)
         - feed_in_ded: Deduction of the feed-in tariff: new_feed_in = (1-X) * feed_in
         - seed: seed for random number generators
         - real_time Bool for specifying real time flag
+        - cache_dir: Optional directory to cache the processed input data. Caching is disabled if not specified
+        - cache_size_mb: Size limit of the cache in MB, least recently used entries are removed. Default 1024
+        - log_dir: Optional directory to stream the log to, as chunks of parquet files (one sub-directory per env).
+          get_log then returns a LogReader instead of a DataFrame. The log is kept in memory if not specified
+        - log_chunk_size: Number of time steps that are buffered before they are written to log_dir. Default 10000
         """
 
         # call __init__() of parent class to ensure inheritance chain
@@ -177,12 +201,14 @@ class FleetEnv(gym.Env):
         self.schedule_type: ScheduleType = None
         self.specify_company_and_battery_size(use_case)
 
-        # Automatic schedule generation if specified
-        if self.generate_schedule:
-            self.auto_gen()
+        # a shared store already contains the processed data, no need to load or generate input files
+        if store is None:
+            # Automatic schedule generation if specified
+            if self.generate_schedule:
+                self.auto_gen()
 
-        # Make sure that data paths are correct and point to existing files
-        self.check_data_paths(self.path_name, self.schedule_name, self.spot_name, self.building_name, self.pv_name)
+            # Make sure that data paths are correct and point to existing files
+            self.check_data_paths(self.path_name, self.schedule_name, self.spot_name, self.building_name, self.pv_name)
 
         # Changing markups on spot prices if specified in config file (e.g. 20% on top on spot prices)
         self.change_markups()
@@ -208,6 +234,7 @@ class FleetEnv(gym.Env):
         self.print_function = verbose
 
         self.calc_deg = self.env_config["calculate_degradation"]
+        self.deg_emp = self.env_config["deg_emp"]
         self.log_data = self.env_config["log_data"]
 
         # Event manager to check if a relevant event took place to pass to the agent
@@ -235,35 +262,78 @@ class FleetEnv(gym.Env):
         self.info: dict = {}  # Necessary for gym env (Double check because new implementation doesn't need it)
 
         # Loading the data logger for battery degradation
-        self.deg_data_logger: LogDataDeg = LogDataDeg(self.episode)
+        self.deg_data_logger: LogDataDeg = LogDataDeg(self.episode, self.deg_log_length())
 
         # Loading data logger for analysing results and everything else
-        self.data_logger: DataLogger = DataLogger(self.time_conf.episode_length * self.time_conf.time_steps_per_hour)
+        self.data_logger: DataLogger = self.make_data_logger()
 
         self.real_time = self.env_config["real_time"]
 
-        # Loading the inputs
-        self.data_loader: DataLoader = DataLoader(self.path_name, self.schedule_name,
-                                                  self.spot_name, self.tariff_name,
-                                                  self.building_name, self.pv_name,
-                                                  self.time_conf, self.ev_config, self.ev_config.target_soc,
-                                                  self.include_building_load, self.include_pv, self.real_time
-                                                  )
+        # optional on-disk cache of the processed data, keyed by the contents of the input files and the settings
+        self.data_cache: DataCache = None
+        self.cache_key: str = None
+        if (store is None) and (self.env_config.get("cache_dir") is not None):
+            self.data_cache = DataCache(self.env_config["cache_dir"], self.env_config.get("cache_size_mb", 1024))
+            self.cache_key = self.data_cache.fingerprint(self.get_input_files(), self.get_data_settings(use_case))
+            store = self.data_cache.get(self.cache_key)
+            if self.print_updates and (store is not None):
+                print(f"Processed data loaded from cache: {self.cache_key}")
+
+        if store is None:
+            # Loading the inputs
+            self.data_loader: DataLoader = DataLoader(self.path_name, self.schedule_name,
+                                                      self.spot_name, self.tariff_name,
+                                                      self.building_name, self.pv_name,
+                                                      self.time_conf, self.ev_config, self.ev_config.target_soc,
+                                                      self.include_building_load, self.include_pv, self.real_time
+                                                      )
+            if self.print_updates:
+                print(f"Input files parsed with the {self.data_loader.ingestion.engine} engine:")
+                print(self.data_loader.ingestion.report().to_string(index=False))
+
+            # get the total database
+            self.db = self.data_loader.db
+
+            if use_case == "ct":
+                self.adjust_caretaker_lunch_soc()
+
+            # de-trend prices to make them usable as agent rewards
+            if self.include_price:
+                self.db = DataLoader.shape_price_reward(self.db, self.ev_config)
 
-        # get the total database
-        self.db = self.data_loader.db
+            # dense arrays of the database, indexed by integer time steps instead of date masks
+            self.store: TimeSeriesStore = TimeSeriesStore(self.db)
 
-        if use_case == "ct":
-            self.adjust_caretaker_lunch_soc()
+            if self.data_cache is not None:
+                self.data_cache.put(self.cache_key, self.store)
+
+        else:
+            # shared or cached store: the processed data is attached read-only, db is rebuilt from it when accessed
+            self.data_loader = None
+            self.db = None
+            self.store: TimeSeriesStore = TimeSeriesStore.attach(store) if isinstance(store, str) else store
+
+        self.episode.store = self.store
+
+        # hourly lookahead windows of the observer, adjusted for the markups of this env
+        self.observer.build_windows(self.store, self.ev_config, self.time_conf.price_lookahead,
+                                    self.time_conf.bl_pv_lookahead)
+
+        # time axis for the time pickers
+        self.dates: pd.DataFrame = pd.DataFrame({"date": self.store.dates})
 
         # first ID is 0
-        self.num_cars = self.db["ID"].max() + 1
+        self.num_cars = self.store.num_cars
 
         # Target SoC - Vehicles should always leave with this SoC
         self.target_soc: np.ndarray = np.ones(self.num_cars) * self.ev_config.target_soc
 
+        # online KPIs: over all episodes since the last reset_kpis(), and of the current episode (terminal info dict)
+        self.kpis: KpiAggregator = KpiAggregator(self.num_cars, self.time_conf.time_steps_per_hour)
+        self.episode_kpis: KpiAggregator = KpiAggregator(self.num_cars, self.time_conf.time_steps_per_hour)
+
         if self.env_config["include_building"]:
-            max_load = max(self.db["load"])
+            max_load = max(self.store.load)
         else:
             max_load = 0  # building load not considered in that case
 
@@ -282,14 +352,13 @@ class FleetEnv(gym.Env):
                                                 max_load=max_load)
 
         # choosing degradation methodology: empirical linear or non-linear mathematical model
-        if self.env_config["deg_emp"]:
+        if self.deg_emp:
             self.emp_deg: BatteryDegradation = EmpiricalDegradation(self.initial_soh, self.num_cars)
         else:
             self.sei_deg: BatteryDegradation = RainflowSeiDegradation(self.initial_soh, self.num_cars)
 
-        # de-trend prices to make them usable as agent rewards
-        if self.include_price:
-            self.db = DataLoader.shape_price_reward(self.db, self.ev_config)
+        # time steps in which the degradation is calculated
+        self.deg_scheduler: DegradationScheduler = self.make_deg_scheduler()
 
         """
         - Normalizing observations (Oracle) or just concatenating (Unit)
@@ -300,7 +369,7 @@ class FleetEnv(gym.Env):
         """
 
         if self.normalize_in_env:
-            self.normalizer: Normalization = OracleNormalization(self.db,
+            self.normalizer: Normalization = OracleNormalization(self.store,
                                                                  self.include_building_load,
                                                                  self.include_pv,
                                                                  self.include_price,
@@ -310,7 +379,17 @@ class FleetEnv(gym.Env):
         else:
             self.normalizer: Normalization = UnitNormalization()
 
-        # choose dimensions and bounds depending on settings
+        # layout of the flat observation vector. The observer writes into a preallocated buffer, that is normalized
+        # into a second float32 buffer. The dict form of the observation is only built on request (get_obs)
+        self.obs_spec = self.observer.make_spec(self.num_cars,
+                                                self.time_conf.price_lookahead,
+                                                self.time_conf.bl_pv_lookahead,
+                                                self.aux_flag)
+        self.normalizer.set_spec(self.obs_spec)
+        self.raw_obs = np.zeros(self.obs_spec.dim)
+        self.norm_obs = np.zeros(self.obs_spec.dim, dtype=np.float32)
+
+        # dimensions and bounds of the observation space, from the observation spec
         low_obs, high_obs = self.detect_dim_and_bounds()
 
         self.observation_space = gym.spaces.Box(
@@ -334,9 +413,16 @@ class FleetEnv(gym.Env):
         :return: First observation (either normalized or not) and an info dict
         """
 
+        # new info dict, the KPIs of the last episode are only returned in its terminal step
+        self.info = {}
+        self.episode_kpis.reset()
+
         # reset degradation logs for new episode
-        self.deg_data_logger.log = []
-        self.deg_data_logger.soc_log = []
+        self.deg_data_logger.reset()
+        if self.deg_emp:
+            self.emp_deg.new_soc_log()
+        else:
+            self.sei_deg.new_soc_log()
 
         # set done to False, since the episode just started
         self.episode.done = False
@@ -348,31 +434,33 @@ class FleetEnv(gym.Env):
         self.episode.battery_cap = self.episode.soh * self.ev_config.init_battery_cap
 
         # choose a start time based on the type of choice: same, random, deterministic
-        self.episode.start_time = self.time_picker.choose_time(self.db, self.time_conf.freq,
+        self.episode.start_time = self.time_picker.choose_time(self.dates, self.time_conf.freq,
                                                                self.time_conf.end_cutoff)
 
         # calculate the finish time based on the episode length
         self.episode.finish_time = self.episode.start_time + np.timedelta64(self.time_conf.episode_length, 'h')
 
-        # set the model time to the start time
-        self.episode.time = self.episode.start_time
+        # set the model time to the start time, the integer cursor is used for all lookups during the episode
+        self.episode.t = self.store.index_of(self.episode.start_time)
+        self.episode.finish_t = int(self.store.date_values.searchsorted(np.datetime64(self.episode.finish_time, "ns")))
+        self.deg_scheduler.reset(self.episode.t)
 
-        # get observation from observer module
-        obs = self.observer.get_obs(self.db,
-                                    self.time_conf.price_lookahead,
-                                    self.time_conf.bl_pv_lookahead,
-                                    self.episode.time,
+        # get observation from observer module, written into the observation buffer
+        obs = self.observer.observe(self.store,
+                                    self.episode.t,
                                     ev_conf=self.ev_config,
                                     load_calc=self.load_calculation,
                                     aux=self.aux_flag,
-                                    target_soc=self.target_soc)
+                                    target_soc=self.target_soc,
+                                    out=self.raw_obs)
+        sl = self.obs_spec.slices
 
         # get the first soc and hours_left observation
-        self.episode.soc = obs["soc"]
-        self.episode.hours_left = obs["hours_left"]
+        self.episode.soc = list(obs[sl["soc"]])
+        self.episode.hours_left = list(obs[sl["hours_left"]])
         if self.include_price:
-            self.episode.price = obs["price"]
-            self.episode.tariff = obs["tariff"]
+            self.episode.price = list(obs[sl["price"]])
+            self.episode.tariff = list(obs[sl["tariff"]])
 
         """
         if time is insufficient due to unfavourable start date (for example loading an empty car with 15 min
@@ -404,14 +492,11 @@ class FleetEnv(gym.Env):
         self.episode.penalty_record = 0
 
         # rebuild the observation vector with modified values
-        obs["soc"] = self.episode.soc
-        obs["hours_left"] = self.episode.hours_left
-        if self.include_price:
-            obs["price"] = self.episode.price
-            obs["tariff"] = self.episode.tariff
+        obs[sl["soc"]] = self.episode.soc
+        obs[sl["hours_left"]] = self.episode.hours_left
 
-        # Parse observation to normalization module
-        norm_obs = self.normalizer.normalize_obs(obs)
+        # Parse observation to normalization module, a copy is returned because the buffer is reused
+        norm_obs = self.normalizer.normalize_flat(obs, out=self.norm_obs).copy()
 
         # Log first soc for battery degradation
         if self.calc_deg:
@@ -458,11 +543,12 @@ class FleetEnv(gym.Env):
 
             # define variables that are newly used every iteration
             cum_soc_missing = 0  # cumulative soc missing for each step
-            there = self.db["There"][self.db["date"] == self.episode.time].values  # plugged in y/n (before next time step)
+            t = self.episode.t  # integer index of the current time step
+            there = self.store.there[t]  # plugged in y/n (before next time step)
 
             # parse the action to the charging function and receive the soc, next soc, reward and cashflow
             self.episode.soc, self.episode.next_soc, reward, cashflow, self.charge_log, self.episode.events = self.ev_charger.charge(
-                self.db, self.num_cars, actions, self.episode, self.load_calculation,
+                self.store, self.num_cars, actions, self.episode, self.load_calculation,
                 self.ev_config, self.time_conf, self.score_config, self.print_updates, self.target_soc)
 
             # set the soc to the next soc
@@ -478,12 +564,12 @@ class FleetEnv(gym.Env):
 
             # check current load and pv for violation check
             if self.include_building_load:
-                current_load = self.db.loc[self.db["date"] == self.episode.time, "load"].values[0]
+                current_load = self.store.load[t]
             else:
                 current_load = 0
 
             if self.include_pv:
-                current_pv = self.db.loc[self.db["date"] == self.episode.time, "pv"].values[0]
+                current_pv = self.store.pv[t]
             else:
                 current_pv = 0
 
@@ -491,7 +577,7 @@ class FleetEnv(gym.Env):
             corrected_actions = actions * there
             # check if connection has been overloaded and by how much
             overloaded_flag, overload_amount = self.load_calculation.check_violation(corrected_actions,
-                                                                                     self.db,
+                                                                                     there,
                                                                                      current_load, current_pv)
             relative_loading = overload_amount / self.load_calculation.grid_connection + 1
             # overload_penalty is calculated from a sigmoid function in score_conf
@@ -505,133 +591,103 @@ class FleetEnv(gym.Env):
                           f" {abs(overload_amount)} kW. Penalty: {round(overload_penalty, 3)}")
 
             # advance one time step
-            self.episode.time += np.timedelta64(self.time_conf.minutes, 'm')
+            self.episode.t += 1
 
             # get the next observation entry from the dataset to get new arrivals or departures
-            next_obs = self.observer.get_obs(self.db,
-                                             self.time_conf.price_lookahead,
-                                             self.time_conf.bl_pv_lookahead,
-                                             self.episode.time,
+            next_obs = self.observer.observe(self.store,
+                                             self.episode.t,
                                              ev_conf=self.ev_config,
                                              load_calc=self.load_calculation,
                                              aux=self.aux_flag,
-                                             target_soc=self.target_soc)
-            next_obs_soc = next_obs["soc"]
-            next_obs_time_left = next_obs["hours_left"]
+                                             target_soc=self.target_soc,
+                                             out=self.raw_obs)
+            sl = self.obs_spec.slices
+            next_obs_soc = next_obs[sl["soc"]].copy()
+            next_obs_time_left = next_obs[sl["hours_left"]].copy()
             if self.include_price:
-                next_obs_price = next_obs["price"]
-                self.episode.price = next_obs_price
-                next_obs_tariff = next_obs["tariff"]
-                self.episode.tariff = next_obs_tariff
-
-            # go through the stations and check whether the same car is still there, no car, or a new arrival
-            for car in range(self.num_cars):
-
-                # checks if a car just left and if rules were violated, e.g. didn't fully charge
-                if (self.episode.hours_left[car] != 0) and (next_obs_time_left[car] == 0):
-                    self.episode.events += 1  # relevant event detected
-
-                    # caretaker is a special case because of the lunch break
-                    # it is not long enough to fully recharge, so a different target soc is applied
-                    if self.company == CompanyType.Caretaker:
-                        # lunch break case
-                        if (self.episode.time.hour > 11) and (self.episode.time.hour < 15):
-                            # check for soc violation
-                            if self.ev_config.target_soc_lunch - self.episode.soc[car] > self.eps:
-                                # penalty for not fulfilling charging requirement, square difference, scale and clip
-                                self.episode.events += 1  # relevant event detected
-                                soc_missing = self.ev_config.target_soc_lunch - self.episode.soc[car]
-                                cum_soc_missing += soc_missing
-                                #current_soc_pen = self.score_conf.penalty_soc_violation * soc_missing ** 2
-                                #current_soc_pen = max(current_soc_pen, self.score_conf.clip_soc_violation)
-                                current_soc_pen = self.score_config.soc_violation_penalty(soc_missing)
-                                reward += current_soc_pen
-                                self.episode.penalty_record += current_soc_pen
-                                if self.print_updates:
-                                    print(f"A car left the station without reaching the target SoC."
-                                          f" Penalty: {round(current_soc_pen, 3)}")
-
-                            else: reward += self.score_config.fully_charged_reward  # reward for fully charging the car
-
-                        # caretaker, other operation times, check for violation
-                        elif self.target_soc[car] - self.episode.soc[car] > self.eps:
-                            # current_soc_pen is calculated from a sigmoid function in score_conf
-                            self.episode.events += 1  # relevant event detected
-                            soc_missing = self.target_soc[car] - self.episode.soc[car]
-                            cum_soc_missing += soc_missing
-                            #current_soc_pen = self.score_conf.penalty_soc_violation * soc_missing ** 2
-                            #current_soc_pen = max(current_soc_pen, self.score_conf.clip_soc_violation)
-                            current_soc_pen = self.score_config.soc_violation_penalty(soc_missing)
-                            reward += current_soc_pen
-                            self.episode.penalty_record += current_soc_pen
-                            if self.print_updates:
-                                print(f"A car left the station without reaching the target SoC."
-                                      f" Penalty: {round(current_soc_pen, 3)}")
-
-                        else:
-                            reward += self.score_config.fully_charged_reward  # reward for fully charging the car
-
-                    # other companies: if charging requirement wasn't met (with some tolerance eps)
-                    elif self.target_soc[car] - self.episode.soc[car] > self.eps:
-                        self.episode.events += 1  # relevant event detected
-                        # current_soc_pen is calculated from a sigmoid function in score_conf
-                        soc_missing = self.target_soc[car] - self.episode.soc[car]
-                        cum_soc_missing += soc_missing
-                        #current_soc_pen = self.score_conf.penalty_soc_violation * soc_missing ** 2
-                        #current_soc_pen = max(current_soc_pen, self.score_conf.clip_soc_violation)
-                        current_soc_pen = self.score_config.soc_violation_penalty(soc_missing)
-                        reward += current_soc_pen
-                        self.episode.penalty_record += current_soc_pen
-                        if self.print_updates:
-                            print(f"A car left the station without reaching the target SoC."
-                                  f" Penalty: {round(current_soc_pen, 3)}")
-
-                    else:
-                        reward += self.score_config.fully_charged_reward  # reward for fully charging the car
-
-                # still charging
-                if (next_obs_time_left[car] != 0) and (self.episode.hours_left[car] != 0):
-                    self.episode.hours_left[car] -= self.time_conf.dt
-
-                # no car in the next time step
-                elif next_obs_time_left[car] == 0:
-                    self.episode.hours_left[car] = next_obs_time_left[car]
-                    self.episode.soc[car] = next_obs_soc[car]
-
-                # new arrival in the next time step
-                elif (self.episode.hours_left[car] == 0) and (next_obs_time_left[car] != 0):
-                    self.episode.events += 1  # relevant event
-                    self.episode.hours_left[car] = next_obs_time_left[car]
-                    self.episode.old_soc[car] = self.episode.soc[car]
-                    self.episode.soc[car] = next_obs_soc[car]
-
-                # this shouldn't happen but if it does, an error is thrown
-                else:
-                    raise TypeError("Observation format not recognized")
-
-                # if battery degradation >= 10%, target SOC is increased to ensure sufficient kWh in the battery
-                if self.episode.soh[car] <= 0.9:
-                    self.target_soc[car] = 0.9
-                    self.episode.events += 1  # relevant event detected
-                    if self.print_updates and self.target_soc[car] != 0.9:
+                self.episode.price = list(next_obs[sl["price"]])
+                self.episode.tariff = list(next_obs[sl["tariff"]])
+
+            # check for each station whether the same car is still there, no car, or a new arrival
+            soc = np.array(self.episode.soc, dtype=float)
+            hours_left = np.array(self.episode.hours_left, dtype=float)
+
+            # transition masks
+            departed = (hours_left != 0) & (next_obs_time_left == 0)  # car just left
+            still_plugged = (next_obs_time_left != 0) & (hours_left != 0)  # still charging
+            arrived = (hours_left == 0) & (next_obs_time_left != 0)  # new arrival in the next time step
+
+            # checks if a car just left and if rules were violated, e.g. didn't fully charge
+            self.episode.events += int(departed.sum())  # relevant event detected
+
+            # caretaker is a special case because of the lunch break
+            # it is not long enough to fully recharge, so a different target soc is applied
+            departure_target = self.target_soc
+            if self.company == CompanyType.Caretaker:
+                lunch_break = (self.store.hour[self.episode.t] > 11) and (self.store.hour[self.episode.t] < 15)
+                if lunch_break:
+                    departure_target = np.full(self.num_cars, self.ev_config.target_soc_lunch)
+
+            # if charging requirement wasn't met (with some tolerance eps)
+            soc_missing = departure_target - soc
+            violated = departed & (soc_missing > self.eps)
+            fully_charged = departed & ~violated
+
+            if violated.any():
+                self.episode.events += int(violated.sum())  # relevant event detected
+                cum_soc_missing += soc_missing[violated].sum()
+                # current_soc_pen is calculated from a sigmoid function in score_conf
+                current_soc_pen = self.score_config.soc_violation_penalty(soc_missing[violated])
+                reward += current_soc_pen.sum()
+                self.episode.penalty_record += current_soc_pen.sum()
+                if self.print_updates:
+                    for pen in current_soc_pen:
+                        print(f"A car left the station without reaching the target SoC."
+                              f" Penalty: {round(pen, 3)}")
+
+            # reward for fully charging the car
+            reward += self.score_config.fully_charged_reward * int(fully_charged.sum())
+
+            # still charging
+            hours_left[still_plugged] -= self.time_conf.dt
+
+            # no car in the next time step, or new arrival in the next time step
+            self.episode.events += int(arrived.sum())  # relevant event
+            new_obs = ~still_plugged
+            hours_left[new_obs] = next_obs_time_left[new_obs]
+            self.episode.old_soc = list(np.where(arrived, soc, self.episode.old_soc))
+            soc[new_obs] = next_obs_soc[new_obs]
+
+            # if battery degradation >= 10%, target SOC is increased to ensure sufficient kWh in the battery
+            degraded = self.episode.soh <= 0.9
+            if degraded.any():
+                self.episode.events += int(degraded.sum())  # relevant event detected
+                if self.print_updates:
+                    for car in np.flatnonzero(degraded & (self.target_soc != 0.9)):
                         print(f"Target SOC of Car {car} has been adjusted to 0.9 due to high battery degradation."
                               f"Current SOH: {self.episode.soh[car]}")
+                self.target_soc[degraded] = 0.9
+
+            self.episode.soc = list(soc)
+            self.episode.hours_left = list(hours_left)
 
             # Update SOH value for degradation calculations, wherever a car is plugged in
-            for car in range(self.num_cars):
-                if self.episode.hours_left[car] != 0:
-                    self.episode.soc_deg[car] = self.episode.soc[car]
+            self.episode.soc_deg = list(np.where(hours_left != 0, soc, self.episode.soc_deg))
 
             # if the finish time is reached, set done to True
             # The RL_agents agent then resets the environment
-            if self.episode.time == self.episode.finish_time:
+            if self.episode.t >= self.episode.finish_t:
                 self.episode.done = True
                 self.episode.events += 1  # relevant event detected
                 if self.calc_deg:
                     self.deg_data_logger.add_log_entry()
                 if self.print_updates:
                     print(f"Episode done: {self.episode.done}")
-                    self.logged_data = self.data_logger.log
+                    # a streamed log is not flushed here, that would write a partial chunk every episode
+                    if self.data_logger.sink is None:
+                        self.logged_data = self.data_logger.log
+                    else:
+                        self.logged_data = self.data_logger.sink.reader()
 
             # append to the reward history
             self.episode.cumulative_reward += reward
@@ -642,14 +698,11 @@ class FleetEnv(gym.Env):
                 print("---------")
                 print("\n")
 
-            next_obs["soc"] = self.episode.soc
-            next_obs["hours_left"] = self.episode.hours_left
-            if self.include_price:
-                next_obs["price"] = self.episode.price
-                next_obs["tariff"] = self.episode.tariff
+            next_obs[sl["soc"]] = soc
+            next_obs[sl["hours_left"]] = hours_left
 
-            # normalize next observation
-            norm_next_obs = self.normalizer.normalize_obs(next_obs)
+            # normalize next observation, a copy is returned because the buffer is reused
+            norm_next_obs = self.normalizer.normalize_flat(next_obs, out=self.norm_obs).copy()
 
             # Log soc for battery degradation
             if self.calc_deg:
@@ -661,12 +714,13 @@ class FleetEnv(gym.Env):
             soc_v = abs(cum_soc_missing)
 
             # Calculate degradation and state of health based on chosen method
-            # calculate degradation once per day
-            if self.calc_deg and ((self.episode.time.hour == 14) and (self.episode.time.minute == 45)):
-                degradation = self.sei_deg.calculate_degradation(self.deg_data_logger.soc_log,
-                                                                 self.load_calculation.evse_max_power,
-                                                                 self.time_conf,
-                                                                 self.ev_config.temperature)
+            # the scheduler decides when, each calculation only processes the soc entries logged since the last one
+            if self.calc_deg and self.deg_scheduler.due(self.episode.t, self.episode.done, departed):
+                degradation = self.deg_scheduler.run(self.emp_deg if self.deg_emp else self.sei_deg,
+                                                     self.deg_data_logger.soc_log,
+                                                     self.load_calculation.evse_max_power,
+                                                     self.time_conf,
+                                                     self.ev_config.temperature)
                 # calculate SOH from current degradation
                 self.episode.soh = np.subtract(self.episode.soh, degradation)
                 # calculate new resulting battery capacity after degradation
@@ -675,6 +729,13 @@ class FleetEnv(gym.Env):
             else:
                 degradation = 0.0
 
+            # online KPIs, updated at every time step, also if the data is not logged
+            for kpis in (self.kpis, self.episode_kpis):
+                kpis.update(self.store.hour[self.episode.t], self.store.minute[self.episode.t], reward, cashflow,
+                            penalty, grid, soc_v, degradation, self.charge_log, self.episode.soh)
+            if self.episode.done:
+                self.info = {"kpis": self.episode_kpis.summary()}
+
             # log data if episode is not done, otherwise first observation of next episode would be returned
             if self.log_data and not self.episode.done:
                 self.data_logger.log_data(self.episode.time,
@@ -702,8 +763,45 @@ class FleetEnv(gym.Env):
         return norm_next_obs, reward, self.episode.done, False, self.info
 
     def close(self):
+        # write the remaining entries of a streamed log
+        self.data_logger.flush()
         return None
 
+    def clone(self):
+        """
+        Creates a copy of the environment that shares the dataset, the time series store, the configs and the
+        stateless modules (observer, normalizer, charger, load calculation) with this environment. Episode state,
+        time config, loggers, degradation models and the time picker are new objects, so the copy can run an
+        independent episode. The time config is copied because step updates its time step length.
+        Used to simulate several environments in one process, see FleetVecEnv.
+
+        :return: FleetEnv that shares the data with this environment
+        """
+
+        env = copy.copy(self)
+
+        env.time_conf = copy.copy(self.time_conf)
+        env.episode = Episode(env.time_conf)
+        env.episode.store = self.store
+        env.target_soc = np.ones(self.num_cars) * self.ev_config.target_soc
+        env.info = {}
+        env.kpis = KpiAggregator(self.num_cars, env.time_conf.time_steps_per_hour)
+        env.episode_kpis = KpiAggregator(self.num_cars, env.time_conf.time_steps_per_hour)
+        env.raw_obs = np.zeros(self.obs_spec.dim)
+        env.norm_obs = np.zeros(self.obs_spec.dim, dtype=np.float32)
+        env.time_picker = copy.deepcopy(self.time_picker)
+
+        if self.deg_emp:
+            env.emp_deg = EmpiricalDegradation(self.initial_soh, self.num_cars)
+        else:
+            env.sei_deg = RainflowSeiDegradation(self.initial_soh, self.num_cars)
+        env.deg_scheduler = self.make_deg_scheduler()
+
+        env.deg_data_logger = LogDataDeg(env.episode, self.deg_log_length())
+        env.data_logger = self.make_data_logger()
+
+        return env
+
     def print(self, action):
         """
         The print function can provide useful information of the environment dynamics and the agent's actions.
@@ -715,7 +813,7 @@ class FleetEnv(gym.Env):
         print(f"Timestep: {self.episode.time}")
         if self.include_price:
             print(f"Total price with fees: {np.round(self.episode.price[0] / 1000, 3)} €/kWh")
-            current_spot = self.db.loc[self.db["date"]==self.episode.time, "DELU"].values[0]
+            current_spot = self.store.spot[self.episode.t]
             print(f"Spot: {np.round(current_spot/1000, 3)} €/kWh")
             print(f"Tariff: {self.episode.tariff[0] / 1000} €/kWh")
         print(f"SOC: {np.round(self.episode.soc, 3)}, Time left: {self.episode.hours_left} hours")
@@ -728,7 +826,7 @@ class FleetEnv(gym.Env):
 
     def render(self):
         if self.render_mode == "human":
-            there = self.db["There"][self.db["date"] == self.episode.time].values
+            there = self.store.there[self.episode.t]
             kw = np.multiply(self.episode.current_actions, self.load_calculation.evse_max_power)
             soc = self.episode.soc
             if there is None:
@@ -737,16 +835,94 @@ class FleetEnv(gym.Env):
                 soc = np.zeros(self.num_cars)
             self.pl_render.render(there=there, kw = kw, soc = soc)
 
+    @property
+    def db(self) -> pd.DataFrame:
+        """
+        Processed database in the long format of the DataLoader. If the env was created from a shared or cached
+        store, the database is reconstructed from the store on first access, see TimeSeriesStore.to_frame.
+
+        :return: pd.DataFrame of the database
+        """
+        if self._db is None:
+            self._db = self.store.to_frame()
+        return self._db
+
+    @db.setter
+    def db(self, db: pd.DataFrame):
+        self._db = db
+
+    def deg_log_length(self) -> int:
+        """
+        :return: Number of SoC entries of the degradation log per episode: one in reset and one per time step
+        """
+        return self.time_conf.episode_length * self.time_conf.time_steps_per_hour + 1
+
+    def make_deg_scheduler(self) -> DegradationScheduler:
+        """
+        :return: Degradation scheduler for the cadence of the env config
+        """
+        default_cadence = 1 if self.deg_emp else "daily"
+        return DegradationScheduler(self.store.date_values,
+                                    self.env_config.get("deg_cadence", default_cadence),
+                                    self.env_config.get("deg_time_of_day", "14:45"))
+
+    def make_data_logger(self) -> DataLogger:
+        """
+        Data logger for analysing results. If log_dir is specified in the config, the log is streamed to a new
+        sub-directory of log_dir, so every env (also in SubprocVecEnv workers) writes its own files.
+
+        :return: DataLogger
+        """
+
+        episode_length = self.time_conf.episode_length * self.time_conf.time_steps_per_hour
+        log_dir = self.env_config.get("log_dir")
+        if log_dir is None:
+            return DataLogger(episode_length)
+
+        os.makedirs(log_dir, exist_ok=True)
+        sink = ParquetLogSink(tempfile.mkdtemp(prefix="env_", dir=log_dir))
+        return DataLogger(episode_length, sink=sink, chunk_size=self.env_config.get("log_chunk_size", 10000))
+
     # functions that can be called through vec_envs via env_method()
     def get_log(self):
         """
         This function can be called through SB3 vectorized environments via VecEnv.env_method("get_log")[0]
         The zero index is required so only the first element -> the DataFrame is extracted
 
-        :return: Log dataframe
+        If the log is streamed to log_dir, a LogReader is returned instead. It only holds the path of the log, the
+        data is read with LogReader.read(columns, start, end).
+
+        :return: Log dataframe, or LogReader
         """
         return self.data_logger.log
 
+    def get_kpis(self) -> KpiAggregator:
+        """
+        VecEnv.env_method("get_kpis")[0]
+        Aggregated KPIs of all time steps since the env was created or reset_kpis was called. Available without
+        logging the data, e.g. for BasicEvaluation.compare
+
+        :return: KpiAggregator
+        """
+        return self.kpis
+
+    def get_deg_profile(self) -> dict:
+        """
+        VecEnv.env_method("get_deg_profile")[0]
+        Cost of the degradation calculations, see DegradationScheduler.profile
+
+        :return: Dict of the number of calls, processed SoC entries and time per call
+        """
+        return self.deg_scheduler.profile()
+
+    def reset_kpis(self):
+        """
+        VecEnv.env_method("reset_kpis")
+        :return: None
+        """
+        self.kpis.reset()
+        return None
+
     def is_done(self):
         """
         VecEnv.env_method("is_done")[0]
@@ -787,10 +963,10 @@ class FleetEnv(gym.Env):
         :return: dist/laxity factor, float
         """
 
-        obs = self.observer.get_obs(self.db,
+        obs = self.observer.get_obs(self.store,
                                     self.time_conf.price_lookahead,
                                     self.time_conf.bl_pv_lookahead,
-                                    self.episode.time,
+                                    self.episode.t,
                                     ev_conf=self.ev_config,
                                     load_calc=self.load_calculation,
                                     aux=self.aux_flag,
@@ -830,121 +1006,72 @@ class FleetEnv(gym.Env):
         :return: obs (Observer) -> The observer module to choose
         """
 
+        return self.make_observer(self.include_price, self.include_building_load, self.include_pv)
+
+    @staticmethod
+    def make_observer(include_price: bool, include_building_load: bool, include_pv: bool) -> Observer:
+        """
+        :param include_price: Flag to include price or not
+        :param include_building_load: Flag to include building load or not
+        :param include_pv: Flag to include pv or not
+        :return: obs (Observer) -> The observer module for these flags
+        """
+
         # All observations are made in the observer class
         # not even price: only soc and time left
-        if not self.include_price:
+        if not include_price:
             obs: Observer = ObserverSocTimeOnly()
         # only price
-        elif not self.include_building_load and not self.include_pv:
+        elif not include_building_load and not include_pv:
             obs: Observer = ObserverPriceOnly()
         # price and building load
-        elif self.include_building_load and not self.include_pv:
+        elif include_building_load and not include_pv:
             obs: Observer = ObserverWithBuildingLoad()
         # price and pv
-        elif not self.include_building_load and self.include_pv:
+        elif not include_building_load and include_pv:
             obs: Observer = ObserverWithPV()
         # price, building load and pv
-        elif self.include_building_load and self.include_pv:
+        elif include_building_load and include_pv:
             obs: Observer = ObserverWithBoth()
         else:
             raise TypeError("Observer configuration not found. Recheck flags.")
 
         return obs
 
-    def detect_dim_and_bounds(self):
+    @staticmethod
+    def make_obs_spec(env_config: str | dict, num_cars: int) -> ObservationSpec:
+        """
+        Layout of the observation vector of an env with this config, built without loading any data. E.g. to read
+        the observations of saved logs. Bounds are not set, they depend on the data.
 
+        :param env_config: Env config, dict or path to the json file
+        :param num_cars: Number of cars in the schedule
+        :return: Observation spec, same layout as FleetEnv.obs_spec
         """
-        This function chooses the right dimension of the observation space based on the chosen configuration.
-        Each increase of dim is explained below. The low_obs and high_obs are built in the normalizer object,
-        using the dim value that was calculated in this function.
 
-        - set boundaries of the observation space, detects if normalized or not.
-        - If aux flag is true, additional information enlarges the observation space.
-        - The following code goes through all possible environment setups.
-        - Depending on the setup, the dimensions differ and every case is handled differently.
+        if isinstance(env_config, str):
+            with open(env_config, 'r') as file:
+                env_config = json.load(file)
+
+        time_conf = TimeConfig(env_config)
+        observer = FleetEnv.make_observer(env_config["include_price"],
+                                          env_config["include_building"],
+                                          env_config["include_pv"])
+        return observer.make_spec(num_cars, time_conf.price_lookahead, time_conf.bl_pv_lookahead, env_config["aux"])
+
+    def detect_dim_and_bounds(self):
 
-        :return: low_obs and high_obs: tuple[float, float] | tuple[np.ndarray, np.ndarray] -> used for gym.Spaces
         """
+        The dimension of the observation space is given by the observation spec of the observer, which lists every
+        part of the observation (soc, hours_left, price, ..., aux information if the aux flag is true).
+        The low_obs and high_obs are built in the normalizer object, depending on whether observations are normalized,
+        and stored in the spec, so the bounds of each part can be looked up by name.
 
-        if not self.include_price:
-            dim = 2 * self.num_cars  # soc and time left for each EV
-            if self.aux_flag:
-                dim += self.num_cars  # there
-                dim += self.num_cars  # target soc
-                dim += self.num_cars  # charging left
-                dim += self.num_cars  # hours needed
-                dim += self.num_cars  # laxity
-                dim += 1  # evse power
-                dim += 6  # month, week, hour sin/cos
-            low_obs, high_obs = self.normalizer.make_boundaries(dim)
-
-        elif not self.include_building_load and not self.include_pv:
-            dim = 2 * self.num_cars + (self.time_conf.price_lookahead + 1) * 2
-            if self.aux_flag:
-                dim += self.num_cars  # there
-                dim += self.num_cars  # target soc
-                dim += self.num_cars  # charging left
-                dim += self.num_cars  # hours needed
-                dim += self.num_cars  # laxity
-                dim += 1  # evse power
-                dim += 6  # month, week, hour sin/cos
-            low_obs, high_obs = self.normalizer.make_boundaries(dim)
-
-        elif self.include_building_load and not self.include_pv:
-            dim = (2 * self.num_cars
-                   + (self.time_conf.price_lookahead + 1) * 2
-                   + self.time_conf.bl_pv_lookahead + 1
-                   )
-            if self.aux_flag:
-                dim += self.num_cars  # there
-                dim += self.num_cars  # target soc
-                dim += self.num_cars  # charging left
-                dim += self.num_cars  # hours needed
-                dim += self.num_cars  # laxity
-                dim += 1  # evse power
-                dim += 1  # grid cap
-                dim += 1  # avail grid cap for charging
-                dim += 1  # possible avg action per car
-                dim += 6  # month, week, hour sin/co
-            low_obs, high_obs = self.normalizer.make_boundaries(dim)
-
-        elif not self.include_building_load and self.include_pv:
-            dim = (2 * self.num_cars
-                   + (self.time_conf.price_lookahead + 1) * 2
-                   + self.time_conf.bl_pv_lookahead + 1
-                   )
-            if self.aux_flag:
-                dim += self.num_cars  # there
-                dim += self.num_cars  # target soc
-                dim += self.num_cars  # charging left
-                dim += self.num_cars  # hours needed
-                dim += self.num_cars  # laxity
-                dim += 1  # evse power
-                dim += 6  # month, week, hour sin/cos
-            low_obs, high_obs = self.normalizer.make_boundaries(dim)
-
-        elif self.include_building_load and self.include_pv:
-            dim = (2 * self.num_cars  # soc and time left
-                   + (self.time_conf.price_lookahead + 1) * 2  # price and tariff
-                   + 2 * (self.time_conf.bl_pv_lookahead + 1)  # pv and building load
-                   )
-            if self.aux_flag:
-                dim += self.num_cars  # there
-                dim += self.num_cars  # target soc
-                dim += self.num_cars  # charging left
-                dim += self.num_cars  # hours needed
-                dim += self.num_cars  # laxity
-                dim += 1  # evse power
-                dim += 1  # grid cap
-                dim += 1  # avail grid cap for charging
-                dim += 1  # possible avg action per car
-                dim += 6  # month, week, hour sin/cos
-            low_obs, high_obs = self.normalizer.make_boundaries(dim)
+        :return: low_obs and high_obs: tuple[float, float] | tuple[np.ndarray, np.ndarray] -> used for gym.Spaces
+        """
 
-        else:
-            low_obs = None
-            high_obs = None
-            raise ValueError("Problem with environment setup. Check building and pv flags.")
+        low_obs, high_obs = self.normalizer.make_boundaries(self.obs_spec.dim)
+        self.obs_spec.set_bounds(low_obs, high_obs)
 
         return low_obs, high_obs
 
@@ -969,25 +1096,24 @@ class FleetEnv(gym.Env):
     def auto_gen(self):
         """
         This function automatically generates schedules as specified.
-        Uses the ScheduleGenerator module.
-        Note: this can take up to 1-3 hours, depending on the number of vehicles.
+        Uses the FleetScheduleGenerator module, the vehicles are generated in parallel over gen_workers processes,
+        or in the env process by default and when the env runs in a daemon process (e.g. a SubprocVecEnv worker).
+        A vehicle-year of 15 min timeslots is generated in well under a second. The vehicles are streamed to disk one
+        by one, as a csv file or, with gen_format "parquet", as a directory of columnar files with a manifest.
 
         :return: None -> The schedule is generated and placed in the input folder
         """
-        gen_sched = []
 
         print("Generating schedules... This may take a while.")
-        for i in range(self.gen_n_evs):
-            self.schedule_gen = ScheduleGenerator(env_config=self.env_config,
-                                                  schedule_type=self.schedule_type,
-                                                  vehicle_id=str(i))
+        fleet_gen = FleetScheduleGenerator(env_config=self.env_config,
+                                           schedule_type=self.schedule_type,
+                                           n_evs=self.gen_n_evs,
+                                           workers=self.env_config.get("gen_workers", None))
 
-            gen_sched.append(self.schedule_gen.generate_schedule())
-
-        complete_schedule = pd.concat(gen_sched)
-        if not self.gen_name.endswith(".csv"):
+        gen_format = self.env_config.get("gen_format", "csv")
+        if gen_format == "csv" and not self.gen_name.endswith(".csv"):
             self.gen_name = self.gen_name + ".csv"
-        complete_schedule.to_csv(os.path.join(self.path_name, self.gen_name))
+        fleet_gen.write(os.path.join(self.path_name, self.gen_name), file_format=gen_format)
         print(f"Schedule generation complete. Saved in Inputs path. File name: {self.gen_name}")
         self.schedule_name = self.gen_name
 
@@ -996,15 +1122,12 @@ class FleetEnv(gym.Env):
         """
         Calculates the time delta from the current time step and the next one. This allows for csv input files that
         have irregular time intervals. Energy calculations will automatically adjust for the dynamic time differences
-        through kWh = kW * dt
+        through kWh = kW * dt. The deltas are precomputed in the time series store.
 
         :return: next time delta in hours
         """
 
-        current_time = self.episode.time
-        next_time = self.db["date"][self.db["date"].searchsorted(current_time) + 1]
-        delta = (next_time - current_time).total_seconds()/3600
-        return delta
+        return self.store.dt[self.episode.t]
 
     def get_next_minutes(self):
 
@@ -1016,10 +1139,7 @@ class FleetEnv(gym.Env):
         :return: Integer of minutes until next timestep
         """
 
-        current_time = self.episode.time
-        next_time = self.db["date"][self.db["date"].searchsorted(current_time) + 1]
-        delta = (next_time - current_time).total_seconds()/60
-        return int(delta)
+        return self.store.minutes[self.episode.t]
 
     def read_config(self, conf_path: str):
 
@@ -1036,7 +1156,7 @@ class FleetEnv(gym.Env):
 
         for path in [schedule, spot, load, pv]:
             if path is not None:
-                assert(os.path.isfile(path)), f"Path does not exist: {path}"
+                assert(os.path.isfile(path) or ScheduleReader.is_schedule_dir(path)), f"Path does not exist: {path}"
 
     def specify_company_and_battery_size(self, use_case):
         # Specify company type and associated battery size in kWh
@@ -1059,6 +1179,46 @@ class FleetEnv(gym.Env):
         else:
             raise TypeError("Company not recognised.")
 
+    def get_input_files(self) -> list[str]:
+        """
+        :return: Paths of all input files that are loaded with the current settings
+        """
+
+        schedule = os.path.join(self.path_name, self.schedule_name)
+        # a schedule directory is identified by its manifest and data files
+        files = ScheduleReader(schedule).files if ScheduleReader.is_schedule_dir(schedule) else [schedule]
+        files += [os.path.join(self.path_name, self.spot_name),
+                  os.path.join(self.path_name, self.tariff_name)]
+        if self.include_building_load:
+            files.append(os.path.join(self.path_name, self.building_name))
+        if self.include_pv:
+            files.append(os.path.join(self.path_name, self.pv_name))
+        return files
+
+    def get_data_settings(self, use_case: str) -> dict:
+        """
+        :param use_case: String to specify the use-case
+        :return: Dict of all settings that change the processed data, used as part of the cache key
+        """
+
+        return {"use_case": use_case,
+                "freq": self.time_conf.freq,
+                "minutes": self.time_conf.minutes,
+                "real_time": self.real_time,
+                "include_building": self.include_building_load,
+                "include_pv": self.include_pv,
+                "include_price": self.include_price,
+                "ev_config": vars(self.ev_config)}
+
+    def invalidate_cache(self):
+        """
+        Removes the cached processed data of this environment's inputs, so it is rebuilt at the next instantiation.
+        VecEnv.env_method("invalidate_cache", indices=0)
+        :return: None
+        """
+        if self.data_cache is not None:
+            self.data_cache.invalidate(self.cache_key)
+
     def change_markups(self):
         if self.env_config["spot_markup"] is not None:
             self.ev_config.fixed_markup = self.env_config["spot_markup"]
@@ -0,0 +1,576 @@
+from typing import Any, Sequence, Type
+
+import gymnasium as gym
+import numpy as np
+import pandas as pd
+
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv, VecEnvIndices, VecEnvObs, VecEnvStepReturn
+
+from fleetrl.fleet_env.fleet_environment import FleetEnv
+from fleetrl.utils.data_logger.kpi_aggregator import BatchKpiAggregator, KpiAggregator
+from fleetrl.utils.load_calculation.load_calculation import CompanyType
+from fleetrl.utils.time_picker.static_time_picker import StaticTimePicker
+
+
+class FleetVecEnv(VecEnv):
+    """
+    Vectorized FleetRL environment: K episodes of the same fleet, stepped together in one process.
+
+    The episode state of the K envs is kept as arrays with a leading env axis: time index t (K,), soc, hours_left,
+    soh, battery capacity and target soc (K, N), cumulative reward (K,). A step is one vectorized calculation over
+    the shared time series store, each env reads the store at its own time index: observation (K, obs_dim),
+    charging (see EvCharger.charge_batch), grid overloading, departures and arrivals, penalties, rewards and KPIs
+    (see BatchKpiAggregator). Only events of single envs are handled per env: degradation calculations when they are
+    due, the start time of a new episode, and the data log if log_data is set.
+
+    The dataset is loaded once. The per-env modules (time picker, degradation model and scheduler, data logger) are
+    held by one FleetEnv per env, created with FleetEnv.clone, so they share the store and the stateless modules.
+    These envs are not stepped. Their episode state is synchronized from the arrays when it is accessed through
+    get_attr or env_method (e.g. env_method("get_dist_factor"), env_method("get_log")).
+
+    Implements the stable-baselines3 VecEnv API, so it can be used in place of make_vec_env(FleetEnv, ...). The
+    gymnasium vector API is available via FleetGymVectorEnv. Finished episodes are reset automatically, the last
+    observation is saved in infos[k]["terminal_observation"]. The results are the same as K FleetEnvs with the same
+    start times and actions. Print statements (verbose) and real_time are not supported.
+    """
+
+    def __init__(self, env_config: str | dict, n_envs: int, start_times: Sequence[str] = None):
+        """
+        :param env_config: String to specify path of json config file, or dict with config, see FleetEnv
+        :param n_envs: Number of environments K
+        :param start_times: Optional start time for each environment, e.g. "01/02/2021 19:00". If specified, each
+            environment always starts at its own start time. Otherwise, the time picker of the config is used.
+        """
+
+        if start_times is not None and len(start_times) != n_envs:
+            raise ValueError(f"Expected {n_envs} start times, got {len(start_times)}.")
+
+        # the first environment loads the data, the others share it
+        first_env = FleetEnv(env_config)
+        if first_env.real_time:
+            raise ValueError("FleetVecEnv steps all environments together, real_time is not supported.")
+        self.envs: list[FleetEnv] = [first_env] + [first_env.clone() for _ in range(n_envs - 1)]
+
+        if start_times is not None:
+            for env, start_time in zip(self.envs, start_times):
+                env.time_picker = StaticTimePicker(start_time)
+
+        # store, configs and stateless modules, shared by all envs
+        self.store = first_env.store
+        self.num_cars: int = first_env.num_cars
+        self.time_conf = first_env.time_conf
+        self.ev_config = first_env.ev_config
+        self.score_config = first_env.score_config
+        self.observer = first_env.observer
+        self.normalizer = first_env.normalizer
+        self.ev_charger = first_env.ev_charger
+        self.load_calculation = first_env.load_calculation
+        self.obs_spec = first_env.obs_spec
+
+        super().__init__(n_envs, first_env.observation_space, first_env.action_space)
+
+        shape = (n_envs, self.num_cars)
+
+        # episode state of the envs, one row per env
+        self.t: np.ndarray = np.zeros(n_envs, dtype=np.int64)  # time index in the store
+        self.start_t: np.ndarray = np.zeros(n_envs, dtype=np.int64)  # time index at the start of the episode
+        self.finish_t: np.ndarray = np.zeros(n_envs, dtype=np.int64)  # time index of the end of the episode
+        self.step_t: np.ndarray = np.full(n_envs, -1)  # time index of the last step, -1 before the first step
+        self.start_time: list[pd.Timestamp] = [None] * n_envs
+        self.finish_time: list[pd.Timestamp] = [None] * n_envs
+        self.done: np.ndarray = np.zeros(n_envs, dtype=bool)
+        self.soc: np.ndarray = np.zeros(shape)
+        self.old_soc: np.ndarray = np.zeros(shape)
+        self.soc_deg: np.ndarray = np.zeros(shape)
+        self.hours_left: np.ndarray = np.zeros(shape)
+        self.soh: np.ndarray = np.ones(shape) * first_env.initial_soh
+        self.battery_cap: np.ndarray = self.soh * self.ev_config.init_battery_cap
+        self.target_soc: np.ndarray = np.ones(shape) * self.ev_config.target_soc  # raised if batteries degrade
+        self.cumulative_reward: np.ndarray = np.zeros(n_envs)
+        self.penalty_record: np.ndarray = np.zeros(n_envs)
+
+        # observation buffers
+        self.raw_obs: np.ndarray = np.zeros((n_envs, self.obs_spec.dim))
+        self.norm_obs: np.ndarray = np.zeros((n_envs, self.obs_spec.dim), dtype=np.float32)
+
+        # per time step of the episode: cumulative reward, and soc log of the degradation models. Indexed with
+        # t - start_t, the soc log has one more entry (logged in reset). The soc log of env k is the buffer of the
+        # degradation logger of that env
+        self.history_length: int = 0
+        self.reward_history: np.ndarray = np.zeros((n_envs, 0))
+        self.deg_soc: np.ndarray = np.zeros((n_envs, 0, self.num_cars), dtype=first_env.deg_data_logger.dtype)
+        self.deg_entries: np.ndarray = np.zeros(n_envs, dtype=np.int64)  # number of logged soc entries
+        self.reserve(first_env.deg_log_length())
+
+        # online KPIs: over all episodes since the last reset_kpis(), and of the current episode (terminal info dict)
+        self.kpis = BatchKpiAggregator(n_envs, self.num_cars, self.time_conf.time_steps_per_hour)
+        self.episode_kpis = BatchKpiAggregator(n_envs, self.num_cars, self.time_conf.time_steps_per_hour)
+
+        self.actions: np.ndarray = None
+        self.buf_rews = np.zeros(n_envs, dtype=np.float32)
+
+    def reset(self) -> VecEnvObs:
+        """
+        Resets all environments. FleetEnv.reset does not use seeds or options, the time pickers are seeded by the
+        config.
+
+        :return: Stacked first observations, (K, obs_dim)
+        """
+
+        self.reset_envs(np.arange(self.num_envs))
+        self.reset_infos = [{} for _ in range(self.num_envs)]
+        self._reset_seeds()
+        self._reset_options()
+        return self.norm_obs.copy()
+
+    def reset_envs(self, indices: np.ndarray) -> None:
+        """
+        Starts a new episode in the given envs, same as FleetEnv.reset. The start times are chosen per env, the first
+        observations are written in one go.
+
+        :param indices: Indices of the envs
+        :return: None
+        """
+
+        first_env = self.envs[0]
+        for k in indices:
+            env = self.envs[k]
+            env.info = {}
+            env.deg_data_logger.reset()
+            if env.deg_emp:
+                env.emp_deg.new_soc_log()
+            else:
+                env.sei_deg.new_soc_log()
+
+            # choose a start time based on the type of choice: same, random, deterministic
+            self.start_time[k] = env.time_picker.choose_time(env.dates, self.time_conf.freq, self.time_conf.end_cutoff)
+            self.finish_time[k] = self.start_time[k] + np.timedelta64(self.time_conf.episode_length, 'h')
+            self.t[k] = self.store.index_of(self.start_time[k])
+            self.finish_t[k] = int(self.store.date_values.searchsorted(np.datetime64(self.finish_time[k], "ns")))
+            env.deg_scheduler.reset(self.t[k])
+
+        self.start_t[indices] = self.t[indices]
+        self.reserve(int(np.max(self.finish_t[indices] - self.t[indices])) + 1)
+        self.episode_kpis.reset(indices)
+        self.done[indices] = False
+
+        # instantiate soh and battery capacity - depending on initial health settings
+        self.soh[indices] = first_env.initial_soh
+        self.battery_cap[indices] = self.soh[indices] * self.ev_config.init_battery_cap
+
+        obs = self.observer.observe(self.store,
+                                    self.t[indices],
+                                    ev_conf=self.ev_config,
+                                    load_calc=self.load_calculation,
+                                    aux=first_env.aux_flag,
+                                    target_soc=self.target_soc[indices],
+                                    out=self.raw_obs[indices])
+        sl = self.obs_spec.slices
+        soc = obs[:, sl["soc"]].copy()
+        hours_left = obs[:, sl["hours_left"]].copy()
+
+        # if time is insufficient due to unfavourable start date, soc is set in such a way that the agent always has
+        # a chance to fulfil the objective, see FleetEnv.reset
+        target_soc = self.target_soc[indices]
+        battery_cap = self.battery_cap[indices]
+        p_avail = min([self.ev_config.obc_max_power, self.load_calculation.evse_max_power])
+        time_needed = (target_soc - soc) * battery_cap / p_avail
+        insufficient = (hours_left > 0) & (self.ev_config.min_laxity * time_needed > hours_left)
+        soc = np.where(insufficient,
+                       target_soc - (time_needed * p_avail / battery_cap) / self.ev_config.min_laxity,
+                       soc)
+
+        self.soc[indices] = soc
+        self.old_soc[indices] = soc
+        self.hours_left[indices] = hours_left
+        # for battery degradation adjust to default soc, if soc is unknown in the beginning
+        self.soc_deg[indices] = np.where(soc == 0, self.ev_config.def_soc, soc)
+        self.cumulative_reward[indices] = 0
+        self.penalty_record[indices] = 0
+
+        # rebuild the observation vectors with modified values
+        obs[:, sl["soc"]] = soc
+        obs[:, sl["hours_left"]] = hours_left
+        self.raw_obs[indices] = obs
+        self.norm_obs[indices] = self.normalizer.normalize_flat(obs, out=np.zeros(obs.shape, dtype=np.float32))
+
+        # Log first soc for battery degradation
+        if first_env.calc_deg:
+            self.deg_soc[indices, 0] = self.soc_deg[indices]
+            self.deg_entries[indices] = 1
+
+        if first_env.log_data:
+            for k in indices:
+                self.envs[k].data_logger.log_data(self.store.timestamp(self.t[k]), self.norm_obs[k],
+                                                  np.zeros(self.num_cars), 0.0, 0.0, 0.0, 0.0, 0.0, 0.0,
+                                                  np.zeros(self.num_cars), self.soh[k])
+
+    def step_async(self, actions: np.ndarray) -> None:
+        """
+        :param actions: Actions of all environments, (K, N)
+        :return: None
+        """
+        self.actions = np.asarray(actions).reshape(self.num_envs, self.num_cars)
+
+    def step_wait(self) -> VecEnvStepReturn:
+        """
+        Steps all environments with the actions from step_async, same as FleetEnv.step for each env. Finished
+        episodes are reset automatically.
+
+        :return: Stacked observations, rewards, done flags and a list of info dicts
+        """
+
+        first_env = self.envs[0]
+        store = self.store
+        actions = self.actions
+        envs = np.arange(self.num_envs)
+
+        # time index and length of the current time step of each env
+        t = self.t.copy()
+        dt = store.dt[t]
+        there = store.there[t]
+        self.step_t = t
+
+        # charging of all fleets, reward and cashflow per env
+        next_soc, reward, cashflow, charge_log, _, _, _, _ = self.ev_charger.charge_batch(
+            store, t, dt, actions, self.soc, self.battery_cap, self.target_soc, self.load_calculation,
+            self.ev_config, self.score_config, False)
+
+        # check if the grid connections have been overloaded and by how much, actions corrected for empty spots
+        current_load = store.load[t] if first_env.include_building_load else 0
+        current_pv = store.pv[t] if first_env.include_pv else 0
+        overloaded, overload_amount = self.load_calculation.check_violation(actions * there, there,
+                                                                            current_load, current_pv)
+        if overloaded.any():
+            relative_loading = overload_amount[overloaded] / self.load_calculation.grid_connection + 1
+            overload_penalty = self.score_config.overloading_penalty(relative_loading)
+            reward[overloaded] += overload_penalty
+            self.penalty_record[overloaded] += overload_penalty
+
+        # advance one time step and observe new arrivals or departures
+        self.t += 1
+        next_obs = self.observer.observe(store,
+                                         self.t,
+                                         ev_conf=self.ev_config,
+                                         load_calc=self.load_calculation,
+                                         aux=first_env.aux_flag,
+                                         target_soc=self.target_soc,
+                                         out=self.raw_obs)
+        sl = self.obs_spec.slices
+        next_obs_soc = next_obs[:, sl["soc"]].copy()
+        next_obs_time_left = next_obs[:, sl["hours_left"]].copy()
+
+        # transition masks
+        departed = (self.hours_left != 0) & (next_obs_time_left == 0)  # car just left
+        still_plugged = (next_obs_time_left != 0) & (self.hours_left != 0)  # still charging
+        arrived = (self.hours_left == 0) & (next_obs_time_left != 0)  # new arrival in the next time step
+
+        # caretaker is a special case because of the lunch break, a different target soc is applied
+        departure_target = self.target_soc
+        if first_env.company == CompanyType.Caretaker:
+            hour = store.hour[self.t]
+            lunch_break = (hour > 11) & (hour < 15)
+            departure_target = np.where(lunch_break[:, None], self.ev_config.target_soc_lunch, self.target_soc)
+
+        # if charging requirement wasn't met (with some tolerance eps)
+        soc_missing = departure_target - next_soc
+        violated = departed & (soc_missing > first_env.eps)
+        fully_charged = departed & ~violated
+
+        # the penalties of an env are summed like in FleetEnv.step, only for the few envs with violations
+        soc_v = np.zeros(self.num_envs)
+        for k in np.flatnonzero(violated.any(axis=1)):
+            missing = soc_missing[k][violated[k]]
+            soc_v[k] = abs(missing.sum())
+            current_soc_pen = self.score_config.soc_violation_penalty(missing)
+            reward[k] += current_soc_pen.sum()
+            self.penalty_record[k] += current_soc_pen.sum()
+
+        # reward for fully charging the car
+        reward += self.score_config.fully_charged_reward * fully_charged.sum(axis=1)
+
+        # still charging: hours left count down. No car or a new arrival: values of the next time step
+        self.hours_left = np.where(still_plugged, self.hours_left - dt[:, None], next_obs_time_left)
+        self.old_soc = np.where(arrived, next_soc, self.soc)
+        self.soc = np.where(still_plugged, next_soc, next_obs_soc)
+
+        # if battery degradation >= 10%, target SOC is increased to ensure sufficient kWh in the battery
+        self.target_soc[self.soh <= 0.9] = 0.9
+
+        # Update SOH value for degradation calculations, wherever a car is plugged in
+        self.soc_deg = np.where(self.hours_left != 0, self.soc, self.soc_deg)
+
+        # if the finish time is reached, the episode is done and is reset below
+        self.done = self.t >= self.finish_t
+        done_envs = np.flatnonzero(self.done)
+        if first_env.calc_deg:
+            for k in done_envs:
+                self.sync_deg_log(k)
+                self.envs[k].deg_data_logger.add_log_entry()
+
+        # append to the reward history
+        steps = self.t - self.start_t
+        self.cumulative_reward += reward
+        self.reward_history[envs, steps - 1] = self.cumulative_reward
+
+        next_obs[:, sl["soc"]] = self.soc
+        next_obs[:, sl["hours_left"]] = self.hours_left
+        self.normalizer.normalize_flat(next_obs, out=self.norm_obs)
+
+        # for logging: calculate penalty amount, grid overloading in kW and percentage points of SOC violated
+        penalty = reward - (cashflow * self.score_config.price_multiplier)
+        grid = overload_amount
+
+        # degradation and state of health, calculated per env when it is due, see DegradationScheduler
+        degradation = np.zeros((self.num_envs, self.num_cars))
+        due = np.zeros(self.num_envs, dtype=bool)
+        if first_env.calc_deg:
+            self.deg_soc[envs, steps] = self.soc_deg
+            self.deg_entries[:] = steps + 1
+            due = first_env.deg_scheduler.due_batch(self.t, self.start_t, self.done, departed)
+            for k in np.flatnonzero(due):
+                env = self.envs[k]
+                self.sync_deg_log(k)
+                self.sync_time_conf(k)
+                degradation[k] = env.deg_scheduler.run(env.emp_deg if env.deg_emp else env.sei_deg,
+                                                       env.deg_data_logger.soc_log,
+                                                       self.load_calculation.evse_max_power,
+                                                       env.time_conf,
+                                                       self.ev_config.temperature)
+            self.soh[due] = np.subtract(self.soh[due], degradation[due])
+            self.battery_cap[due] = self.soh[due] * self.ev_config.init_battery_cap
+
+        # online KPIs of all envs
+        for kpis in (self.kpis, self.episode_kpis):
+            kpis.update(store.hour[self.t], store.minute[self.t], reward, cashflow, penalty, grid, soc_v,
+                        degradation, charge_log, self.soh)
+
+        # log data if episode is not done, otherwise first observation of next episode would be returned
+        if first_env.log_data:
+            for k in np.flatnonzero(~self.done):
+                self.envs[k].data_logger.log_data(store.timestamp(self.t[k]), self.norm_obs[k], actions[k],
+                                                  reward[k], cashflow[k], penalty[k], grid[k], soc_v[k],
+                                                  degradation[k] if due[k] else 0.0, charge_log[k], self.soh[k])
+
+        dones = self.done.copy()
+        infos = [{"TimeLimit.truncated": False} for _ in range(self.num_envs)]
+        for k in done_envs:
+            self.envs[k].info = {"kpis": self.episode_kpis.get(k).summary()}
+            infos[k].update(self.envs[k].info)
+            # save final observation where the user can get it, then reset
+            infos[k]["terminal_observation"] = self.norm_obs[k].copy()
+            self.reset_infos[k] = {}
+        if len(done_envs) > 0:
+            self.reset_envs(done_envs)
+
+        self.buf_rews[:] = reward
+        return self.norm_obs.copy(), self.buf_rews.copy(), dones, infos
+
+    def reserve(self, length: int) -> None:
+        """
+        Makes sure that the per time step buffers hold episodes of the given number of time steps.
+
+        :param length: Number of entries per episode
+        :return: None
+        """
+
+        if length <= self.history_length:
+            return
+        old_length = self.history_length
+        self.history_length = max(length, 2 * old_length)
+
+        reward_history = np.zeros((self.num_envs, self.history_length))
+        reward_history[:, :old_length] = self.reward_history
+        self.reward_history = reward_history
+
+        deg_soc = np.zeros((self.num_envs, self.history_length, self.num_cars), dtype=self.deg_soc.dtype)
+        deg_soc[:, :old_length] = self.deg_soc
+        self.deg_soc = deg_soc
+        if self.envs[0].calc_deg:
+            for k, env in enumerate(self.envs):
+                env.deg_data_logger.buffers["soc"] = self.deg_soc[k]
+                env.deg_data_logger.capacity = self.history_length
+
+    def sync_deg_log(self, index: int) -> None:
+        """
+        Sets the length of the soc log of the degradation logger of an env to the entries logged so far.
+
+        :param index: Index of the env
+        :return: None
+        """
+        self.envs[index].deg_data_logger.cursors["soc"] = int(self.deg_entries[index])
+
+    def sync_time_conf(self, index: int) -> None:
+        """
+        Sets the time step length of the last step in the time config of an env, same as FleetEnv.step.
+
+        :param index: Index of the env
+        :return: None
+        """
+        step_t = self.step_t[index]
+        if step_t >= 0:
+            time_conf = self.envs[index].time_conf
+            time_conf.dt = self.store.dt[step_t]
+            time_conf.time_steps_per_hour = int(1 / np.copy(time_conf.dt))
+            time_conf.minutes = self.store.minutes[step_t]
+
+    def sync(self, indices: VecEnvIndices = None) -> None:
+        """
+        Writes the episode state of the arrays into the episodes of the envs, so that the methods and attributes of
+        the envs can be used, e.g. env_method("get_dist_factor") or get_attr("episode").
+
+        :param indices: Indices of the envs, all envs if None
+        :return: None
+        """
+
+        sl = self.obs_spec.slices
+        for k in self._get_indices(indices):
+            env = self.envs[k]
+            env.target_soc = self.target_soc[k].copy()
+            env.kpis = self.kpis.get(k)
+            env.episode_kpis = self.episode_kpis.get(k)
+            if self.start_time[k] is None:
+                continue
+
+            episode = env.episode
+            episode.t = int(self.t[k])
+            episode.finish_t = int(self.finish_t[k])
+            episode.start_time = self.start_time[k]
+            episode.finish_time = self.finish_time[k]
+            episode.done = bool(self.done[k])
+            episode.soc = list(self.soc[k])
+            episode.next_soc = list(self.soc[k])
+            episode.old_soc = list(self.old_soc[k])
+            episode.soc_deg = list(self.soc_deg[k])
+            episode.hours_left = list(self.hours_left[k])
+            episode.soh = self.soh[k].copy()
+            episode.battery_cap = self.battery_cap[k].copy()
+            if env.include_price:
+                episode.price = list(self.raw_obs[k, sl["price"]])
+                episode.tariff = list(self.raw_obs[k, sl["tariff"]])
+            episode.cumulative_reward = float(self.cumulative_reward[k])
+            episode.penalty_record = float(self.penalty_record[k])
+            episode.reward_history = [(self.store.timestamp(self.start_t[k] + i + 1),
+                                       float(self.reward_history[k, i])) for i in range(self.t[k] - self.start_t[k])]
+            self.sync_deg_log(k)
+            self.sync_time_conf(k)
+
+    def close(self) -> None:
+        for env in self.envs:
+            env.close()
+
+    def get_attr(self, attr_name: str, indices: VecEnvIndices = None) -> list[Any]:
+        self.sync(indices)
+        return [getattr(self.envs[i], attr_name) for i in self._get_indices(indices)]
+
+    def set_attr(self, attr_name: str, value: Any, indices: VecEnvIndices = None) -> None:
+        # reaches the per-env modules (e.g. time_picker), the episode state is kept in the arrays of the vec env
+        for i in self._get_indices(indices):
+            setattr(self.envs[i], attr_name, value)
+
+    def env_method(self, method_name: str, *method_args, indices: VecEnvIndices = None, **method_kwargs) -> list[Any]:
+        if method_name == "reset_kpis":
+            # the KPIs are aggregated by the vec env
+            indices = self._get_indices(indices)
+            self.kpis.reset(list(indices))
+            return [None for _ in indices]
+        self.sync(indices)
+        return [getattr(self.envs[i], method_name)(*method_args, **method_kwargs) for i in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class: Type[gym.Wrapper], indices: VecEnvIndices = None) -> list[bool]:
+        # the environments are created internally and are never wrapped
+        return [False for _ in self._get_indices(indices)]
+
+    def get_log(self, index: int = 0) -> pd.DataFrame:
+        """
+        :param index: Index of the environment
+        :return: Log dataframe of that environment
+        """
+        return self.envs[index].get_log()
+
+    def get_kpis(self, index: int = None) -> KpiAggregator:
+        """
+        :param index: Index of the environment, the KPIs of all envs are merged if None
+        :return: KPIs since the start or the last reset_kpis
+        """
+        if index is not None:
+            return self.kpis.get(index)
+        kpis = self.kpis.get(0)
+        for k in range(1, self.num_envs):
+            kpis.merge(self.kpis.get(k))
+        return kpis
+
+    def set_start_time(self, start_time: str, index: int) -> None:
+        """
+        Fixes the start time of one environment for all following episodes.
+
+        :param start_time: string of pd.TimeStamp / date
+        :param index: Index of the environment
+        :return: None
+        """
+        self.envs[index].time_picker = StaticTimePicker(start_time)
+
+    @property
+    def time_index(self) -> np.ndarray:
+        """
+        :return: Integer time index of each environment in the shared store, (K,)
+        """
+        return self.t
+
+
+class FleetGymVectorEnv(gym.vector.VectorEnv):
+    """
+    gymnasium vector API on top of FleetVecEnv. Episodes are reset automatically, the last observation and info of a
+    finished episode are returned in infos["final_observation"] and infos["final_info"].
+    """
+
+    def __init__(self, env_config: str | dict, n_envs: int, start_times: Sequence[str] = None):
+        """
+        :param env_config: String to specify path of json config file, or dict with config, see FleetEnv
+        :param n_envs: Number of environments K
+        :param start_times: Optional start time for each environment, see FleetVecEnv
+        """
+
+        self.vec_env = FleetVecEnv(env_config, n_envs, start_times)
+        super().__init__(n_envs, self.vec_env.observation_space, self.vec_env.action_space)
+
+    def reset(self, *, seed: int | list[int] = None, options: dict = None) -> tuple[np.ndarray, dict]:
+        if seed is not None:
+            self.vec_env.seed(seed)
+        if options is not None:
+            self.vec_env.set_options(options)
+        obs = self.vec_env.reset()
+        return obs, {}
+
+    def step(self, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict]:
+        obs, rewards, dones, infos = self.vec_env.step(actions)
+
+        truncated = np.array([info["TimeLimit.truncated"] for info in infos], dtype=bool)
+        terminated = dones & ~truncated
+
+        vector_infos = {}
+        if dones.any():
+            final_obs = np.full(self.num_envs, None, dtype=object)
+            final_info = np.full(self.num_envs, None, dtype=object)
+            for k in np.flatnonzero(dones):
+                final_obs[k] = infos[k].pop("terminal_observation")
+                final_info[k] = infos[k]
+            vector_infos = {"final_observation": final_obs, "_final_observation": dones.copy(),
+                            "final_info": final_info, "_final_info": dones.copy()}
+
+        return obs, rewards, terminated, truncated, vector_infos
+
+    def close_extras(self, **kwargs) -> None:
+        self.vec_env.close()
+
+    def call(self, name: str, *args, **kwargs) -> tuple:
+        return tuple(self.vec_env.env_method(name, *args, **kwargs))
+
+    def get_attr(self, name: str) -> tuple:
+        return tuple(self.vec_env.get_attr(name))
+
+    def set_attr(self, name: str, values: Any) -> None:
+        if not isinstance(values, (list, tuple)):
+            values = [values for _ in range(self.num_envs)]
+        for k, value in enumerate(values):
+            self.vec_env.set_attr(name, value, indices=k)
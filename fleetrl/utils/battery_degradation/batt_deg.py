@@ -16,3 +16,12 @@ class BatteryDegradation:
         :return: Degradation of battery (unit-less, reduction of SoH, which is max. 1)
         """
         raise NotImplementedError("This is an abstract class.")
+
+    def new_soc_log(self) -> None:
+        """
+        Called by the environment when a new SoC log is started, e.g. at the start of an episode. Methods that keep
+        state derived from the SoC log reset it here, the SoH is kept.
+
+        :return: None
+        """
+        pass
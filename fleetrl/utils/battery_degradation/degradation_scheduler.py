@@ -0,0 +1,172 @@
+import time
+
+import numpy as np
+
+from fleetrl.fleet_env.config.time_config import TimeConfig
+from fleetrl.utils.battery_degradation.batt_deg import BatteryDegradation
+
+
+class DegradationScheduler:
+    """
+    Decides in which time steps the degradation is calculated, and measures the cost of each calculation.
+    The degradation methods keep incremental state, so each calculation only processes the SoC entries that were
+    logged since the previous one.
+
+    Cadence, a single value or a list of them (the degradation is calculated if any of them applies):
+
+    - "daily": once per day, in the first time step at or after the time of day. With regular time steps, this is
+      the time step at the time of day. Also works for irregular time steps, where that time stamp may not exist
+    - int k: every k time steps since the start of the episode
+    - "episode_end": in the last time step of an episode
+    - "plug_out": in time steps in which at least one car left the charger
+    """
+
+    triggers = ("daily", "episode_end", "plug_out")
+
+    def __init__(self, date_values: np.ndarray, cadence="daily", time_of_day: str = "14:45"):
+        """
+        :param date_values: Time stamps of the time series store, datetime64
+        :param cadence: Cadence, see above
+        :param time_of_day: Time of day of the daily calculation, "HH:MM"
+        """
+
+        cadence = list(cadence) if isinstance(cadence, (list, tuple)) else [cadence]
+
+        self.every_k: int = None
+        self.daily: bool = False
+        self.episode_end: bool = False
+        self.plug_out: bool = False
+        for trigger in cadence:
+            if isinstance(trigger, (int, np.integer)) and not isinstance(trigger, bool) and trigger > 0:
+                self.every_k = int(trigger)
+            elif trigger in self.triggers:
+                setattr(self, trigger, True)
+            else:
+                raise ValueError(f"Unknown degradation cadence: {trigger}. "
+                                 f"Use a number of time steps or one of {self.triggers}.")
+
+        # precomputed daily time steps, looked up with the integer time cursor
+        self.daily_steps: np.ndarray = self.find_daily_steps(date_values, time_of_day) if self.daily else None
+
+        self.start_t: int = 0  # time cursor at the start of the episode
+
+        # cost of the calculations
+        self.calls: int = 0
+        self.samples: int = 0  # number of SoC entries processed
+        self.total_time: float = 0.0
+        self.max_time: float = 0.0
+        self.last_time: float = 0.0
+        self.processed: int = 0  # length of the SoC log at the last calculation
+
+    @staticmethod
+    def find_daily_steps(date_values: np.ndarray, time_of_day: str) -> np.ndarray:
+        """
+        :param date_values: Time stamps, datetime64
+        :param time_of_day: Time of day, "HH:MM"
+        :return: Boolean array, True in the time steps t where the interval (time of t-1, time of t] contains the
+            time of day. In the first time step, True if it is exactly at the time of day.
+        """
+
+        hours, minutes = (int(value) for value in time_of_day.split(":"))
+        offset = np.timedelta64(hours * 60 + minutes, "m")
+
+        times = np.asarray(date_values).astype("datetime64[m]")
+        days = times.astype("datetime64[D]").astype("datetime64[m]")
+
+        steps = np.zeros(len(times), dtype=bool)
+        if len(times) == 0:
+            return steps
+        # next occurrence of the time of day after the previous time step
+        target = days[:-1] + offset
+        target = np.where(target <= times[:-1], target + np.timedelta64(1, "D"), target)
+        steps[1:] = target <= times[1:]
+        steps[0] = times[0] - days[0] == offset
+        return steps
+
+    def reset(self, t: int) -> None:
+        """
+        Starts a new episode.
+
+        :param t: Time cursor at the start of the episode
+        :return: None
+        """
+        self.start_t = t
+        self.processed = 0
+
+    def due(self, t: int, done: bool, departed: np.ndarray) -> bool:
+        """
+        :param t: Time cursor of the current time step
+        :param done: Episode is done
+        :param departed: Mask of the cars that left the charger in this time step
+        :return: True if the degradation should be calculated in this time step
+        """
+
+        return bool((self.daily and self.daily_steps[t])
+                    or (self.every_k is not None and (t - self.start_t) % self.every_k == 0)
+                    or (self.episode_end and done)
+                    or (self.plug_out and np.any(departed)))
+
+    def due_batch(self, t: np.ndarray, start_t: np.ndarray, done: np.ndarray, departed: np.ndarray) -> np.ndarray:
+        """
+        due for the K envs of a FleetVecEnv at once. The envs share the cadence of this scheduler, each one has its
+        own episode start.
+
+        :param t: Time cursor of each env, (K,)
+        :param start_t: Time cursor at the start of the episode of each env, (K,)
+        :param done: Episode done flag of each env, (K,)
+        :param departed: Mask of the cars that left the charger in this time step, (K, num_cars)
+        :return: Mask of the envs in which the degradation should be calculated, (K,)
+        """
+
+        due = np.zeros(len(t), dtype=bool)
+        if self.daily:
+            due |= self.daily_steps[t]
+        if self.every_k is not None:
+            due |= (t - start_t) % self.every_k == 0
+        if self.episode_end:
+            due |= done
+        if self.plug_out:
+            due |= departed.any(axis=1)
+        return due
+
+    def run(self,
+            model: BatteryDegradation,
+            soc_log,
+            charging_power: float,
+            time_conf: TimeConfig,
+            temp: float) -> np.ndarray:
+        """
+        Calculates the degradation and records its cost.
+
+        :param model: Degradation method
+        :param soc_log: SoC log of the episode so far
+        :param charging_power: kW of the charger
+        :param time_conf: Time config instance from the environment
+        :param temp: Temperature in °C
+        :return: Degradation of each car
+        """
+
+        start = time.perf_counter()
+        degradation = model.calculate_degradation(soc_log, charging_power, time_conf, temp)
+        duration = time.perf_counter() - start
+
+        self.calls += 1
+        self.samples += len(soc_log) - self.processed
+        self.processed = len(soc_log)
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        self.last_time = duration
+
+        return degradation
+
+    def profile(self) -> dict:
+        """
+        :return: Cost of the degradation calculations so far: number of calls, SoC entries processed, total, mean,
+            max and last time per call in seconds
+        """
+        return {"Calls": self.calls,
+                "Samples": self.samples,
+                "Total time": self.total_time,
+                "Mean time": self.total_time / self.calls if self.calls else 0.0,
+                "Max time": self.max_time,
+                "Last time": self.last_time}
@@ -22,78 +22,96 @@ class EmpiricalDegradation(BatteryDegradation):
         self.calendar_aging_40 = 0.0293  # Calendar aging per year if battery at 40% SoC
         self.calendar_aging_90 = 0.065  # Calendar aging per year if battery at 90% SoC
 
+        # calendar aging buckets: SoC of the graphs and aging per year
+        self.cal_soc = np.array([0, 40, 90])
+        self.cal_aging = np.array([self.calendar_aging_0, self.calendar_aging_40, self.calendar_aging_90])
+        # upper bounds of the buckets, the midpoints between the SoC values. On a tie, the lower bucket is closest
+        self.cal_bounds = (self.cal_soc[:-1] + self.cal_soc[1:]) / 2
+
         self.init_soh = init_soh
         self.num_cars = num_cars
         self.soh = np.ones(self.num_cars) * self.init_soh
 
+        # number of soc_log entries that have been processed
+        self.processed: int = 0
+
     def calculate_degradation(self, soc_log: list, charging_power: float, time_conf: TimeConfig, temp: float) -> np.array:
         """
-        Similar to non-linear SEI, the most recent event is taken, and the linear-based degradation is calculated.
-        No rainflow counting, thus degradation is computed for each time step.
-
-        - find out the most recent entries in the soc list
-        - get old and new soc
-        - get average soc
-        - compute cycle and calendar based on avg soc and charging power
+        Similar to non-linear SEI, the most recent events are taken, and the linear-based degradation is calculated.
+        No rainflow counting, thus degradation is computed for each time step: the time steps between the soc_log
+        entries that are new since the last call are summed, so only new data is processed. If called in every time
+        step, only the last two entries are used.
 
         :param soc_log: Historical log of SOC
         :param charging_power: EVSE power in kW
         :param time_conf: time config object
         :param temp: temperature
-        :return: Degradation, float
+        :return: Degradation, array with one value per car
         """
 
-        # compute sorted soc list based on the log records of the episode so far
-        # go from: t1:[soc_car1, soc_car2, ...], t2:[soc_car1, soc_car2,...]
-        # to this: car 1: [soc_t1, soc_t2, ...], car 2: [soc_t1, soc_t2, ...]
-        sorted_soc_list = []
+        # a shorter soc_log cannot continue the previous one
+        if len(soc_log) < self.processed:
+            self.new_soc_log()
 
-        # range(len(soc_log[0])) gives the number of cars
-        for j in range(len(soc_log[0])):
-            # range(len(soc_log)) gives the number of time steps that the cars go through
-            sorted_soc_list.append([soc_log[i][j] for i in range(len(soc_log))])
+        # new entries and the last processed entry
+        soc = np.asarray(soc_log[max(self.processed - 1, 0):], dtype=float)
+        self.processed = len(soc_log)
+
+        if len(soc) < 2:
+            return np.zeros(self.num_cars)
+
+        degradation = np.sum(self.step_loss(soc[:-1], soc[1:], charging_power, time_conf), axis=0)
+
+        self.soh -= degradation
 
+        return degradation
 
-        # empty list, appends a degradation kWh value for each car
-        degradation = []
+    def new_soc_log(self) -> None:
+        """
+        The next soc_log is processed from its first entry.
 
-        for i in range(len(sorted_soc_list)):
+        :return: None
+        """
+        self.processed = 0
 
-            # get old and new soc
-            old_soc = sorted_soc_list[i][-2]
-            new_soc = sorted_soc_list[i][-1]
+    def step_loss(self,
+                  old_soc: np.ndarray,
+                  new_soc: np.ndarray,
+                  charging_power: float,
+                  time_conf: TimeConfig) -> np.ndarray:
+        """
+        Degradation between two SOC values, without updating the SOH. Works on arrays of any shape, e.g. several
+        time steps of several cars.
 
-            # compute average for calendar aging
-            avg_soc = (old_soc + new_soc) / 2
+        - get average soc
+        - look up the closest calendar aging soc
+        - compute cycle and calendar based on avg soc and charging power
 
-            # find the closest avg soc for calendar aging
-            cal_soc = np.asarray([0, 40, 90])
-            closest_index = np.abs(cal_soc - avg_soc).argmin()
-            closest = cal_soc[closest_index]
+        :param old_soc: SOC before the time step
+        :param new_soc: SOC after the time step
+        :param charging_power: EVSE power in kW
+        :param time_conf: time config object
+        :return: Degradation, same shape as the SOC arrays
+        """
 
-            if closest == 0:
-                cal_aging = self.calendar_aging_0 * time_conf.dt / 8760
-            elif closest == 40:
-                cal_aging = self.calendar_aging_40 * time_conf.dt / 8760
-            elif closest == 90:
-                cal_aging = self.calendar_aging_90 * time_conf.dt / 8760
-            else:
-                cal_aging = None
-                raise RuntimeError("Closest calendar aging SoC not recognised.")
+        old_soc = np.asarray(old_soc, dtype=float)
+        new_soc = np.asarray(new_soc, dtype=float)
 
-            # calculate DoD of timestep
-            dod = abs(new_soc - old_soc)
+        # compute average for calendar aging
+        avg_soc = (old_soc + new_soc) / 2
 
-            # distinguish between high and low power charging according to input graph data
-            if charging_power <= 22.0:
-                cycle_loss = dod * self.cycle_loss_11 / 2  # convert to equivalent full cycles, that's why divided by 2
-            else:
-                cycle_loss = dod * self.cycle_loss_43 / 2  # convert to equivalent full cycles, that's why divided by 2
+        # find the closest avg soc for calendar aging
+        cal_aging = self.cal_aging[np.searchsorted(self.cal_bounds, avg_soc)] * time_conf.dt / 8760
 
-            # aggregate calendar and cyclic aging and append to degradation list
-            degradation.append(cal_aging + cycle_loss)
+        # calculate DoD of timestep
+        dod = np.abs(new_soc - old_soc)
 
-        self.soh -= degradation
-        # print(f"emp soh: {self.soh}")
+        # distinguish between high and low power charging according to input graph data
+        # convert to equivalent full cycles, that's why divided by 2
+        if charging_power <= 22.0:
+            cycle_loss = dod * self.cycle_loss_11 / 2
+        else:
+            cycle_loss = dod * self.cycle_loss_43 / 2
 
-        return np.array(degradation)
+        # aggregate calendar and cyclic aging
+        return cal_aging + cycle_loss
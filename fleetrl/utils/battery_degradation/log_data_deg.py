@@ -1,22 +1,76 @@
-import pandas as pd
-import time
-import copy
+import numpy as np
+
 
 class LogDataDeg:
     """
-    Data Logger for degradation purposes. Deepcopy to avoid mutability
+    Data Logger for degradation purposes.
+
+    SOC and SOH are copied into preallocated (time steps x cars) buffers with a write cursor, so the logged values
+    never point back to changing variables. soc_log and soh_log are views of the logged rows, the degradation models
+    read them without copies. The buffers are reused in every episode and grow if an episode is longer than expected.
+    At the end of an episode, add_log_entry archives one compact array per log.
     """
-    def __init__(self, episode):
-        self.log: list = []
-        self.soc_log = []
-        self.soh_log = []
+
+    def __init__(self, episode, episode_length: int = 1000, dtype=np.float32):
+        """
+        :param episode: Episode object of the env
+        :param episode_length: Expected number of entries per episode, sets the initial size of the buffers
+        :param dtype: Data type of the buffers and the archive
+        """
+        self.log: list[dict[str, np.ndarray]] = []  # archive: one entry per episode, {"soc": array, "soh": array}
+        self.capacity: int = episode_length
+        self.dtype = dtype
+        self.buffers: dict[str, np.ndarray] = {}  # allocated on the first entry, when the number of cars is known
+        self.cursors: dict[str, int] = {"soc": 0, "soh": 0}  # number of logged rows
+
+    @property
+    def soc_log(self) -> np.ndarray:
+        """
+        :return: SOC of each time step of the episode so far, (time steps x cars) view of the buffer
+        """
+        return self._view("soc")
+
+    @property
+    def soh_log(self) -> np.ndarray:
+        """
+        :return: Logged SOH values of the episode so far, (entries x cars) view of the buffer
+        """
+        return self._view("soh")
 
     def log_soc(self, soc):
-        self.soc_log.append(copy.deepcopy(soc))
+        self._append("soc", soc)
 
     def log_soh(self, soh):
-        self.soh_log.append(copy.deepcopy(soh))
+        self._append("soh", soh)
 
     def add_log_entry(self):
-        self.log.append({"soc": copy.deepcopy(self.soc_log),
-                         "soh": copy.deepcopy(self.soh_log)})  # , "econ": self.econ_list})
+        self.log.append({"soc": self.soc_log.copy(),
+                         "soh": self.soh_log.copy()})
+
+    def reset(self) -> None:
+        """
+        Starts the logs of a new episode and empties the archive. The buffers are kept.
+
+        :return: None
+        """
+        self.log = []
+        for name in self.cursors:
+            self.cursors[name] = 0
+
+    def _view(self, name: str) -> np.ndarray:
+        if name not in self.buffers:
+            return np.zeros((0, 0), dtype=self.dtype)
+        return self.buffers[name][:self.cursors[name]]
+
+    def _append(self, name: str, values) -> None:
+        values = np.asarray(values)
+        cursor = self.cursors[name]
+        if name not in self.buffers:
+            self.buffers[name] = np.zeros((self.capacity, values.size), dtype=self.dtype)
+        elif cursor == len(self.buffers[name]):
+            # double the capacity if the episode is longer than expected
+            grown = np.zeros((2 * cursor, values.size), dtype=self.dtype)
+            grown[:cursor] = self.buffers[name]
+            self.buffers[name] = grown
+        self.buffers[name][cursor] = values
+        self.cursors[name] = cursor + 1
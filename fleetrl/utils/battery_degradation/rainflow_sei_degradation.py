@@ -1,8 +1,7 @@
-import rainflow
 import numpy as np
-import pandas as pd
 
 from fleetrl.utils.battery_degradation.batt_deg import BatteryDegradation
+from fleetrl.utils.battery_degradation.streaming_rainflow import StreamingRainflow
 from fleetrl.fleet_env.config.time_config import TimeConfig
 
 
@@ -56,6 +55,10 @@ class RainflowSeiDegradation(BatteryDegradation):
         # rainflow list counter to check when to calculate next degradation
         self.rainflow_length = np.ones(self.num_cars)
 
+        # streamed rainflow counting per car, and the number of soc_log entries that have been processed
+        self.rainflow: list[StreamingRainflow] = [StreamingRainflow() for _ in range(self.num_cars)]
+        self.processed: int = 0
+
         # Accumulated function value for fd for cycles
         self.fd_cyc: np.array = np.zeros(self.num_cars)
 
@@ -88,125 +91,174 @@ class RainflowSeiDegradation(BatteryDegradation):
     @staticmethod
     def l_without_sei(l, fd): return 1 - (1 - l) * np.e ** (-fd)
 
+    def new_soc_log(self) -> None:
+        """
+        Starts new rainflow series, the next soc_log is counted from its first entry.
+
+        :return: None
+        """
+        for stream in self.rainflow:
+            stream.reset()
+        self.processed = 0
+
     def calculate_degradation(self, soc_log: list, charging_power: float, time_conf: TimeConfig, temp: float) -> np.array:
 
         """
         Calculates degradation. SOC from environment is converted to the necessary format for rainflow counting.
-        Every time step, this function is called with a new soc_log entry. The rainflow library calculates the
-        resulting cycle counts, which do not grow identically with soc_log entries. Rainflow results are used for
+        Every time step, this function is called with a new soc_log entry. The rainflow counting is streamed: only the
+        soc_log entries that are new since the last call are processed, the residual state of the counting is kept
+        per car. The results are the same as rainflow counting of the entire soc_log. Rainflow results are used for
         the SOH calculations. If a new rainflow result entry appears, a calculation iteration is conducted. For
         calculation, the second most recent rainflow result is used.
 
-        :param soc_log: SOC list for each time step t: t1:[soc_car1, soc_car2, ...], t2:[soc_car1, soc_car2,...]
+        :param soc_log: SOC for each time step t: t1:[soc_car1, soc_car2, ...], t2:[soc_car1, soc_car2,...], list or array
         :param charging_power: kW of the charger
         :param time_conf: Time config instance from the environment
         :param temp: Temperature (default at 25°C)
         :return: Numpy array of degradation for each vehicle [deg_1, deg_2, ...]
         """
 
-        # compute sorted soc list based on the log records of the episode so far
-        # go from: t1:[soc_car1, soc_car2, ...], t2:[soc_car1, soc_car2,...]
-        # to this: car 1: [soc_t1, soc_t2, ...], car 2: [soc_t1, soc_t2, ...]
-
-        sorted_soc_list = []
-
-        for j in range(self.num_cars):
-
-            # range(len(soc_log)) gives the number of time steps that the cars go through
-            sorted_soc_list.append([soc_log[i][j] for i in range(len(soc_log))])
+        # a shorter soc_log cannot continue the series, start new rainflow series
+        if len(soc_log) < self.processed:
+            self.new_soc_log()
 
-        np.clip(sorted_soc_list, 0, 1)
+        # new entries, go from: t1:[soc_car1, soc_car2, ...], t2:[soc_car1, soc_car2,...]
+        # to this: car 1: [soc_t1, soc_t2, ...], car 2: [soc_t1, soc_t2, ...]
+        if len(soc_log) > self.processed:
+            new_soc = np.asarray(soc_log[self.processed:], dtype=float).T
+            for i in range(self.num_cars):
+                self.rainflow[i].push(new_soc[i])
+            self.processed = len(soc_log)
 
         # this is 0 in the beginning and then gets updated with the new degradation due to the current time step
-        self.degradation = np.zeros(len(sorted_soc_list))
+        self.degradation = np.zeros(self.num_cars)
 
-        # calculate rainflow list and store it somewhere
-        # check its length and see if it increased by one
-        # if it increased, calculate with the previous entry, otherwise pass
+        # check the length of the rainflow results and see if it increased
+        # if it increased, calculate with the entries up to the previous one, otherwise pass
+        cars = []  # cars with new rainflow entries
+        entries = []  # new entries of each of these cars
+        lengths = []  # new length of the rainflow results
+        battery_age = []  # battery age in seconds for calendar aging
+        mean_soc_cal = []  # mean soc over the lifetime for calendar aging
 
-        # len(sorted_soc_list) gives the number of cars
         for i in range(self.num_cars):
 
-            rainflow_result = pd.DataFrame(columns=['Range', 'Mean', 'Count', 'Start', 'End'])
-
-            for rng, mean, count, i_start, i_end in rainflow.extract_cycles(np.tile(sorted_soc_list[i], 1)):
-                new_row = pd.DataFrame(
-                    {'Range': [rng], 'Mean': [mean], 'Count': [count], 'Start': [i_start], 'End': [i_end]})
-                rainflow_result = pd.concat([rainflow_result, new_row], ignore_index=True)
-
-            # battery age in seconds for calendar aging
-            battery_age = np.max(rainflow_result["End"]) * time_conf.dt * 3600
-            # mean soc over the lifetime for calendar aging
-            mean_soc_cal = rainflow_result["Mean"].mean()
+            stream = self.rainflow[i]
+            # rainflow results of the entire series: closed cycles, followed by the cycles of the provisional last point
+            tail = stream.tail()
+            rainflow_length = stream.n_closed + len(tail)
 
             # check if a new entry appeared in the results of the rainflow counting
-            if len(rainflow_result) > self.rainflow_length[i]:
-
-                # calculate degradation of the most recent rainflow entries
-                last_complete_entries = rainflow_result.iloc[int(self.rainflow_length[i]-1):len(rainflow_result)-1]
-
-                # dod is equal to the range
-                dod = last_complete_entries["Range"]
+            if rainflow_length > self.rainflow_length[i]:
+                cars.append(i)
+                # most recent rainflow entries, the newest one is incomplete
+                entries.append(stream.cycles(int(self.rainflow_length[i] - 1), rainflow_length - 1, tail))
+                lengths.append(rainflow_length)
+                # the last entry ends at the last time step
+                battery_age.append((stream.n - 1) * time_conf.dt * 3600)
+                mean_soc = stream.closed_mean_sum
+                for cycle in tail:
+                    mean_soc += cycle[1]
+                mean_soc_cal.append(mean_soc / rainflow_length)
+
+                # earlier closed cycles are not needed anymore
+                stream.discard(rainflow_length - 1)
+
+        if cars:
+            self._update_life(np.array(cars),
+                              entries,
+                              np.array(battery_age),
+                              np.array(mean_soc_cal),
+                              temp)
+            self.rainflow_length[cars] = lengths
+
+        self.soh -= self.degradation
+
+        # check that the adding up of degradation is equivalent to the newest lifetime value calculated
+        if np.any(np.abs(self.soh - (1 - self.l)) > 0.0001):
+            raise RuntimeError("Degradation calculation is not correct")
 
-                # average soc is equal to the mean
-                avg_soc = last_complete_entries["Mean"]
-
-                # severity is equal to count: either 0.5 or 1.0
-                degradation_severity = last_complete_entries["Count"]
+        return np.array(self.degradation)
 
-                # self.deg_rate_total becomes negative for DoD > 1
-                # the two checks below count how many times dod is adjusted and in severe cases stops the code
+    @staticmethod
+    def cycle_arrays(entries: list[list[tuple]]) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Pads the rainflow entries of several cars to arrays of shape (cars, cycles).
 
-                if (np.max(dod) > 2) and degradation_severity[np.argmax(dod)] == 0.5:
-                    self.adj_counter += 1
-                    print("Minor adjustment made to DoD for degradation calculation.")
+        :param entries: Rainflow entries (range, mean, count, start, end) of each car
+        :return: dod, average soc, count and mask of the valid entries, padded entries are 0
+        """
 
-                if np.max(dod) > 5:
-                    print("Dod should be checked. Split cycle into multiple cycles.")
-                    print("Remove this Error if problem should be ignored.")
-                    raise TypeError("DoD too large.")
+        n_cycles = max(len(car_entries) for car_entries in entries)
+        cycles = np.zeros((len(entries), n_cycles, 3))
+        mask = np.zeros((len(entries), n_cycles), dtype=bool)
+        for row, car_entries in enumerate(entries):
+            if car_entries:
+                cycles[row, :len(car_entries)] = np.array(car_entries)[:, :3]
+                mask[row, :len(car_entries)] = True
+        return cycles[..., 0], cycles[..., 1], cycles[..., 2], mask
+
+    def _update_life(self,
+                     cars: np.ndarray,
+                     entries: list[list[tuple]],
+                     battery_age: np.ndarray,
+                     mean_soc_cal: np.ndarray,
+                     temp: float) -> None:
+        """
+        Applies the stress model to the new rainflow entries of several cars at once and updates fd, l and the
+        degradation of these cars.
+
+        :param cars: Indices of the cars
+        :param entries: New rainflow entries of each car
+        :param battery_age: Battery age of each car in seconds
+        :param mean_soc_cal: Mean soc over the lifetime of each car
+        :param temp: Temperature
+        :return: None
+        """
 
-                # half or full cycle, max of 1
-                effective_dod = np.clip(dod * degradation_severity, 0, 1)
+        # dod is equal to the range, average soc is equal to the mean, severity is equal to count: either 0.5 or 1.0
+        dod, avg_soc, degradation_severity, mask = self.cycle_arrays(entries)
+        max_dod = np.max(np.where(mask, dod, -np.inf), axis=1)
 
-                # check if new battery, otherwise ignore sei film formation
-                if self.init_soh == 1.0:
-                    self.fd_cyc[i] += np.sum(self.deg_rate_cycle(effective_dod, avg_soc, temp))
-                    self.fd_cal[i] = self.deg_rate_calendar(t=battery_age, avg_soc=mean_soc_cal, temp=temp)
-                    new_l = self.l_with_sei(self.fd_cyc[i] + self.fd_cal[i])
+        # self.deg_rate_total becomes negative for DoD > 1
+        # the two checks below count how many times dod is adjusted and in severe cases stops the code
 
-                    # check if l is negative, then something is wrong
-                    if new_l < 0:
-                        raise TypeError("Life degradation is negative")
+        adjusted = (max_dod > 2) & (degradation_severity[np.arange(len(cars)), np.argmax(dod, axis=1)] == 0.5)
+        if np.any(adjusted):
+            self.adj_counter += int(np.sum(adjusted))
+            print("Minor adjustment made to DoD for degradation calculation.")
 
-                # if battery used, sei film formation is done and can be ignored
-                else:
-                    self.fd_cyc[i] += self.deg_rate_cycle(effective_dod, avg_soc, temp)
-                    self.fd_cal[i] = self.deg_rate_calendar(t=battery_age, avg_soc=mean_soc_cal, temp=temp)
-                    new_l = self.l_without_sei(self.l[i], self.fd_cyc[i] + self.fd_cal[i])
+        if np.any(max_dod > 5):
+            print("Dod should be checked. Split cycle into multiple cycles.")
+            print("Remove this Error if problem should be ignored.")
+            raise TypeError("DoD too large.")
 
-                # calculate degradation based on the change of l
-                self.degradation[i] = new_l - self.l[i]
+        # half or full cycle, max of 1. Padded entries are evaluated at a dod of 1 and left out of the sum
+        effective_dod = np.where(mask, np.clip(dod * degradation_severity, 0, 1), 1)
+        deg_rate_cycle = np.where(mask, self.deg_rate_cycle(effective_dod, avg_soc, temp), 0)
 
-                # update lifetime variable
-                self.l[i] = new_l
+        self.fd_cyc[cars] += np.sum(deg_rate_cycle, axis=1)
+        self.fd_cal[cars] = self.deg_rate_calendar(t=battery_age, avg_soc=mean_soc_cal, temp=temp)
 
-                # set new rainflow_length for this car
-                self.rainflow_length[i] = len(rainflow_result)
+        # check if new battery, otherwise ignore sei film formation
+        if self.init_soh == 1.0:
+            new_l = self.l_with_sei(self.fd_cyc[cars] + self.fd_cal[cars])
 
-            else:
-                self.degradation[i] = 0
+            # check if l is negative, then something is wrong
+            if np.any(new_l < 0):
+                raise TypeError("Life degradation is negative")
 
-            if self.degradation[i] < 0:
-                print(f"Degradation was negative: {self.degradation[i]}."
-                      f"Recheck calcs if it happens often."
-                      f"Previous entry: {rainflow_result.iloc[-3]}"
-                      f"Current entry: {last_complete_entries}")
+        # if battery used, sei film formation is done and can be ignored
+        else:
+            new_l = self.l_without_sei(self.l[cars], self.fd_cyc[cars] + self.fd_cal[cars])
 
-            self.soh[i] -= self.degradation[i]
+        # calculate degradation based on the change of l
+        self.degradation[cars] = new_l - self.l[cars]
 
-            # check that the adding up of degradation is equivalent to the newest lifetime value calculated
-            if abs(self.soh[i] - (1 - self.l[i])) > 0.0001:
-                raise RuntimeError("Degradation calculation is not correct")
+        # update lifetime variable
+        self.l[cars] = new_l
 
-        return np.array(self.degradation)
+        for k in np.flatnonzero(self.degradation[cars] < 0):
+            print(f"Degradation was negative: {self.degradation[cars[k]]}."
+                  f"Recheck calcs if it happens often."
+                  f"Current entries (range, mean, count, start, end): {np.array(entries[k])}")
@@ -0,0 +1,162 @@
+import numpy as np
+
+from fleetrl.fleet_env.config.time_config import TimeConfig
+from fleetrl.utils.battery_degradation.empirical_degradation import EmpiricalDegradation
+from fleetrl.utils.battery_degradation.rainflow_sei_degradation import RainflowSeiDegradation
+from fleetrl.utils.battery_degradation.streaming_rainflow import StreamingRainflow
+
+
+class SohProjection:
+    """
+    Fast-forward projection of the SOH over several years, e.g. to compare the battery lifetime under different
+    charging strategies. A representative SOC trajectory of each car (e.g. a logged episode) is assumed to repeat over
+    the entire horizon. Instead of repeating the trajectory, its cycle statistics are computed once and scaled
+    analytically:
+
+    - Non-linear SEI model: the rainflow cycles of one repetition of the trajectory are counted once. The cycle part
+      of fd grows with the number of repetitions, the calendar part with the battery age
+    - Empirical model: the degradation of one repetition is summed and scaled with the number of repetitions
+
+    All cars and points in time are computed at once. The results are arrays of shape (points in time, cars), the
+    first row is the initial SOH.
+    """
+
+    def __init__(self,
+                 init_soh: float = 1.0,
+                 time_conf: TimeConfig = None,
+                 temp: float = 25,
+                 charging_power: float = 11):
+        """
+        :param init_soh: Initial SOH, assumed same for all cars. SOH=1 -> new batteries with SEI film formation
+        :param time_conf: Time config of the trajectories, default 15 minute time steps
+        :param temp: Temperature in °C
+        :param charging_power: EVSE power in kW, used by the empirical model
+        """
+
+        self.init_soh = init_soh
+        self.time_conf = time_conf if time_conf is not None else TimeConfig({})
+        self.temp = temp
+        self.charging_power = charging_power
+
+    @staticmethod
+    def trajectories(soc) -> np.ndarray:
+        """
+        :param soc: SOC trajectory, array (time steps x cars) or one car (time steps), e.g. LogDataDeg.soc_log
+        :return: Array (time steps x cars)
+        """
+
+        soc = np.asarray(soc, dtype=float)
+        if soc.ndim == 1:
+            soc = soc[:, None]
+        if len(soc) < 2:
+            raise ValueError("The SOC trajectory needs at least two time steps.")
+        return soc
+
+    @staticmethod
+    def years(years: float, points_per_year: int = 1) -> np.ndarray:
+        """
+        :param years: Horizon in years
+        :param points_per_year: Resolution of the projection
+        :return: Points in time of the projection in years, starting at 0
+        """
+        return np.linspace(0, years, int(round(years * points_per_year)) + 1)
+
+    def sei_statistics(self, soc) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Rainflow cycles per repetition of the trajectory. Cycles that only close in the next repetition would be
+        half cycles of a single trajectory, so the trajectory is counted two and three times in a row: the difference
+        is the contribution of one repetition in the steady state, as in a long run of RainflowSeiDegradation.
+
+        :param soc: SOC trajectory, see trajectories
+        :return: Cycle part of fd of one repetition, mean SOC of the cycles (for calendar aging). One value per car
+        """
+
+        soc = self.trajectories(soc)
+        model = RainflowSeiDegradation(self.init_soh, soc.shape[1])
+
+        cycle_fd = []
+        mean_sum = []  # sum of the means of the cycles
+        n_cycles = []
+        for entries in (self._cycles(soc, 2), self._cycles(soc, 3)):
+            dod, avg_soc, degradation_severity, mask = model.cycle_arrays(entries)
+
+            # half or full cycle, max of 1. Padded entries are evaluated at a dod of 1 and left out of the sums
+            effective_dod = np.where(mask, np.clip(dod * degradation_severity, 0, 1), 1)
+            cycle_fd.append(np.sum(np.where(mask, model.deg_rate_cycle(effective_dod, avg_soc, self.temp), 0), axis=1))
+            mean_sum.append(np.sum(np.where(mask, avg_soc, 0), axis=1))
+            n_cycles.append(np.sum(mask, axis=1))
+
+        # differences between three and two repetitions, without cycles the SOC is constant
+        mean_sum = mean_sum[1] - mean_sum[0]
+        n_cycles = n_cycles[1] - n_cycles[0]
+        mean_soc = np.where(n_cycles > 0, mean_sum / np.maximum(n_cycles, 1), soc.mean(axis=0))
+
+        return cycle_fd[1] - cycle_fd[0], mean_soc
+
+    @staticmethod
+    def _cycles(soc: np.ndarray, repetitions: int) -> list[list[tuple]]:
+        """
+        :param soc: SOC trajectories (time steps x cars)
+        :param repetitions: Number of repetitions of the trajectories
+        :return: All rainflow cycles of the repeated trajectory of each car
+        """
+
+        entries = []
+        for car_soc in soc.T:
+            stream = StreamingRainflow()
+            for _ in range(repetitions):
+                stream.push(car_soc)
+            tail = stream.tail()
+            entries.append(stream.cycles(0, stream.n_closed + len(tail), tail))
+        return entries
+
+    def project_sei(self, soc, years: float = 10, points_per_year: int = 1) -> np.ndarray:
+        """
+        Projection with the non-linear SEI model (RainflowSeiDegradation). The env model evaluates rainflow entries
+        once per day, including half cycles that would only close later, so its SOH can be slightly lower.
+
+        :param soc: SOC trajectory, see trajectories
+        :param years: Horizon in years
+        :param points_per_year: Resolution of the projection
+        :return: SOH, array (points in time x cars)
+        """
+
+        soc = self.trajectories(soc)
+        model = RainflowSeiDegradation(self.init_soh, soc.shape[1])
+        cycle_fd, mean_soc = self.sei_statistics(soc)
+
+        # duration of one repetition of the trajectory in seconds
+        duration = len(soc) * self.time_conf.dt * 3600
+        # battery age in seconds at each point in time
+        age = self.years(years, points_per_year)[:, None] * 8760 * 3600
+
+        fd = age / duration * cycle_fd + model.deg_rate_calendar(t=age, avg_soc=mean_soc, temp=self.temp)
+
+        # check if new battery, otherwise ignore sei film formation
+        if self.init_soh == 1.0:
+            l = model.l_with_sei(fd)
+        else:
+            l = model.l_without_sei(1 - self.init_soh, fd)
+
+        return 1 - l
+
+    def project_empirical(self, soc, years: float = 10, points_per_year: int = 1) -> np.ndarray:
+        """
+        Projection with the empirical linear model (EmpiricalDegradation).
+
+        :param soc: SOC trajectory, see trajectories
+        :param years: Horizon in years
+        :param points_per_year: Resolution of the projection
+        :return: SOH, array (points in time x cars)
+        """
+
+        soc = self.trajectories(soc)
+        model = EmpiricalDegradation(self.init_soh, soc.shape[1])
+
+        # degradation of one repetition, including the step from the end of the trajectory to its start
+        loss = np.sum(model.step_loss(soc, np.roll(soc, -1, axis=0), self.charging_power, self.time_conf), axis=0)
+
+        # number of repetitions of the trajectory at each point in time
+        repetitions = self.years(years, points_per_year)[:, None] * 8760 / self.time_conf.dt / len(soc)
+
+        return self.init_soh - repetitions * loss
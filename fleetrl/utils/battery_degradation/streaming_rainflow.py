@@ -0,0 +1,151 @@
+class StreamingRainflow:
+    """
+    Rainflow cycle counting (ASTM E1049-85) on a stream of samples, with the same results as
+    rainflow.extract_cycles on the entire series, but only processing new samples.
+
+    - Reversals are detected on the fly. The last sample is only a provisional reversal, it is treated as a
+      reversal when the cycles are read, like the last point of the series in rainflow.extract_cycles
+    - The residual stack holds the confirmed reversals that have not been closed yet
+    - Closed cycles are kept until they are discarded by the consumer
+
+    The cycles of the entire series are: closed cycles, cycles closed by the provisional last point, and the
+    remaining half cycles of the residual stack. Each cycle is a tuple (range, mean, count, start index, end index).
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Starts a new series.
+
+        :return: None
+        """
+
+        self.n: int = 0  # number of samples
+        self.last: float = None  # last sample, provisional reversal
+        self.x_last: float = None  # reversal detection, same notation as rainflow.reversals
+        self.x: float = None
+        self.d_last: float = None
+
+        self.points: list[tuple[int, float]] = []  # residual stack of confirmed reversals (index, value)
+        self.closed: list[tuple] = []  # closed cycles that have not been discarded
+        self.closed_offset: int = 0  # position of the first kept closed cycle
+        self.n_closed: int = 0  # number of closed cycles
+        self.closed_mean_sum: float = 0.0  # sum of the means of all closed cycles
+
+    def push(self, values) -> None:
+        """
+        :param values: New samples of the series
+        :return: None
+        """
+        for value in values:
+            self._push(value)
+
+    def _push(self, value: float) -> None:
+        position = self.n
+        self.n += 1
+        self.last = value
+
+        if position == 0:
+            self.x_last = value
+            return
+        if position == 1:
+            self.x = value
+            self.d_last = value - self.x_last
+            self._add_reversal((0, self.x_last))
+            return
+
+        if value == self.x:
+            return
+        d_next = value - self.x
+        if self.d_last * d_next < 0:
+            self._add_reversal((position - 1, self.x))
+        self.x_last, self.x = self.x, value
+        self.d_last = d_next
+
+    def _add_reversal(self, point: tuple[int, float]) -> None:
+        self.points.append(point)
+        for cycle in self._count(self.points):
+            self.closed.append(cycle)
+            self.n_closed += 1
+            self.closed_mean_sum += cycle[1]
+
+    @staticmethod
+    def _cycle(point1: tuple[int, float], point2: tuple[int, float], count: float) -> tuple:
+        i1, x1 = point1
+        i2, x2 = point2
+        return abs(x1 - x2), 0.5 * (x1 + x2), count, i1, i2
+
+    @classmethod
+    def _count(cls, points: list[tuple[int, float]]) -> list[tuple]:
+        """
+        Closes cycles with the most recent point, modifies the stack in place.
+
+        :param points: Residual stack
+        :return: List of closed cycles
+        """
+
+        cycles = []
+        while len(points) >= 3:
+            # Form ranges X and Y from the three most recent points
+            x1, x2, x3 = points[-3][1], points[-2][1], points[-1][1]
+            X = abs(x3 - x2)
+            Y = abs(x2 - x1)
+
+            if X < Y:
+                break
+            elif len(points) == 3:
+                # Y contains the starting point, count Y as one-half cycle and discard the first point
+                cycles.append(cls._cycle(points[0], points[1], 0.5))
+                points.pop(0)
+            else:
+                # Count Y as one cycle and discard the peak and the valley of Y
+                cycles.append(cls._cycle(points[-3], points[-2], 1.0))
+                last = points.pop()
+                points.pop()
+                points.pop()
+                points.append(last)
+        return cycles
+
+    def tail(self) -> list[tuple]:
+        """
+        Cycles that depend on the provisional last point: the cycles it closes and the remaining half cycles.
+        Computed on a copy of the residual stack, the state is not changed.
+
+        :return: List of cycles that follow the closed cycles
+        """
+
+        # the last point is only a reversal for series of 3 or more samples, see rainflow.reversals
+        if self.n < 3:
+            return []
+
+        points = self.points.copy()
+        points.append((self.n - 1, self.last))
+        cycles = self._count(points)
+        # Count the remaining ranges as one-half cycles
+        for point1, point2 in zip(points[:-1], points[1:]):
+            cycles.append(self._cycle(point1, point2, 0.5))
+        return cycles
+
+    def cycles(self, start: int, stop: int, tail: list[tuple]) -> list[tuple]:
+        """
+        :param start: First position in the cycles of the entire series, closed cycles before it must not be discarded
+        :param stop: Position after the last cycle
+        :param tail: Result of tail()
+        :return: Cycles at the positions start to stop-1
+        """
+        return [self.closed[k - self.closed_offset] if k < self.n_closed else tail[k - self.n_closed]
+                for k in range(start, stop)]
+
+    def discard(self, position: int) -> None:
+        """
+        Frees closed cycles that will not be read again.
+
+        :param position: Closed cycles before this position are discarded
+        :return: None
+        """
+        position = min(position, self.n_closed)
+        if position > self.closed_offset:
+            del self.closed[:position - self.closed_offset]
+            self.closed_offset = position
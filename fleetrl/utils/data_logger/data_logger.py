@@ -1,22 +1,56 @@
 import pandas as pd
 import numpy as np
-import copy
 
 class DataLogger:
     """
     Logs data to allow for postprocessing, graphs, etc.
     The log is a dataframe, where each row can be a float or an array.
-    Deepcopy to avoid risk of mutability (logs pointing back to changing variables)
+
+    The data is stored column-wise in preallocated numpy buffers: one entry per time step for the scalar columns, and
+    2-D blocks (time steps x entries) for observations, actions, charging energy, degradation and SOH. The values are
+    copied into the buffers, so the log never points back to changing variables. The buffers grow geometrically if
+    the log gets longer than expected. The DataFrame is only built when the log is requested.
+
+    Optionally, the log is streamed to a sink (see ParquetLogSink): the buffers then hold one chunk, that is written
+    to the sink when it is full, and the log is returned as a lazy reader of the written files.
     """
-    def __init__(self, episode_length):
+
+    # columns of the log and the name of the buffer they are stored in, in the order of the DataFrame
+    columns = {"Episode": "episode",
+               "Time": "time",
+               "Observation": "obs",
+               "Action": "action",
+               "Reward": "reward",
+               "Cashflow": "cashflow",
+               "Penalties": "penalty",
+               "Grid overloading": "grid",
+               "SOC violation": "soc_v",
+               "Degradation": "degradation",
+               "Charging energy": "charge_log",
+               "SOH": "soh"}
+
+    # flags the time steps in which degradation was logged as a float, stored with the chunks of a sink
+    scalar_degradation_column = "Scalar degradation"
+
+    def __init__(self, episode_length, sink=None, chunk_size: int = 10000):
         """
         Initialising default values
-        :param episode_length: Length of the episode in hours
+        :param episode_length: Length of the episode in time steps (episode length in hours * time steps per hour)
+        :param sink: Optional sink to stream the log to, e.g. ParquetLogSink. Keeps the entire log in memory if None
+        :param chunk_size: Number of time steps that are buffered before they are written to the sink
         """
-        self.log: pd.DataFrame = pd.DataFrame()
-        self.entry = None
         self.episode_count: int = 1  # counter if several episodes are evaluated
         self.episode_length = episode_length
+        self.sink = sink
+
+        self.count: int = 0  # number of logged time steps
+        self.length: int = 0  # number of time steps in the buffers
+        if self.sink is None:
+            self.capacity: int = episode_length + 1  # the first observation of an episode is logged in reset
+        else:
+            self.capacity: int = chunk_size
+        self.buffers: dict[str, np.ndarray] = {}  # allocated on the first entry, when the shapes are known
+        self._log: pd.DataFrame = None  # materialized log, built on request
 
     def log_data(self, time: pd.Timestamp,
                  obs: np.ndarray,
@@ -31,7 +65,7 @@ class DataLogger:
                  soh: np.ndarray):
         """
         While the env object is the same, the episode counter will recognise different episodes.
-        A dict is created with the required values, and then appended to the log dataframe
+        The values are written into the next row of the buffers.
 
         :param time: Current timestamp
         :param obs: Observation array
@@ -47,22 +81,143 @@ class DataLogger:
         :return: None
         """
 
-        self.episode_count = len(self.log) // self.episode_length + 1
+        if not self.buffers:
+            self._allocate(obs, soh)
+        elif self.length == self.capacity:
+            if self.sink is None:
+                self._grow()
+            else:
+                self.flush()
+
+        self.episode_count = self.count // self.episode_length + 1
+
+        i = self.length
+        self.buffers["episode"][i] = self.episode_count
+        self.buffers["time"][i] = np.datetime64(time, "ns")
+        self.buffers["obs"][i] = obs
+        self.buffers["action"][i] = action
+        self.buffers["reward"][i] = reward
+        self.buffers["cashflow"][i] = cashflow
+        self.buffers["penalty"][i] = penalty
+        self.buffers["grid"][i] = grid
+        self.buffers["soc_v"][i] = soc_v
+        self.buffers["degradation"][i] = degradation
+        self.buffers["scalar_degradation"][i] = np.ndim(degradation) == 0
+        self.buffers["charge_log"][i] = charge_log
+        self.buffers["soh"][i] = soh
+
+        self.length += 1
+        self.count += 1
+        self._log = None
+
+    @property
+    def log(self):
+        """
+        :return: Log dataframe, one row per logged time step. Built once and cached until the next entry is logged.
+            If the log is streamed to a sink, a lazy reader of the sink (see LogReader.read).
+        """
+        if self._log is None:
+            self._log = self.get_log()
+        return self._log
+
+    def get_log(self):
+        """
+        Builds the log DataFrame from the buffers. Array columns hold one array per row, degradation is a float in
+        the time steps where no degradation was calculated, same as the values that were logged.
+        If the log is streamed to a sink, the buffered entries are written and a lazy reader is returned instead.
+
+        :return: Log dataframe, or reader of the sink
+        """
+
+        if self.sink is not None:
+            self.flush()
+            return self.sink.reader()
 
-        self.entry = []
+        if self.length == 0:
+            return pd.DataFrame()
 
-        #  deepcopy to avoid mutable variables in log
-        self.entry.append({"Episode": copy.deepcopy(self.episode_count),
-                           "Time": copy.deepcopy(time),
-                           "Observation": copy.deepcopy(obs),
-                           "Action": copy.deepcopy(action),
-                           "Reward": copy.deepcopy(reward),
-                           "Cashflow": copy.deepcopy(cashflow),
-                           "Penalties": copy.deepcopy(penalty),
-                           "Grid overloading": copy.deepcopy(grid),
-                           "SOC violation": copy.deepcopy(soc_v),
-                           "Degradation": copy.deepcopy(degradation),
-                           "Charging energy": copy.deepcopy(charge_log),
-                           "SOH": copy.deepcopy(soh)})
+        return self.to_frame(self._chunk())
+
+    def flush(self) -> None:
+        """
+        Writes the buffered entries to the sink and empties the buffers. Does nothing without a sink.
+
+        :return: None
+        """
+        if self.sink is not None and self.length > 0:
+            self.sink.write(self._chunk())
+            self.length = 0
+
+    @classmethod
+    def to_frame(cls, data: dict[str, np.ndarray], columns: list[str] = None) -> pd.DataFrame:
+        """
+        :param data: Dict of column name and values, 1-D for scalar columns and 2-D for array columns
+        :param columns: Columns of the DataFrame, default all columns of the log
+        :return: Log dataframe
+        """
+
+        if columns is None:
+            columns = list(cls.columns)
+
+        n = len(data["Time"])
+        frame = {}
+        for column in columns:
+            values = data[column]
+            if column == "Time":
+                values = pd.to_datetime(values)
+            elif column == "Degradation":
+                values = [float(deg[0]) if scalar else deg.copy()
+                          for deg, scalar in zip(values, data[cls.scalar_degradation_column])]
+            elif values.ndim == 2:
+                # one copy of the block, the rows are views into it
+                values = list(values.copy())
+            frame[column] = values
+
+        # each entry used to be concatenated as a single-row frame, hence the index is 0 in every row
+        return pd.DataFrame(frame, index=np.zeros(n, dtype=np.int64))
+
+    def _chunk(self) -> dict[str, np.ndarray]:
+        """
+        :return: Dict of column name and the buffered values
+        """
+        chunk = {column: self.buffers[name][:self.length] for column, name in self.columns.items()}
+        chunk[self.scalar_degradation_column] = self.buffers["scalar_degradation"][:self.length]
+        return chunk
+
+    def _allocate(self, obs: np.ndarray, soh: np.ndarray) -> None:
+        """
+        Allocates the buffers, the shapes are taken from the first entry.
+
+        :param obs: Observation array
+        :param soh: SoH array, one entry per car
+        :return: None
+        """
+
+        obs = np.asarray(obs)
+        num_cars = np.size(soh)
+        self.buffers = {"episode": np.zeros(self.capacity, dtype=np.int64),
+                        "time": np.zeros(self.capacity, dtype="datetime64[ns]"),
+                        "obs": np.zeros((self.capacity, obs.size), dtype=obs.dtype),
+                        "action": np.zeros((self.capacity, num_cars)),
+                        "reward": np.zeros(self.capacity),
+                        "cashflow": np.zeros(self.capacity),
+                        "penalty": np.zeros(self.capacity),
+                        "grid": np.zeros(self.capacity),
+                        "soc_v": np.zeros(self.capacity),
+                        "degradation": np.zeros((self.capacity, num_cars)),
+                        "scalar_degradation": np.zeros(self.capacity, dtype=bool),
+                        "charge_log": np.zeros((self.capacity, num_cars)),
+                        "soh": np.zeros((self.capacity, num_cars))}
+
+    def _grow(self) -> None:
+        """
+        Doubles the capacity of the buffers.
+
+        :return: None
+        """
 
-        self.log = pd.concat((self.log, pd.DataFrame(self.entry)), axis=0)
+        self.capacity *= 2
+        for name, values in self.buffers.items():
+            grown = np.zeros((self.capacity,) + values.shape[1:], dtype=values.dtype)
+            grown[:self.length] = values[:self.length]
+            self.buffers[name] = grown
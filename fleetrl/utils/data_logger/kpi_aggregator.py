@@ -0,0 +1,305 @@
+import numpy as np
+import pandas as pd
+
+
+class KpiAggregator:
+    """
+    Online aggregation of the key performance indicators of a run, as a lightweight alternative to the full log.
+    Running sums, counts and maxima are updated in O(1) per time step (O(num_cars) for the per-car values), so the
+    totals of BasicEvaluation.compare are available without keeping the per-step log.
+
+    - Totals: reward, cashflow, penalties, grid overloading, SOC violation, degradation per car
+    - Counts: time steps, time steps with a SOC violation
+    - Maxima: grid overloading, SOC violation
+    - Final SOH of each car
+    - Histograms over the time of day (one slot per time step of the day): charging energy, cashflow and reward
+
+    The env updates the aggregator in every time step, including the last step of an episode, which is not logged.
+    Totals can therefore differ slightly from the totals of the log.
+    """
+
+    def __init__(self, num_cars: int, time_steps_per_hour: int):
+        """
+        :param num_cars: Number of cars
+        :param time_steps_per_hour: Time steps per hour, sets the resolution of the time of day histograms
+        """
+
+        self.num_cars = num_cars
+        self.time_steps_per_hour = time_steps_per_hour
+        self.step_minutes = 60 // time_steps_per_hour
+        self.n_slots = 24 * time_steps_per_hour
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Sets all aggregates back to zero.
+
+        :return: None
+        """
+
+        self.steps: int = 0
+        self.reward: float = 0.0
+        self.cashflow: float = 0.0
+        self.penalty: float = 0.0
+        self.grid: float = 0.0
+        self.soc_v: float = 0.0
+        self.n_violations: int = 0
+        self.max_grid: float = 0.0
+        self.max_soc_v: float = 0.0
+        self.degradation: np.ndarray = np.zeros(self.num_cars)
+        self.soh: np.ndarray = np.ones(self.num_cars)
+
+        # time of day histograms
+        self.slot_count: np.ndarray = np.zeros(self.n_slots, dtype=np.int64)
+        self.slot_charging: np.ndarray = np.zeros((self.n_slots, self.num_cars))
+        self.slot_cashflow: np.ndarray = np.zeros(self.n_slots)
+        self.slot_reward: np.ndarray = np.zeros(self.n_slots)
+
+    def update(self,
+               hour: int,
+               minute: int,
+               reward: float,
+               cashflow: float,
+               penalty: float,
+               grid: float,
+               soc_v: float,
+               degradation: float | np.ndarray,
+               charge_log: np.ndarray,
+               soh: np.ndarray) -> None:
+        """
+        Adds one time step. Same values as DataLogger.log_data.
+
+        :param hour: Hour of the time step
+        :param minute: Minute of the time step
+        :param reward: Reward float
+        :param cashflow: in EUR
+        :param penalty: penalty float
+        :param grid: Grid overloading in kW
+        :param soc_v: Amount of SOC violated in # of batteries
+        :param degradation: Degradation in that timestep, float or one value per car
+        :param charge_log: How much energy flowed into the batteries in kWh
+        :param soh: Current SoH, array
+        :return: None
+        """
+
+        self.steps += 1
+        self.reward += reward
+        self.cashflow += cashflow
+        self.penalty += penalty
+        self.grid += grid
+        self.soc_v += soc_v
+        if soc_v > 0:
+            self.n_violations += 1
+        self.max_grid = max(self.max_grid, grid)
+        self.max_soc_v = max(self.max_soc_v, soc_v)
+        self.degradation += degradation
+        self.soh[:] = soh
+
+        slot = (hour * 60 + minute) // self.step_minutes
+        self.slot_count[slot] += 1
+        self.slot_charging[slot] += charge_log
+        self.slot_cashflow[slot] += cashflow
+        self.slot_reward[slot] += reward
+
+    def merge(self, other: "KpiAggregator") -> None:
+        """
+        Adds the aggregates of another aggregator, e.g. of other envs of a vectorized env. The SOH is taken from the
+        other aggregator.
+
+        :param other: Aggregator with the same number of cars and time resolution
+        :return: None
+        """
+
+        self.steps += other.steps
+        self.reward += other.reward
+        self.cashflow += other.cashflow
+        self.penalty += other.penalty
+        self.grid += other.grid
+        self.soc_v += other.soc_v
+        self.n_violations += other.n_violations
+        self.max_grid = max(self.max_grid, other.max_grid)
+        self.max_soc_v = max(self.max_soc_v, other.max_soc_v)
+        self.degradation += other.degradation
+        self.soh[:] = other.soh
+        self.slot_count += other.slot_count
+        self.slot_charging += other.slot_charging
+        self.slot_cashflow += other.slot_cashflow
+        self.slot_reward += other.slot_reward
+
+    def summary(self) -> dict:
+        """
+        :return: Dict of the totals, the first entries have the names of the categories of BasicEvaluation.compare
+        """
+
+        return {"Reward": self.reward,
+                "Cashflow": self.cashflow,
+                "Average degradation per EV": np.mean(self.degradation),
+                "Overloading": self.grid,
+                "SOC violation": self.soc_v,
+                "# Violations": self.n_violations,
+                "SOH": np.mean(self.soh),
+                "Penalties": self.penalty,
+                "Max overloading": self.max_grid,
+                "Max SOC violation": self.max_soc_v,
+                "Degradation": self.degradation.copy(),
+                "Final SOH": self.soh.copy(),
+                "Time steps": self.steps}
+
+    def mean_charging_power(self) -> np.ndarray:
+        """
+        Mean charging power per car over the time of day, in kW. Slots without data are left out, like a groupby on
+        the time of day of the log.
+
+        :return: Array with one value per time step of the day
+        """
+
+        seen = self.slot_count > 0
+        mean_energy = self.slot_charging[seen] / self.slot_count[seen, None]
+        return mean_energy.mean(axis=1) * self.time_steps_per_hour
+
+    def hourly(self) -> pd.DataFrame:
+        """
+        :return: Time of day histograms as a DataFrame, one row per time step of the day
+        """
+
+        minutes = np.arange(self.n_slots) * self.step_minutes
+        return pd.DataFrame({"hour_id": minutes / 60,
+                             "Count": self.slot_count,
+                             "Charging energy": self.slot_charging.sum(axis=1),
+                             "Cashflow": self.slot_cashflow,
+                             "Reward": self.slot_reward})
+
+    @classmethod
+    def from_log(cls, log: pd.DataFrame, time_steps_per_hour: int = 4) -> "KpiAggregator":
+        """
+        Builds the aggregates from a full log, e.g. of a run before the aggregator existed.
+
+        :param log: Log dataframe, see DataLogger.get_log
+        :param time_steps_per_hour: Time steps per hour of the log
+        :return: KpiAggregator
+        """
+
+        num_cars = len(log["SOH"].iloc[-1])
+        kpis = cls(num_cars, time_steps_per_hour)
+
+        kpis.steps = len(log)
+        kpis.reward = log["Reward"].sum()
+        kpis.cashflow = log["Cashflow"].sum()
+        kpis.penalty = log["Penalties"].sum()
+        kpis.grid = log["Grid overloading"].sum()
+        kpis.soc_v = log["SOC violation"].sum()
+        kpis.n_violations = log[log["SOC violation"] > 0]["SOC violation"].size
+        kpis.max_grid = log["Grid overloading"].max()
+        kpis.max_soc_v = log["SOC violation"].max()
+        kpis.degradation = kpis.degradation + log["Degradation"].sum()
+        kpis.soh = np.array(log["SOH"].iloc[-1], dtype=float)
+
+        slots = ((log["Time"].dt.hour * 60 + log["Time"].dt.minute) // kpis.step_minutes).to_numpy()
+        np.add.at(kpis.slot_count, slots, 1)
+        np.add.at(kpis.slot_charging, slots, np.stack(list(log["Charging energy"])))
+        np.add.at(kpis.slot_cashflow, slots, log["Cashflow"].to_numpy(dtype=float))
+        np.add.at(kpis.slot_reward, slots, log["Reward"].to_numpy(dtype=float))
+
+        return kpis
+
+
+class BatchKpiAggregator:
+    """
+    Online KPIs of the K envs of a FleetVecEnv. Same aggregates as KpiAggregator, with a leading env axis, so all K
+    envs are updated in one vectorized call per time step. get(k) returns the KpiAggregator of one env.
+    """
+
+    # aggregates of KpiAggregator, stored as arrays with a leading env axis
+    fields = ("steps", "reward", "cashflow", "penalty", "grid", "soc_v", "n_violations", "max_grid", "max_soc_v",
+              "degradation", "soh", "slot_count", "slot_charging", "slot_cashflow", "slot_reward")
+
+    def __init__(self, n_envs: int, num_cars: int, time_steps_per_hour: int):
+        """
+        :param n_envs: Number of envs K
+        :param num_cars: Number of cars
+        :param time_steps_per_hour: Time steps per hour, sets the resolution of the time of day histograms
+        """
+
+        self.n_envs = n_envs
+        self.num_cars = num_cars
+        self.time_steps_per_hour = time_steps_per_hour
+        self.step_minutes = 60 // time_steps_per_hour
+        self.n_slots = 24 * time_steps_per_hour
+
+        # template of the aggregates of one env
+        empty = KpiAggregator(num_cars, time_steps_per_hour)
+        self.arrays: dict[str, np.ndarray] = {name: np.zeros((n_envs,) + np.shape(getattr(empty, name)),
+                                                             dtype=np.asarray(getattr(empty, name)).dtype)
+                                              for name in self.fields}
+        self.reset()
+
+    def reset(self, indices=None) -> None:
+        """
+        :param indices: Envs to reset, all envs if None
+        :return: None
+        """
+
+        indices = slice(None) if indices is None else indices
+        for name, values in self.arrays.items():
+            values[indices] = 0
+        self.arrays["soh"][indices] = 1
+
+    def update(self,
+               hour: np.ndarray,
+               minute: np.ndarray,
+               reward: np.ndarray,
+               cashflow: np.ndarray,
+               penalty: np.ndarray,
+               grid: np.ndarray,
+               soc_v: np.ndarray,
+               degradation: np.ndarray,
+               charge_log: np.ndarray,
+               soh: np.ndarray) -> None:
+        """
+        Adds one time step of each env, same values as KpiAggregator.update with a leading env axis.
+
+        :param hour: Hour of the time step of each env, (K,)
+        :param minute: Minute of the time step of each env, (K,)
+        :param reward: Reward, (K,)
+        :param cashflow: in EUR, (K,)
+        :param penalty: penalty, (K,)
+        :param grid: Grid overloading in kW, (K,)
+        :param soc_v: Amount of SOC violated in # of batteries, (K,)
+        :param degradation: Degradation in that timestep, (K, num_cars)
+        :param charge_log: How much energy flowed into the batteries in kWh, (K, num_cars)
+        :param soh: Current SoH, (K, num_cars)
+        :return: None
+        """
+
+        a = self.arrays
+        a["steps"] += 1
+        a["reward"] += reward
+        a["cashflow"] += cashflow
+        a["penalty"] += penalty
+        a["grid"] += grid
+        a["soc_v"] += soc_v
+        a["n_violations"] += soc_v > 0
+        np.maximum(a["max_grid"], grid, out=a["max_grid"])
+        np.maximum(a["max_soc_v"], soc_v, out=a["max_soc_v"])
+        a["degradation"] += degradation
+        a["soh"][:] = soh
+
+        # each env adds to one slot, so the (env, slot) pairs are unique
+        envs = np.arange(self.n_envs)
+        slot = (hour * 60 + minute) // self.step_minutes
+        a["slot_count"][envs, slot] += 1
+        a["slot_charging"][envs, slot] += charge_log
+        a["slot_cashflow"][envs, slot] += cashflow
+        a["slot_reward"][envs, slot] += reward
+
+    def get(self, index: int) -> KpiAggregator:
+        """
+        :param index: Index of the env
+        :return: Copy of the aggregates of that env as a KpiAggregator
+        """
+
+        kpis = KpiAggregator(self.num_cars, self.time_steps_per_hour)
+        for name, values in self.arrays.items():
+            value = values[index]
+            setattr(kpis, name, value.copy() if value.ndim > 0 else value.item())
+        return kpis
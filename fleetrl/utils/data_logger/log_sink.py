@@ -0,0 +1,120 @@
+import os
+import glob
+
+import numpy as np
+import pandas as pd
+
+from fleetrl.utils.data_logger.data_logger import DataLogger
+from fleetrl.utils.optional_dependencies import import_pyarrow
+
+
+class ParquetLogSink:
+    """
+    Append-only columnar storage of the log of one env. The DataLogger flushes fixed-size chunks of its buffers to the
+    sink, each chunk is written as a parquet file in the log directory. Memory use is bounded by the chunk size.
+
+    - Scalar columns are stored as columns, array columns (observation, action, ...) as fixed-size lists
+    - Files are named by their chunk number, so the directory can be read as one dataset in the logged order
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Directory of the log, created if necessary
+        """
+        self.path: str = path
+        self.chunks: int = 0  # number of written chunks
+        os.makedirs(self.path, exist_ok=True)
+
+    def write(self, columns: dict[str, np.ndarray]) -> None:
+        """
+        Writes one chunk.
+
+        :param columns: Dict of column name and values, 1-D for scalar columns and 2-D for array columns
+        :return: None
+        """
+
+        pa, pq = import_pyarrow("Streaming the log to parquet files")
+
+        arrays = []
+        for values in columns.values():
+            if values.ndim == 2:
+                flat = pa.array(np.ascontiguousarray(values).reshape(-1))
+                arrays.append(pa.FixedSizeListArray.from_arrays(flat, values.shape[1]))
+            else:
+                arrays.append(pa.array(values))
+        table = pa.Table.from_arrays(arrays, names=list(columns))
+
+        pq.write_table(table, os.path.join(self.path, f"part-{self.chunks:06d}.parquet"))
+        self.chunks += 1
+
+    def reader(self) -> "LogReader":
+        """
+        :return: Lazy reader of the log directory
+        """
+        return LogReader(self.path)
+
+
+class LogReader:
+    """
+    Lazily loaded log that was streamed to parquet files. Only holds the path, so it can be returned cheaply from
+    subprocess envs. Data is read on request, optionally only some columns and a time window.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Log directory, written by ParquetLogSink
+        """
+        self.path: str = path
+
+    @property
+    def files(self) -> list[str]:
+        """
+        :return: Chunk files, in the logged order
+        """
+        return sorted(glob.glob(os.path.join(self.path, "part-*.parquet")))
+
+    def read(self,
+             columns: list[str] = None,
+             start: str | pd.Timestamp = None,
+             end: str | pd.Timestamp = None) -> pd.DataFrame:
+        """
+        Reads the log, in the same schema as DataLogger.get_log.
+
+        :param columns: Columns to read, e.g. ["Time", "Reward"], default all columns
+        :param start: Only read entries with Time >= start
+        :param end: Only read entries with Time <= end
+        :return: Log dataframe
+        """
+
+        pa, pq = import_pyarrow("Streaming the log to parquet files")
+
+        files = self.files
+        if len(files) == 0:
+            return pd.DataFrame()
+
+        if columns is None:
+            columns = list(DataLogger.columns)
+        # time is needed for the window, the flag to restore float degradation
+        read_columns = list(dict.fromkeys(columns + ["Time", DataLogger.scalar_degradation_column]))
+
+        filters = []
+        if start is not None:
+            filters.append(("Time", ">=", pd.Timestamp(start)))
+        if end is not None:
+            filters.append(("Time", "<=", pd.Timestamp(end)))
+
+        tables = [pq.read_table(file, columns=read_columns, filters=filters or None) for file in files]
+        table = pa.concat_tables(tables)
+
+        data = {}
+        for name in read_columns:
+            column = table.column(name).combine_chunks()
+            if pa.types.is_fixed_size_list(column.type):
+                data[name] = column.flatten().to_numpy(zero_copy_only=False).reshape(-1, column.type.list_size)
+            else:
+                data[name] = column.to_numpy(zero_copy_only=False)
+
+        return DataLogger.to_frame(data, columns)
+
+    def __repr__(self):
+        return f"LogReader({self.path!r})"
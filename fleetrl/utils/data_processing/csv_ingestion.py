@@ -0,0 +1,98 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+
+class CsvIngestion:
+    """
+    Fast parsing of the csv input files. Instead of parsing entire files and converting columns afterwards:
+
+    - Only the used columns are parsed (usecols), e.g. only DE/LU of the 18 countries in the spot price file
+    - Explicit dtypes, Location and ChargingStation as categoricals
+    - Parsed by pyarrow if it is installed, otherwise by the pandas C engine
+    - Timestamps are parsed with a known format. Files with other formats fall back to format inference
+
+    The parse time of each file is recorded, see report().
+    """
+
+    date_format = "%Y-%m-%d %H:%M:%S"
+
+    schedule_columns = {"date": None,
+                        "Distance_km": np.float64,
+                        "Consumption_kWh": np.float64,
+                        "Location": "category",
+                        "ChargingStation": "category",
+                        "ID": None,  # numbers or strings, inferred like before
+                        "PowerRating_kW": np.float64}
+
+    spot_column = "Deutschland/Luxemburg [€/MWh] Original resolutions"
+
+    def __init__(self, engine: str = None):
+        """
+        :param engine: Parser engine of pd.read_csv, default pyarrow if installed, otherwise c
+        """
+
+        if engine is None:
+            try:
+                import pyarrow
+                engine = "pyarrow"
+            except ImportError:
+                engine = "c"
+        self.engine: str = engine
+
+        # file, rows and parse time of each read
+        self.timings: list[dict] = []
+
+    def read(self, path: str, columns: dict, delimiter: str = ",", decimal: str = ".") -> pd.DataFrame:
+        """
+        :param path: Path of the csv file
+        :param columns: Dict of the columns to parse and their dtype. None: dtype is inferred. "date" is parsed as
+            timestamp
+        :param delimiter: Column delimiter
+        :param decimal: Decimal separator
+        :return: pd.DataFrame with the requested columns
+        """
+
+        start = time.perf_counter()
+
+        dtype = {name: column_type for name, column_type in columns.items() if column_type is not None}
+        df = pd.read_csv(path,
+                         delimiter=delimiter,
+                         decimal=decimal,
+                         usecols=list(columns),
+                         dtype=dtype or None,
+                         parse_dates=["date"],
+                         date_format=self.date_format,
+                         engine=self.engine)
+
+        # timestamps in another format are left unparsed
+        if not pd.api.types.is_datetime64_any_dtype(df["date"]):
+            df["date"] = pd.to_datetime(df["date"])
+        df["date"] = df["date"].astype("datetime64[ns]")
+
+        self.timings.append({"File": os.path.basename(path), "Rows": len(df),
+                             "Parse time [s]": time.perf_counter() - start})
+        return df
+
+    def read_schedule(self, path: str) -> pd.DataFrame:
+        """
+        :param path: Path of the schedule csv
+        :return: pd.DataFrame of the schedule, without the index column
+        """
+        return self.read(path, self.schedule_columns)
+
+    def read_spot(self, path: str) -> pd.DataFrame:
+        """
+        :param path: Path of the spot price csv, semicolon separated with decimal commas
+        :return: pd.DataFrame with date and DELU price
+        """
+        spot = self.read(path, {"date": None, self.spot_column: np.float64}, delimiter=";", decimal=",")
+        return spot.rename(columns={self.spot_column: "DELU"})
+
+    def report(self) -> pd.DataFrame:
+        """
+        :return: Rows and parse time of each file that was read, in the order of reading
+        """
+        return pd.DataFrame(self.timings, columns=["File", "Rows", "Parse time [s]"])
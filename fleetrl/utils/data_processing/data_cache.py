@@ -0,0 +1,133 @@
+import os
+import json
+import shutil
+import hashlib
+
+from fleetrl.utils.data_processing.timeseries_store import TimeSeriesStore
+
+
+class DataCache:
+    """
+    Persistent on-disk cache of the processed input data. Parsing and pre-processing the csv files (resampling,
+    trip computation, merging prices, load and pv, de-trending prices) happens every time an env is instantiated.
+    The result only depends on the input files and a few settings, so it is cached as a time series store.
+
+    - Entries are content-addressed: the key is a hash of the input file contents and the relevant settings
+    - Each entry is a directory of .npy arrays, loaded memory-mapped (see TimeSeriesStore.attach)
+    - The total size of the cache is limited, least recently used entries are evicted first
+    """
+
+    def __init__(self, cache_dir: str = None, max_size_mb: float = 1024):
+        """
+        :param cache_dir: Directory of the cache, default is ~/.cache/fleetrl
+        :param max_size_mb: Size limit of the cache in MB
+        """
+
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.expanduser("~"), ".cache", "fleetrl")
+        self.cache_dir: str = cache_dir
+        self.max_size_mb: float = max_size_mb
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(files: list[str], settings: dict) -> str:
+        """
+        Computes the cache key from the contents of the input files and the settings that change the processed data.
+
+        :param files: List of paths to the input files
+        :param settings: Dict of settings, e.g. frequency, markups, flags. Values must be json serializable or str-able
+        :return: Hex digest that identifies the processed data
+        """
+
+        sha = hashlib.sha256()
+        for file in files:
+            with open(file, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    sha.update(chunk)
+        sha.update(json.dumps(settings, sort_keys=True, default=str).encode())
+        return sha.hexdigest()
+
+    def get(self, key: str) -> TimeSeriesStore | None:
+        """
+        :param key: Cache key, see fingerprint()
+        :return: Memory-mapped store if the key is cached, otherwise None
+        """
+
+        path = os.path.join(self.cache_dir, key)
+        meta = os.path.join(path, "meta.json")
+        if not os.path.isfile(meta):
+            return None
+
+        # mark as recently used for the eviction
+        os.utime(meta)
+        return TimeSeriesStore.attach(path)
+
+    def put(self, key: str, store: TimeSeriesStore) -> None:
+        """
+        Saves a store in the cache and evicts least recently used entries if the size limit is exceeded.
+
+        :param key: Cache key, see fingerprint()
+        :param store: Store with the processed data
+        :return: None
+        """
+
+        path = os.path.join(self.cache_dir, key)
+
+        # write to a temporary directory first, so other processes never see incomplete entries
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        store.save(tmp_path)
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            # entry has been written by another process in the meantime
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+        self.evict(keep=key)
+
+    def evict(self, keep: str = None) -> None:
+        """
+        Removes least recently used entries until the cache is below the size limit.
+
+        :param keep: Key that is never evicted, e.g. the entry that was just written
+        :return: None
+        """
+
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            meta = os.path.join(self.cache_dir, key, "meta.json")
+            if os.path.isfile(meta):
+                entries.append((os.path.getmtime(meta), key, self._size(os.path.join(self.cache_dir, key))))
+
+        total = sum(size for _, _, size in entries)
+        for _, key, size in sorted(entries):
+            if total <= self.max_size_mb * 1024 ** 2:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
+            total -= size
+
+    def invalidate(self, key: str = None) -> None:
+        """
+        Removes one entry, or the whole cache if no key is specified.
+
+        :param key: Cache key, see fingerprint()
+        :return: None
+        """
+
+        if key is not None:
+            shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
+        else:
+            for entry in os.listdir(self.cache_dir):
+                shutil.rmtree(os.path.join(self.cache_dir, entry), ignore_errors=True)
+
+    def size_mb(self) -> float:
+        """
+        :return: Current size of the cache in MB
+        """
+        return self._size(self.cache_dir) / 1024 ** 2
+
+    @staticmethod
+    def _size(path: str) -> int:
+        return sum(os.path.getsize(os.path.join(root, file)) for root, _, files in os.walk(path) for file in files)
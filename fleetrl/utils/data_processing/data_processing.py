@@ -6,6 +6,8 @@ import pandas as pd
 
 from fleetrl.fleet_env.config.ev_config import EvConfig
 from fleetrl.fleet_env.config.time_config import TimeConfig
+from fleetrl.utils.data_processing.csv_ingestion import CsvIngestion
+from fleetrl.utils.schedule.schedule_writer import ScheduleReader
 
 
 # this class contains all the necessary information from the vehicle and its schedule
@@ -14,7 +16,8 @@ from fleetrl.fleet_env.config.time_config import TimeConfig
 class DataLoader:
     """
     The DataLoader class handles the csv import and pre-processing of the timeseries information.
-    Optimized pandas functions such as merge_asof are used to significantly speed up processing compared to loops.
+    Optimized pandas functions such as merge_asof and vectorized numpy operations are used to significantly speed up
+    processing compared to loops.
     Cython could further improve this initial processing step. It only happens once when instantiating env objects.
     """
 
@@ -27,7 +30,8 @@ class DataLoader:
         """
         Initial information that is required for loading data
         :param path_name: string pointing to the parent directory of input files
-        :param schedule_name: string of the schedule csv, e.g. "1_LMD.csv"
+        :param schedule_name: string of the schedule csv, e.g. "1_LMD.csv", or of a schedule directory written by
+            ScheduleWriter
         :param spot_name: string of the spot price csv
         :param tariff_name: string of the feed-in tariff csv
         :param building_name: building load csv
@@ -42,9 +46,12 @@ class DataLoader:
         # save the time_conf within DataLoader as well because it is used in some functions
         self.time_conf = time_conf
 
+        # csv parsing, records the parse time of each file
+        self.ingestion = CsvIngestion()
+
         # schedule import from excel
         # db = pd.read_excel(os.path.dirname(__file__) + '/test_simple.xlsx')
-        self.schedule = pd.read_csv(os.path.join(path_name, schedule_name), parse_dates=["date"])
+        self.schedule = self.read_schedule(os.path.join(path_name, schedule_name))
 
         # setting the index of the df to the date for resampling
         self.schedule.set_index("date", inplace=True, drop=False)
@@ -117,13 +124,26 @@ class DataLoader:
             self.db = None
             raise RuntimeError("Problem with building database. Check building and PV flags.")
 
+    def read_schedule(self, schedule_path: str) -> pd.DataFrame:
+        """
+        Reads the schedule from a csv file or from a directory written by ScheduleWriter, without a csv round-trip.
+
+        :param schedule_path: Path of the schedule
+        :return: pd.DataFrame of the schedule
+        """
+
+        if ScheduleReader.is_schedule_dir(schedule_path):
+            return ScheduleReader(schedule_path).read()
+        return self.ingestion.read_schedule(schedule_path)
+
     def compute_from_schedule(self, ev_conf, time_conf, target_soc):
         """
         This function pre-processes the input data and adds additional rows to the file.
         There flag, time left at charger, soc on return, consumption, etc.
 
-        Use merge_asof and vectorized operations for performance gains
-    
+        The trips are aggregated in one grouped pass. Each timeslot is then matched with the last return and the next
+        departure of its vehicle by binary search over the sorted trips, instead of merging the entire schedule.
+
         :return: None
         """
         # new column with flag if EV is there or not
@@ -138,81 +158,61 @@ class DataLoader:
         # create a column for the total consumption that will later be populated
         self.schedule["TotalConsumption"] = np.zeros(len(self.schedule))
 
-        # calculate the total consumption of a single trip by summing over a group
-        # only choose the groups where the car is driving (=="none")
-        # sum over the consumption
-        # resetting the index and dropping the old group index
-        consumption = (self.schedule.loc[self.schedule["ChargingStation"] == "none"]
-                       .groupby('Group')["Consumption_kWh"].sum().reset_index(drop=True))
-
-        trip_length = (self.schedule.loc[self.schedule["ChargingStation"] == "none"]
-                       .groupby('Group')["date"].count().reset_index(drop=True))
-
-        # get the last dates of each trip
-        # resetting the index so the group index goes away
-        last_dates = (self.schedule.loc[self.schedule["ChargingStation"] == "none"]
-                      .groupby('Group')["date"].last().reset_index(drop=True))
-
-        # get the first dates of each trip
-        # resetting the index so the group index goes away
-        departure_dates = (self.schedule.loc[self.schedule["ChargingStation"] == "none"]
-                           .groupby('Group')["date"].first().reset_index(drop=True))
+        # aggregate each trip: the groups where the car is driving (=="none")
+        # total consumption, length, first (departure) and last date, vehicle id
+        trips = (self.schedule.loc[self.schedule["ChargingStation"] == "none"]
+                 .groupby("Group")
+                 .agg(consumption=("Consumption_kWh", "sum"),
+                      len=("date", "count"),
+                      dep=("date", "first"),
+                      last=("date", "last"),
+                      ID=("ID", "first")))
 
         # the return dates are on the next timestep
-        # drop duplicates because the date is iterated through for each ev anyway
-        return_dates = last_dates.add(datetime.timedelta(minutes=time_conf.minutes))
-        # get the vehicle ids of the trips
-        # resetting the index so the group index goes away
-        # dropping duplicates because the loop iterates through both dates and ids anyway
-        ids = self.schedule.loc[self.schedule["ChargingStation"] == "none"].groupby('Group')["ID"].first().reset_index(drop=True)
-
-        # creating a dataframe for calculating the consumption, the info of ID and date is needed
-        res_return = pd.DataFrame({"ID": ids, "consumption": consumption, "date": return_dates, "len": trip_length})
-
-        # creating a dataframe for calculating the time_left, ID and date needed for pd.merge_asof()
-        res_departure = pd.DataFrame({"ID": ids, "dep": departure_dates, "date": departure_dates})
-
-        # match return dates with db, backwards fill, sort by ID, match on date
-        merged_cons = pd.merge_asof(self.schedule.sort_values("date"),
-                                    res_return.sort_values("date"),
-                                    on="date",
-                                    by="ID",
-                                    direction="backward"
-                                    )
-
-        # sort the df into the right order and reset the index
-        merged_cons = merged_cons.sort_values(["ID", "date"]).reset_index(drop=True)
-
-        # set consumption to 0 where the car is not there because information is unknown to the agent at that point
-        merged_cons.loc[merged_cons["There"] == 0, "consumption"] = 0
-
-        # set trip length to 0 where the car is not there because information unknown to agent at that point
-        merged_cons.loc[merged_cons["There"] == 0, "len"] = 0
-
-        # fill NaN values
-        merged_cons.fillna(0, inplace=True)
-
-        # match departure dates with dates in db, forward direction, sort by ID, match on date
-        merged_time_left = pd.merge_asof(self.schedule.sort_values("date"),
-                                         res_departure.sort_values("date"),
-                                         on="date",
-                                         by="ID",
-                                         direction="forward"
-                                         )
-
-        # reset the index
-        merged_time_left = merged_time_left.sort_values(["ID", "date"]).reset_index(drop=True)
-        # calculate time left with the correct index
-        merged_time_left["time_left"] = (merged_time_left["dep"] - merged_time_left["date"]).dt.total_seconds() / 3600
-        # time left is 0 when the car is not there
-        merged_time_left.loc[merged_time_left["There"] == 0, "time_left"] = 0
-        # fill NaN values
-        merged_time_left.loc[:, "time_left"].fillna(0, inplace=True)
-
-        # add computed information to db
-        self.schedule["last_trip_total_consumption"] = merged_cons.loc[:, "consumption"]
-        self.schedule["last_trip_total_length_hours"] = merged_cons.loc[:, "len"].div(self.time_conf.time_steps_per_hour)
-        self.schedule["time_left"] = merged_time_left.loc[:, "time_left"]
+        return_dates = trips["last"] + datetime.timedelta(minutes=time_conf.minutes)
+
+        # composite keys (vehicle, date) of timeslots and trips, with vehicle and date replaced by their rank
+        id_codes, ids = pd.factorize(self.schedule["ID"], sort=True)
+        trip_codes = ids.get_indexer(trips["ID"])
+        n_rows = len(self.schedule)
+        time_codes, times = pd.factorize(np.concatenate([self.schedule["date"].to_numpy(),
+                                                         trips["dep"].to_numpy(),
+                                                         return_dates.to_numpy()]), sort=True)
+        row_keys = id_codes * len(times) + time_codes[:n_rows]
+        departure_keys = trip_codes * len(times) + time_codes[n_rows:n_rows + len(trips)]
+        return_keys = trip_codes * len(times) + time_codes[n_rows + len(trips):]
+
+        # the timeslots are matched in the order of vehicle and date
+        if np.all(row_keys[1:] >= row_keys[:-1]):
+            order = np.arange(n_rows)
+        else:
+            order = np.argsort(row_keys, kind="stable")
+        row_keys = row_keys[order]
+        id_codes = id_codes[order]
+        dates = self.schedule["date"].to_numpy()[order]
+        there = self.schedule["There"].to_numpy()[order]
+
+        # last return of the same vehicle at or before each timeslot
+        # consumption and trip length are unknown to the agent when the car is not there
+        last_trip, found = self._match_trips(return_keys, row_keys, trip_codes, id_codes, backward=True)
+        known = found & (there != 0)
+        consumption = np.zeros(len(dates))
+        consumption[known] = trips["consumption"].to_numpy()[last_trip[known]]
+        trip_length = np.zeros(len(dates))
+        trip_length[known] = trips["len"].to_numpy()[last_trip[known]]
+
+        # next departure of the same vehicle at or after each timeslot
+        # time left is 0 when the car is not there or there is no next departure
+        next_trip, found = self._match_trips(departure_keys, row_keys, trip_codes, id_codes, backward=False)
+        known = found & (there != 0)
+        time_left = np.zeros(len(dates))
+        time_left[known] = ((trips["dep"].to_numpy()[next_trip[known]] - dates[known]).astype("timedelta64[ns]")
+                            .astype(np.int64) / 1e9 / 3600)
+
+        # add computed information to db, in the order of vehicle and date
+        self.schedule["last_trip_total_consumption"] = consumption
+        self.schedule["last_trip_total_length_hours"] = trip_length / self.time_conf.time_steps_per_hour
+        self.schedule["time_left"] = time_left
 
         # create SOC column and populate with zeros
         # calculate SOC on return, assuming the previous trip charged to the target soc
@@ -223,40 +223,36 @@ class DataLoader:
         self.schedule.loc[self.schedule["There"] == 0, "SOC_on_return"] = 0
 
 
-    def load_prices_original(self, path_name, spot_name, date_range):
+    @staticmethod
+    def _match_trips(trip_keys: np.ndarray,
+                     row_keys: np.ndarray,
+                     trip_codes: np.ndarray,
+                     id_codes: np.ndarray,
+                     backward: bool) -> tuple[np.ndarray, np.ndarray]:
         """
-        Load prices from csv
-        :param path_name: Parent directory string
-        :param spot_name: file name with .csv ending
-        :param date_range: pd.date_range which was defined from the "date" column in the EV schedules. Note that the
-        EV schedule dates therefore dictate the model's timeframe.
-        :return: spot price dataframe
+        Matches each timeslot with a trip of the same vehicle, like pd.merge_asof(by="ID") on sorted keys.
+
+        :param trip_keys: Composite (vehicle, date) keys of the trips, e.g. return dates
+        :param row_keys: Composite (vehicle, date) keys of the timeslots
+        :param trip_codes: Vehicle of each trip
+        :param id_codes: Vehicle of each timeslot
+        :param backward: Last trip at or before the timeslot if True, first trip at or after it otherwise
+        :return: Index of the matched trip of each timeslot, mask of the timeslots with a match
         """
-        # load csv
-        spot = pd.read_csv(os.path.join(path_name, spot_name), delimiter=";", decimal=",")
-
-        # drop price information of other countries
-        spot = spot.drop(columns=spot.columns[4:20])
-
-        # put the date in the same format as the schedule
-        spot = spot.rename(columns={"Date": "date"})
-        spot["date"] = spot["date"] + " " + spot["Start"] + ":00"
-        spot["date"] = pd.to_datetime(spot["date"], format="mixed")
 
-        # rename column for accessibility
-        spot = spot.rename(columns={"Deutschland/Luxemburg [€/MWh] Original resolutions": "DELU"})
-
-        spot = self._date_checker(df=spot, date_range=date_range)
+        if len(trip_keys) == 0:
+            return np.zeros(len(row_keys), dtype=int), np.zeros(len(row_keys), dtype=bool)
 
-        # TODO test if this also works for down-sampling. Right now this up-samples from hourly to quarter-hourly
-        spot_price = pd.merge_asof(date_range,
-                                   spot.sort_values("date"),
-                                   on="date",
-                                   direction="backward"
-                                   )
+        trip_order = np.argsort(trip_keys, kind="stable")
+        if backward:
+            position = np.searchsorted(trip_keys[trip_order], row_keys, side="right") - 1
+            in_range = position >= 0
+        else:
+            position = np.searchsorted(trip_keys[trip_order], row_keys, side="left")
+            in_range = position < len(trip_keys)
 
-        # return the spot price at the right granularity
-        return spot_price
+        trip = trip_order[np.clip(position, 0, len(trip_keys) - 1)]
+        return trip, in_range & (trip_codes[trip] == id_codes)
 
     def load_prices(self, path_name, spot_name, date_range):
         """
@@ -268,16 +264,8 @@ class DataLoader:
         :return: spot price dataframe
         """
         # load csv
-        spot = pd.read_csv(os.path.join(path_name, spot_name), delimiter=";", decimal=",", parse_dates=["date"])
-
-        # drop price information of other countries
-        spot = spot.drop(columns=spot.columns[4:20])
-
-        # put the date in the same format as the schedule
-        # spot["date"] = pd.to_datetime(spot["date"], format="mixed")
-
-        # rename column for accessibility
-        spot = spot.rename(columns={"Deutschland/Luxemburg [€/MWh] Original resolutions": "DELU"})
+        # only the DE/LU price is parsed, renamed to "DELU" for accessibility
+        spot = self.ingestion.read_spot(os.path.join(path_name, spot_name))
 
         # check that the years are the same
         # otherwise change the year and fix leap year problems
@@ -304,7 +292,8 @@ class DataLoader:
         :return: tariff dataframe
         """
         # load csv
-        df = pd.read_csv(os.path.join(path_name, tariff_name), delimiter=";", decimal=",", parse_dates=["date"])
+        df = self.ingestion.read(os.path.join(path_name, tariff_name), {"date": None, "tariff": np.float64},
+                                 delimiter=";", decimal=",")
 
         df = self._date_checker(df=df, date_range=date_range)
 
@@ -328,8 +317,7 @@ class DataLoader:
         :return: load dataframe
         """
 
-        b_load = pd.read_csv(os.path.join(path_name, file_name), delimiter=",", parse_dates=["date"])
-        # b_load["date"] = pd.to_datetime(b_load["date"], format="mixed")
+        b_load = self.ingestion.read(os.path.join(path_name, file_name), {"date": None, "load": np.float64})
 
         b_load = self._date_checker(df = b_load, date_range=date_range)
 
@@ -354,10 +342,7 @@ class DataLoader:
         :return: pv dataframe
         """
 
-        pv = pd.read_csv(os.path.join(path_name, pv_name), delimiter=",", decimal=",", parse_dates=["date"])
-        # pv["date"] = pd.to_datetime(pv["date"], format="mixed")
-
-        pv["pv"] = pv["pv"].astype(float)
+        pv = self.ingestion.read(os.path.join(path_name, pv_name), {"date": None, "pv": np.float64})
 
         pv = self._date_checker(df=pv, date_range=date_range)
 
@@ -0,0 +1,304 @@
+import os
+import json
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+
+class TimeSeriesStore:
+    """
+    Dense, read-only view of the processed database. Every field is stored as a numpy array that is addressed by an
+    integer time index instead of boolean masks on the date column.
+    - Per-car fields have the shape (T, N): one row per time step, one column per car
+    - Site fields (prices, load, pv, reward curves) have the shape (T,)
+    - Fields that are not part of the database (e.g. pv if it is not included) are None
+    - Time deltas and calendar fields (hour, minute, weekday, month) are precomputed per time step
+    - Hourly lookahead windows of the site fields are views of an hourly series, see lookahead_window()
+
+    The store can be shared between processes (e.g. SubprocVecEnv workers): share() saves the arrays once to a
+    directory, and every process memory-maps them read-only. A shared store is pickled as its path only, so the
+    workers attach to the same data without copying it.
+    """
+
+    def __init__(self, db: pd.DataFrame):
+        """
+        Reshape the long-format database (rows sorted by ID, then date) into dense arrays.
+
+        :param db: Database from the DataLoader, including the price reward curves if prices are used
+        """
+
+        self.path: str = None  # directory of the memory-mapped arrays, if the store is shared
+        self.num_cars: int = int(db["ID"].max()) + 1
+
+        # site information is concatenated next to the rows of the first car, see DataLoader
+        self.dates: pd.DatetimeIndex = pd.DatetimeIndex(db.loc[db["ID"] == 0, "date"])
+        self.date_values: np.ndarray = self.dates.values  # datetime64, used for fast lookups
+        self.length: int = len(self.dates)  # number of time steps T
+
+        if self.length * self.num_cars != len(db):
+            raise ValueError("All cars must share the same time steps to build a dense store.")
+
+        # time delta to the next time step, allows irregular intervals (real_time). Last step repeats the previous one
+        seconds = np.diff(self.date_values).astype("timedelta64[s]").astype(float)
+        seconds = np.append(seconds, seconds[-1] if len(seconds) > 0 else 0.0)
+        self.dt: np.ndarray = seconds / 3600  # in hours
+        self.minutes: np.ndarray = (seconds / 60).astype(int)  # integer minutes
+
+        # calendar fields of each time step
+        self.hour: np.ndarray = self.dates.hour.to_numpy()
+        self.minute: np.ndarray = self.dates.minute.to_numpy()
+        self.second: np.ndarray = self.dates.second.to_numpy()
+        self.weekday: np.ndarray = self.dates.weekday.to_numpy()
+        self.month: np.ndarray = self.dates.month.to_numpy()
+
+        # per-car fields, (T, N)
+        self.there = self._car_field(db, "There")  # plugged in y/n
+        self.soc_on_return = self._car_field(db, "SOC_on_return")  # soc when arriving at the charger
+        self.time_left = self._car_field(db, "time_left")  # hours left at the charger
+        self.last_trip_consumption = self._car_field(db, "last_trip_total_consumption")  # kWh of the last trip
+        self.last_trip_length = self._car_field(db, "last_trip_total_length_hours")  # hours of the last trip
+
+        # site fields, (T,)
+        self.spot = self._site_field(db, "DELU")  # spot price in €/MWh
+        self.tariff = self._site_field(db, "tariff")  # feed-in tariff in €/MWh
+        self.load = self._site_field(db, "load")  # building load in kW
+        self.pv = self._site_field(db, "pv")  # pv generation in kW
+        self.price_reward_curve = self._site_field(db, "price_reward_curve")  # de-trended price
+        self.tariff_reward_curve = self._site_field(db, "tariff_reward_curve")  # de-trended tariff
+
+    def _car_field(self, db: pd.DataFrame, col: str) -> np.ndarray:
+        if col not in db.columns:
+            return None
+        arr = db[col].to_numpy(dtype=float).reshape(self.num_cars, self.length).T.copy()
+        arr.flags.writeable = False
+        return arr
+
+    def _site_field(self, db: pd.DataFrame, col: str) -> np.ndarray:
+        if col not in db.columns:
+            return None
+        arr = db[col].to_numpy(dtype=float)[:self.length].copy()
+        arr.flags.writeable = False
+        return arr
+
+    def save(self, path: str) -> None:
+        """
+        Saves all arrays of the store as .npy files to a directory, together with a small json file of meta data.
+
+        :param path: Directory to save the arrays to
+        :return: None
+        """
+
+        os.makedirs(path, exist_ok=True)
+
+        fields = {}
+        for name, value in vars(self).items():
+            if isinstance(value, np.ndarray):
+                np.save(os.path.join(path, f"{name}.npy"), value, allow_pickle=False)
+                fields[name] = True
+            elif value is None and name != "path":
+                fields[name] = False
+
+        with open(os.path.join(path, "meta.json"), "w") as file:
+            json.dump({"num_cars": self.num_cars, "length": self.length, "fields": fields}, file)
+
+    def share(self, path: str = None) -> "TimeSeriesStore":
+        """
+        Saves all arrays of the store to a directory and returns a store that memory-maps them read-only. The
+        returned store can be passed to FleetEnv in other processes without copying the data. The directory can be
+        removed with unlink() once all processes are closed.
+
+        :param path: Directory to save the arrays to, a temporary directory is created if not specified
+        :return: Memory-mapped store
+        """
+
+        if path is None:
+            path = tempfile.mkdtemp(prefix="fleetrl_store_")
+        self.save(path)
+
+        return TimeSeriesStore.attach(path)
+
+    @classmethod
+    def attach(cls, path: str) -> "TimeSeriesStore":
+        """
+        Opens a store that has been saved with share(). The arrays are memory-mapped read-only, so several
+        processes use the same physical memory.
+
+        :param path: Directory of the shared store
+        :return: Memory-mapped store
+        """
+
+        with open(os.path.join(path, "meta.json"), "r") as file:
+            meta = json.load(file)
+
+        store = cls.__new__(cls)
+        store.path = path
+        store.num_cars = meta["num_cars"]
+        store.length = meta["length"]
+        for name, present in meta["fields"].items():
+            if present:
+                setattr(store, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r").view(np.ndarray))
+            else:
+                setattr(store, name, None)
+        store.dates = pd.DatetimeIndex(store.date_values)
+
+        return store
+
+    def unlink(self) -> None:
+        """
+        Removes the directory of a shared store. Processes that use the store must be closed before.
+
+        :return: None
+        """
+        if self.path is not None:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def __getstate__(self):
+        # shared stores are pickled as their path, the arrays are memory-mapped again when unpickled
+        if self.path is not None:
+            return {"path": self.path}
+        return self.__dict__
+
+    def __setstate__(self, state):
+        if "dates" not in state:
+            state = vars(TimeSeriesStore.attach(state["path"]))
+        self.__dict__.update(state)
+
+    def index_of(self, time: pd.Timestamp) -> int:
+        """
+        Translates a timestamp into the integer time index of the store.
+
+        :param time: Timestamp that must exist in the dataset
+        :return: Integer index of the time step
+        """
+        time = np.datetime64(time, "ns")
+        t = int(self.date_values.searchsorted(time))
+        if (t >= self.length) or (self.date_values[t] != time):
+            raise KeyError(f"Time step not found in dataset: {time}")
+        return t
+
+    def timestamp(self, t: int) -> pd.Timestamp:
+        """
+        Materializes the timestamp of an integer time index, e.g. for logging.
+
+        :param t: Integer index of the time step
+        :return: Timestamp of the time step
+        """
+        return self.dates[t]
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Reconstructs the database in the long format of the DataLoader (rows sorted by ID, then date), e.g. for the
+        benchmarks of an env whose store is shared or cached. Only the fields of the store are included, raw schedule
+        columns such as Location or Distance_km are not part of the store.
+
+        :return: pd.DataFrame with date, ID, the per-car fields and the site fields next to the rows of the first car
+        """
+
+        car_fields = {"There": self.there,
+                      "SOC_on_return": self.soc_on_return,
+                      "time_left": self.time_left,
+                      "last_trip_total_consumption": self.last_trip_consumption,
+                      "last_trip_total_length_hours": self.last_trip_length}
+        site_fields = {"DELU": self.spot,
+                       "tariff": self.tariff,
+                       "load": self.load,
+                       "pv": self.pv,
+                       "price_reward_curve": self.price_reward_curve,
+                       "tariff_reward_curve": self.tariff_reward_curve}
+
+        db = pd.DataFrame({"date": np.tile(self.date_values, self.num_cars),
+                           "ID": np.repeat(np.arange(self.num_cars), self.length)})
+        for name, values in car_fields.items():
+            if values is not None:
+                db[name] = np.asarray(values).T.reshape(-1)
+        for name, values in site_fields.items():
+            if values is not None:
+                column = np.full(len(db), np.nan)
+                column[:self.length] = values
+                db[name] = column
+
+        return db
+
+    def hours(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        :return: Position of the hour of each time step, counted from the first hour of the dataset, and the index of
+            the first time step of each hour
+        """
+        hours = self.date_values.astype("datetime64[h]").astype(np.int64)
+        first_index = np.flatnonzero(np.r_[True, hours[1:] != hours[:-1]])
+        return hours - hours[0], first_index
+
+    def lookahead_window(self,
+                         values: np.ndarray,
+                         lookahead: int,
+                         offset: float = 0.0,
+                         factor: float = 1.0,
+                         hours: tuple[np.ndarray, np.ndarray] = None) -> "LookaheadWindow":
+        """
+        :param values: Site field, e.g. store.spot
+        :param lookahead: Number of hours to look ahead
+        :param offset: Added to the values, e.g. the fixed markup of the spot price
+        :param factor: Multiplied on the values after the offset, e.g. the variable multiplier
+        :param hours: Result of hours(), can be passed to share it between several windows
+        :return: Hourly lookahead window of the field, see LookaheadWindow
+        """
+        return LookaheadWindow(values, lookahead, offset, factor, self.hours() if hours is None else hours)
+
+
+class LookaheadWindow:
+    """
+    Hourly lookahead window of a site field. The window of a time step contains its own value and the first value of
+    each of the following lookahead hours, same as resample("H").first() on the data starting at the time step.
+    Hours without data (e.g. at the end of the dataset) are NaN.
+
+    The first values of the hours are gathered once into an hourly series, about T / time_steps_per_hour values. The
+    windows are a sliding_window_view of this series, so the (T, lookahead + 1) windows are never materialized. The
+    values are adjusted with (value + offset) * factor, so envs that share a store can use different markups.
+    """
+
+    def __init__(self,
+                 values: np.ndarray,
+                 lookahead: int,
+                 offset: float,
+                 factor: float,
+                 hours: tuple[np.ndarray, np.ndarray]):
+        """
+        :param values: Site field of the store, shape (T,)
+        :param lookahead: Number of hours to look ahead
+        :param offset: Added to the values
+        :param factor: Multiplied on the values after the offset
+        :param hours: Hour position of each time step and first time step of each hour, see TimeSeriesStore.hours
+        """
+
+        self.values = values
+        self.offset = offset
+        self.factor = factor
+        self.hour_position, first_index = hours
+
+        # adjusted first value of each hour, NaN for hours without data and after the end of the dataset
+        hourly = np.full(self.hour_position[-1] + 1 + lookahead, np.nan)
+        hourly[self.hour_position[first_index]] = (values[first_index] + offset) * factor
+        hourly.flags.writeable = False
+
+        # row h: the hours h to h + lookahead - 1
+        self.hourly_windows: np.ndarray = np.lib.stride_tricks.sliding_window_view(hourly, lookahead)
+
+    def write(self, t: int | np.ndarray, out: np.ndarray) -> None:
+        """
+        :param t: Integer index of the time step, or array of K indices (one per env of a FleetVecEnv)
+        :param out: Buffer of length lookahead + 1, e.g. a slice of the observation, or (K, lookahead + 1)
+        :return: None
+        """
+        out[..., 0] = (self.values[t] + self.offset) * self.factor
+        out[..., 1:] = self.hourly_windows[self.hour_position[t] + 1]
+
+    def __getitem__(self, t: int) -> np.ndarray:
+        """
+        :param t: Integer index of the time step
+        :return: Window of the time step, length lookahead + 1
+        """
+        out = np.empty(self.hourly_windows.shape[1] + 1)
+        self.write(t, out)
+        return out
@@ -6,6 +6,7 @@ from fleetrl.fleet_env.config.score_config import ScoreConfig
 from fleetrl.fleet_env.config.time_config import TimeConfig
 from fleetrl.fleet_env.episode import Episode
 from fleetrl.utils.load_calculation.load_calculation import LoadCalculation
+from fleetrl.utils.data_processing.timeseries_store import TimeSeriesStore
 
 
 class EvCharger:
@@ -36,8 +37,21 @@ class EvCharger:
         self.handling_fees = ev_conf.feed_in_deduction  # %
 
 
+    @staticmethod
+    def sum_in_car_order(values: np.ndarray) -> float | np.ndarray:
+        """
+        Sums the per-car values from the first to the last car, like the accumulation in a loop over the cars.
+        np.sum uses pairwise summation, which rounds differently for larger fleets. cumsum adds sequentially.
+
+        :param values: Value of each car, 0 for cars that do not contribute. Or (K, num_cars), one row per env
+        :return: Sum of the values, or array of the K sums
+        """
+        if np.ndim(values) > 1:
+            return np.cumsum(values, axis=-1)[..., -1] if values.shape[-1] > 0 else np.zeros(values.shape[:-1])
+        return float(np.cumsum(values)[-1]) if len(values) > 0 else 0.0
+
     def charge(self,
-               db: pd.DataFrame,
+               store: TimeSeriesStore,
                num_cars: int,
                actions,
                episode: Episode,
@@ -49,11 +63,12 @@ class EvCharger:
                target_soc: list):
 
         """
-        The function loops through each car separately and computes SOC and charging cost depending on the action.
+        The function computes SOC and charging cost for the whole fleet at once, using masks for the different cases.
         Positive actions -> charging, negative actions -> discharging. Penalties are taken into account if the battery
         would be overcharged (agent sends a charging action to a full battery).
+        The calculation is done by charge_batch, with a batch of one env.
 
-        :param db: The schedule database of the EVs
+        :param store: Dense time series store with the schedule of the EVs and the site data
         :param num_cars: Number of cars in the model
         :param actions: Actions taken by the agent
         :param episode: Episode object with its parameters and functions
@@ -66,166 +81,192 @@ class EvCharger:
         :return: soc, next soc, the reward and the monetary value (cashflow)
         """
 
-        # reset next_soc, cost and revenue
-        episode.next_soc = []
-        episode.charging_cost = 0
-        episode.discharging_revenue = 0
-        episode.total_charging_energy = 0
-
-        # reset penalty counters
-        invalid_action_penalty = 0
-        overcharging_penalty = 0
-
-        # reset energy values and log
-        charge_log = np.ndarray(0)
-        charging_energy = 0.0
-        discharging_energy = 0.0
-
-        # reset reward values
-        charging_reward = 0.0
-        discharging_reward = 0.0
-
-        # go through the cars and calculate the actual deliverable power based on action and constraints
-        for car in range(num_cars):
-
-            # variable to check if car is plugged in or not
-            there = db.loc[(db["ID"] == car) & (db["date"] == episode.time), "There"].values[0]
-
-            # max possible power in kW depends on the onboard charger equipment and the charging station
-            possible_power = min([ev_conf.obc_max_power, load_calculation.evse_max_power])
-
-            # car is charging
-            if actions[car] >= 0:
-                # the charging energy depends on the maximum chargeable energy and the desired charging amount
-                ev_total_energy_demand = (target_soc[car] - episode.soc[car]) * episode.battery_cap[car]  # total energy demand in kWh
-                demanded_charge = possible_power * actions[car] * time_conf.dt  # demanded energy in kWh by the agent
-
-                # if the agent wants to charge more than the battery can hold, give a small penalty
-                if demanded_charge * ev_conf.charging_eff > ev_total_energy_demand:
-                    current_oc_pen = score_conf.penalty_overcharging * (demanded_charge - ev_total_energy_demand) ** 2
-                    current_oc_pen = max(current_oc_pen, score_conf.clip_overcharging)
-                    overcharging_penalty += current_oc_pen
-                    episode.events += 1  # relevant event detected - car fully charged and/or penalty triggered
-                    if print_updates:
-                        print(f"Overcharged, penalty of: {current_oc_pen}")
-
-                # if the car is there, allocate charging energy to the battery in kWh
-                if there == 1:
-                    charging_energy = min(ev_total_energy_demand / ev_conf.charging_eff, demanded_charge)
-
-                # the car is not there, no charging
-                else:
-                    charging_energy = 0
-                    # if agent gives an action even if no car is there, give a small penalty
-                    if np.abs(actions[car]) > 0.05:
-                        current_inv_pen = score_conf.penalty_invalid_action * (actions[car] ** 2)
-                        invalid_action_penalty += current_inv_pen
-                        episode.events += 1  # relevant event detected
-                        if print_updates:
-                            print(f"Invalid action, penalty given: {round(current_inv_pen, 3)}.")
-
-                # next soc is calculated based on charging energy
-                episode.next_soc.append(episode.soc[car] + charging_energy * ev_conf.charging_eff / episode.battery_cap[car])
-
-                # get pv energy and subtract from charging energy needed from the grid
-                # assuming pv is equally distributed to the connected cars
-                # try except because pv is sometimes deactivated
-                try:
-                    current_pv_energy = (db.loc[db["date"] == episode.time, "pv"].values[0]) * time_conf.dt  # in kWh
-                except KeyError:
-                    current_pv_energy = 0.0  # kWh
-
-                connected_cars = db.loc[(db["date"] == episode.time), "There"].sum()
-                # for the case that no car is connected, to avoid division by 0
-                connected_cars = max(connected_cars, 1)
-                # energy drawn from grid at each charging station after deducting pv self-consumption
-                grid_energy_demand = max(0, charging_energy - (current_pv_energy / connected_cars))  # kWh
-
-                # get current spot price, div by 1000 to go from €/MWh to €/kWh
-                current_spot = (db.loc[db["date"] == episode.time, "DELU"].values[0]) / 1000.0
-
-                # calculate charging cost for this EV and add it to the total charging cost of the step
-                # offset and multiplier transfer spot to commercial tariff, if specified "tariff" use-case
-                episode.charging_cost += (grid_energy_demand * (current_spot + self.spot_offset) * self.spot_multiplier)
-
-                # save the total charging energy in a variable
-                episode.total_charging_energy += charging_energy
-
-                charging_reward += (-1 * score_conf.price_multiplier
-                                   * db.loc[db["date"]==episode.time, "price_reward_curve"].values[0] / 1000
-                                   * grid_energy_demand)
-
-            # car is discharging - v2g is currently modelled as energy arbitrage on the day ahead spot market
-            elif actions[car] < 0:
-                # check how much energy is left in the battery and how much discharge is desired
-                ev_total_energy_left = -1 * episode.soc[car] * episode.battery_cap[car]  # amount of energy left in the battery in kWh
-                demanded_discharge = possible_power * actions[car] * time_conf.dt  # demanded discharge in kWh by agent
-
-                # energy discharge command bigger than what is left in the battery
-                if (demanded_discharge * ev_conf.discharging_eff < ev_total_energy_left) and (there != 0):
-                    current_oc_pen = score_conf.penalty_overcharging * (ev_total_energy_left - demanded_discharge) ** 2
-                    overcharging_penalty += current_oc_pen
-                    episode.events += 1  # relevant event detected
-                    if print_updates:
-                        print(f"Overcharged, penalty of: {round(current_oc_pen,3)}")
-
-                # if the car is there get the actual discharging energy
-                if there == 1:
-                    discharging_energy = max(ev_total_energy_left, demanded_discharge)  # max because values are negative, kWh
-
-                # car is not there, discharging energy is 0
-                else:
-                    discharging_energy = 0.0
-                    # if discharge command is sent even if no car is there
-                    if np.abs(actions[car]) > 0.05:
-                        current_inv_pen = score_conf.penalty_invalid_action * (actions[car] ** 2)
-                        invalid_action_penalty += current_inv_pen
-                        episode.events += 1  # relevant event detected
-                        if print_updates:
-                            print(f"Invalid action, penalty given: {round(current_inv_pen, 3)}.")
-
-                # calculate next soc
-                # efficiency not taken into account here -> but you get out less (see below)
-                episode.next_soc.append(episode.soc[car] + discharging_energy / episode.battery_cap[car])
-
-                # If "tariff" scenario, discharged energy remunerated at PV feed-in minus a mark-up (handling fees)
-                # Discharging efficiency taken into account here
-
-                current_tariff = db.loc[db["date"] == episode.time, "tariff"].values[0]
-
-                episode.discharging_revenue += (-1 * discharging_energy
-                                                * ev_conf.discharging_eff
-                                                * current_tariff / 1000
-                                                * (1-self.handling_fees))  # €
-
-                # save the total charging energy in a self variable
-                episode.total_charging_energy += discharging_energy
-
-                discharging_reward += (-1 * score_conf.price_multiplier
-                                      * db.loc[db["date"]==episode.time, "tariff_reward_curve"].values[0] / 1000
-                                      * discharging_energy)
-
-            else:
-                raise TypeError("The parsed action value was not recognised")
-
-            # append total charging energy of the car to the charge log, used in post-processing
-            charge_log = np.append(charge_log, charging_energy + discharging_energy)
-
-            # Print if SOC is actually negative or bigger than 1
-            if (np.round(episode.soc[car], 5) < 0) or (np.round(episode.soc[car], 5) > 1):
-                print(f"SOC negative: {episode.soc[car]}"
-                      f"Date: {episode.time}"
-                      f"Action: {actions}"
-                      f"Capacity: {episode.battery_cap[car]}")
-
-            # Round off numeric inaccuracies (values in the range -1.0e-16 can happen otherwise and cause errors)
-            np.clip(episode.soc, 0, 1)
+        (next_soc, reward, cashflow, charge_log, events,
+         charging_cost, discharging_revenue, total_charging_energy) = self.charge_batch(
+            store,
+            np.array([episode.t]),
+            np.array([time_conf.dt]),
+            np.asarray(actions)[None, :num_cars],
+            np.asarray(episode.soc, dtype=float)[None],
+            np.asarray(episode.battery_cap, dtype=float)[None],
+            np.asarray(target_soc, dtype=float),
+            load_calculation, ev_conf, score_conf, print_updates)
+
+        # relevant events detected - car fully charged and/or penalty triggered
+        episode.events += int(events[0])
+        episode.charging_cost = float(charging_cost[0])
+        episode.discharging_revenue = float(discharging_revenue[0])
+        # save the total charging energy of the fleet
+        episode.total_charging_energy = float(total_charging_energy[0])
+        episode.next_soc = list(next_soc[0])
+
+        # return soc, next soc and the value of reward (remove the index)
+        return episode.soc, episode.next_soc, float(reward[0]), float(cashflow[0]), charge_log[0], episode.events
+
+    def charge_batch(self,
+                     store: TimeSeriesStore,
+                     t: np.ndarray,
+                     dt: np.ndarray,
+                     actions: np.ndarray,
+                     soc: np.ndarray,
+                     battery_cap: np.ndarray,
+                     target_soc: np.ndarray,
+                     load_calculation: LoadCalculation,
+                     ev_conf: EvConfig,
+                     score_conf: ScoreConfig,
+                     print_updates: bool) -> tuple:
+
+        """
+        Charging of the fleets of K envs in one vectorized calculation, one row per env (see FleetVecEnv). The envs
+        share the store, each one is at its own time index. charge is the same calculation for a single env.
+
+        :param store: Dense time series store with the schedule of the EVs and the site data
+        :param t: Integer index of the current time step of each env in the store, (K,)
+        :param dt: Length of the current time step of each env in hours, (K,)
+        :param actions: Actions taken by the agent, (K, num_cars), in the dtype of the agent (e.g. float32)
+        :param soc: State of charge of each car, (K, num_cars)
+        :param battery_cap: Battery capacity of each car in kWh, (K, num_cars)
+        :param target_soc: Target soc of each car, (num_cars,) or (K, num_cars)
+        :param load_calculation: Load calc object with its parameters and functions
+        :param ev_conf: Config of the EVs
+        :param score_conf: Score and penalty configuration
+        :param print_updates: Bool whether to print statements or not (maybe lower fps)
+        :return: next soc (K, num_cars), reward (K,), cashflow (K,), charge log (K, num_cars), number of relevant
+            events (K,), charging cost (K,), discharging revenue (K,) and total charging energy (K,)
+        """
+
+        # per-car state as arrays
+        agent_actions = actions  # dtype of the agent, e.g. float32
+        actions = agent_actions.astype(float)
+        num_envs, num_cars = actions.shape
+        dt = dt[:, None]
+
+        # variable to check if car is plugged in or not
+        there = store.there[t]
+        plugged_in = there == 1
+
+        # car is charging for positive actions (and 0), discharging for negative actions
+        charging = actions >= 0
+        discharging = ~charging
+
+        # max possible power in kW depends on the onboard charger equipment and the charging station
+        possible_power = min([ev_conf.obc_max_power, load_calculation.evse_max_power])
+        demanded_energy = possible_power * actions * dt  # demanded energy in kWh by the agent
+
+        # charging: the charging energy depends on the maximum chargeable energy and the desired charging amount
+        ev_total_energy_demand = (target_soc - soc) * battery_cap  # total energy demand in kWh
+
+        # if the agent wants to charge more than the battery can hold, give a small penalty
+        overcharged = charging & (demanded_energy * ev_conf.charging_eff > ev_total_energy_demand)
+
+        # if the car is there, allocate charging energy to the battery in kWh, otherwise no charging
+        charging_energy = np.where(charging & plugged_in,
+                                   np.minimum(ev_total_energy_demand / ev_conf.charging_eff, demanded_energy), 0.0)
+
+        # discharging: check how much energy is left in the battery and how much discharge is desired
+        ev_total_energy_left = -1 * soc * battery_cap  # amount of energy left in the battery in kWh
+
+        # energy discharge command bigger than what is left in the battery
+        overdischarged = (discharging & (demanded_energy * ev_conf.discharging_eff < ev_total_energy_left)
+                          & (there != 0))
+
+        # if the car is there get the actual discharging energy, max because values are negative, kWh
+        discharging_energy = np.where(discharging & plugged_in,
+                                      np.maximum(ev_total_energy_left, demanded_energy), 0.0)
+
+        # if agent gives an action even if no car is there, give a small penalty
+        invalid = ~plugged_in & (np.abs(actions) > 0.05)
+
+        # penalties are only computed for the flagged cars, with scalar squares: the array square can differ from the
+        # scalar square (pow) in the last digit. The actions are squared in the dtype of the agent, e.g. float32
+        oc_pen = np.zeros((num_envs, num_cars))
+        for env, car in zip(*np.nonzero(overcharged)):
+            oc_pen[env, car] = max(score_conf.penalty_overcharging
+                                   * (demanded_energy[env, car] - ev_total_energy_demand[env, car]) ** 2,
+                                   score_conf.clip_overcharging)
+        for env, car in zip(*np.nonzero(overdischarged)):
+            oc_pen[env, car] = (score_conf.penalty_overcharging
+                                * (ev_total_energy_left[env, car] - demanded_energy[env, car]) ** 2)
+        inv_pen = np.zeros((num_envs, num_cars))
+        for env, car in zip(*np.nonzero(invalid)):
+            inv_pen[env, car] = score_conf.penalty_invalid_action * (agent_actions[env, car] ** 2)
+
+        # a car is either charging or discharging, the penalties are summed in car order like in the per-car loop
+        overcharging_penalty = self.sum_in_car_order(oc_pen)
+        invalid_action_penalty = self.sum_in_car_order(inv_pen)
+
+        # relevant events detected - car fully charged and/or penalty triggered
+        events = overcharged.sum(axis=1) + overdischarged.sum(axis=1) + invalid.sum(axis=1)
+
+        if print_updates:
+            for env, car in zip(*np.nonzero(overcharged)):
+                print(f"Overcharged, penalty of: {oc_pen[env, car]}")
+            for env, car in zip(*np.nonzero(overdischarged)):
+                print(f"Overcharged, penalty of: {round(oc_pen[env, car], 3)}")
+            for env, car in zip(*np.nonzero(invalid)):
+                print(f"Invalid action, penalty given: {round(inv_pen[env, car], 3)}.")
+
+        # next soc is calculated based on charging energy
+        # efficiency not taken into account for discharging -> but you get out less (see below)
+        next_soc = np.where(charging,
+                            soc + charging_energy * ev_conf.charging_eff / battery_cap,
+                            soc + discharging_energy / battery_cap)
+
+        # get pv energy and subtract from charging energy needed from the grid
+        # assuming pv is equally distributed to the connected cars
+        # pv is sometimes deactivated
+        if store.pv is not None:
+            current_pv_energy = store.pv[t][:, None] * dt  # in kWh
+        else:
+            current_pv_energy = 0.0  # kWh
+
+        # for the case that no car is connected, to avoid division by 0
+        connected_cars = np.maximum(there.sum(axis=1), 1)[:, None]
+        # energy drawn from grid at each charging station after deducting pv self-consumption
+        grid_energy_demand = np.where(charging, np.maximum(0, charging_energy - (current_pv_energy / connected_cars)),
+                                      0.0)  # kWh
+
+        # get current spot price, div by 1000 to go from €/MWh to €/kWh
+        current_spot = store.spot[t][:, None] / 1000.0
+
+        # calculate charging cost of the fleet
+        # offset and multiplier transfer spot to commercial tariff, if specified "tariff" use-case
+        charging_cost = self.sum_in_car_order(grid_energy_demand * (current_spot + self.spot_offset)
+                                              * self.spot_multiplier)
+
+        charging_reward = self.sum_in_car_order(-1 * score_conf.price_multiplier
+                                                * store.price_reward_curve[t][:, None] / 1000
+                                                * grid_energy_demand)
+
+        # If "tariff" scenario, discharged energy remunerated at PV feed-in minus a mark-up (handling fees)
+        # Discharging efficiency taken into account here
+        current_tariff = store.tariff[t][:, None]
+
+        discharging_revenue = self.sum_in_car_order(-1 * discharging_energy
+                                                    * ev_conf.discharging_eff
+                                                    * current_tariff / 1000
+                                                    * (1-self.handling_fees))  # €
+
+        discharging_reward = self.sum_in_car_order(-1 * score_conf.price_multiplier
+                                                   * store.tariff_reward_curve[t][:, None] / 1000
+                                                   * discharging_energy)
+
+        # total charging energy of each car for the charge log, used in post-processing
+        charge_log = charging_energy + discharging_energy
+        total_charging_energy = self.sum_in_car_order(charge_log)
+
+        # Print if SOC is actually negative or bigger than 1
+        for env, car in zip(*np.nonzero((np.round(soc, 5) < 0) | (np.round(soc, 5) > 1))):
+            print(f"SOC negative: {soc[env, car]}"
+                  f"Date: {store.timestamp(t[env])}"
+                  f"Action: {actions[env]}"
+                  f"Capacity: {battery_cap[env, car]}")
 
         # calculate net cashflow based on cost and revenue
-        cashflow = -1 * episode.charging_cost + episode.discharging_revenue
+        cashflow = -1 * charging_cost + discharging_revenue
 
         # reward is a function of cashflow and penalties
         reward = charging_reward + discharging_reward + invalid_action_penalty + overcharging_penalty
 
-        # return soc, next soc and the value of reward (remove the index)
-        return episode.soc, episode.next_soc, float(reward), float(cashflow), charge_log, episode.events
+        return (next_soc, reward, cashflow, charge_log, events,
+                charging_cost, discharging_revenue, total_charging_energy)
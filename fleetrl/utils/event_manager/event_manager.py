@@ -19,7 +19,7 @@ class EventManager:
         :return: bool to confirm that a relevant event took place
         """
 
-        if (episode.time.minute == 15) and (episode.time.second == 0):
+        if (episode.store.minute[episode.t] == 15) and (episode.store.second[episode.t] == 0):
             episode.events += 1
 
         # observation
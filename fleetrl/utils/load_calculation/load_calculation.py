@@ -1,3 +1,5 @@
+import numpy as np
+
 from enum import Enum
 
 class CompanyType(Enum):
@@ -82,13 +84,18 @@ class LoadCalculation:
 
     def check_violation(self, actions: list[float], there: list[int], building_load: float, pv: float) -> (bool, float):
         """
+        Also checks K sites at once (FleetVecEnv): actions and there of shape (K, num_cars), building load and pv of
+        shape (K,). Flags and amounts are then arrays of shape (K,).
 
         :param actions: Actions list, action for each EV [-1,1]
         :param there: Flag is EV is plugged in or not [0;1]
         :param building_load: Current building load in kW
         :param pv: Current PV in kW
-        :return:
+        :return: Overloaded flag, overloading in kW
         """
+        # total action of the cars, summed in car order (cumsum) like the built-in sum
+        total_action = np.cumsum(actions, axis=-1)[..., -1]
         # check if overloaded and by how much, PV is subtracted
-        overload_amount = abs(min(self.grid_connection - building_load - sum(actions) * self.evse_max_power + pv, 0.0))
+        overload_amount = np.abs(np.minimum(self.grid_connection - building_load - total_action * self.evse_max_power
+                                            + pv, 0.0))
         return overload_amount > 0, overload_amount
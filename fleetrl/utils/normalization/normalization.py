@@ -1,5 +1,7 @@
 import numpy as np
 
+from fleetrl.utils.observation.observation_spec import ObservationSpec
+
 
 class Normalization:
     """
@@ -22,3 +24,23 @@ class Normalization:
         :return: A tuple, containing the low obs and high obs array that will be parsed to gym.Spaces.box
         """
         raise NotImplementedError("This is an abstract class")
+
+    def set_spec(self, spec: ObservationSpec) -> None:
+        """
+        Sets the layout of the flat observation vector. Called once by the env, so that constants per part of the
+        observation can be precomputed for normalize_flat.
+
+        :param spec: Observation spec of the observer
+        :return: None
+        """
+        self.spec = spec
+
+    def normalize_flat(self, obs: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """
+        Normalizes a flat observation vector, as written by Observer.observe, into a preallocated buffer.
+
+        :param obs: Un-normalized observation vector, or (K, dim) stacked observations of K envs
+        :param out: float32 buffer of the same shape, the normalized observation is written into it
+        :return: The buffer
+        """
+        raise NotImplementedError("This is an abstract class")
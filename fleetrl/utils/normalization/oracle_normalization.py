@@ -4,6 +4,8 @@ import pandas as pd
 from fleetrl.utils.normalization.unit_normalization import Normalization
 from fleetrl.utils.load_calculation.load_calculation import LoadCalculation
 from fleetrl.fleet_env.config.ev_config import EvConfig
+from fleetrl.utils.data_processing.timeseries_store import TimeSeriesStore
+from fleetrl.utils.observation.observation_spec import ObservationSpec
 
 # This normalizes based on the global maximum values. These could be in the future, hence the oracle prefix.
 # For more realistic approaches, a rolling average could be used, or the sb3 vec normalize function
@@ -13,7 +15,7 @@ class OracleNormalization(Normalization):
     a global min/max normalization. Alternatively, a rolling normalization could be implemented.
     """
     def __init__(self,
-                 db,
+                 store: TimeSeriesStore,
                  building_flag,
                  pv_flag,
                  price_flag,
@@ -22,7 +24,7 @@ class OracleNormalization(Normalization):
         """
         Initialize max and min values of the dataset, globally.
 
-        :param db: Database dataframe
+        :param store: Time series store of the env
         :param building_flag: Include building load flag
         :param pv_flag: Include PV flag
         :param price_flag: Include price flag
@@ -31,20 +33,20 @@ class OracleNormalization(Normalization):
         :param aux: Flag whether to include auxiliary observations or not (bool)
         """
 
-        self.max_time_left = max(db["time_left"])
-        self.max_price = (max(db["DELU"]) + ev_conf.fixed_markup) * ev_conf.variable_multiplier
-        self.min_price = (min(db["DELU"]) + ev_conf.fixed_markup) * ev_conf.variable_multiplier
-        self.max_tariff = (max(db["tariff"])) * (1 - ev_conf.feed_in_deduction)
-        self.min_tariff = (min(db["tariff"])) * (1 - ev_conf.feed_in_deduction)
+        self.max_time_left = np.nanmax(store.time_left)
+        self.max_price = (np.nanmax(store.spot) + ev_conf.fixed_markup) * ev_conf.variable_multiplier
+        self.min_price = (np.nanmin(store.spot) + ev_conf.fixed_markup) * ev_conf.variable_multiplier
+        self.max_tariff = np.nanmax(store.tariff) * (1 - ev_conf.feed_in_deduction)
+        self.min_tariff = np.nanmin(store.tariff) * (1 - ev_conf.feed_in_deduction)
         self.building_flag = building_flag
         self.pv_flag = pv_flag
         self.price_flag = price_flag
         self.aux = aux
 
         if self.building_flag:
-            self.max_building = max(db["load"])
+            self.max_building = np.nanmax(store.load)
         if self.pv_flag:
-            self.max_pv = max(db["pv"])
+            self.max_pv = np.nanmax(store.pv)
         if self.aux:
             self.max_soc = ev_conf.target_soc
             self.max_hours_needed = ((ev_conf.target_soc * ev_conf.init_battery_cap)
@@ -53,113 +55,74 @@ class OracleNormalization(Normalization):
             self.max_evse = load_calc.evse_max_power
             self.max_grid = load_calc.grid_connection
 
-    def normalize_obs(self, input_obs: dict) -> np.ndarray:
+    def set_spec(self, spec: ObservationSpec) -> None:
         """
-        Normalization function. Different cases are checked depending on the flags of PV, load, price, and aux.
-        Input observations are a dictionary with clear namings, to make further changes in the code easy and readable.
+        Precomputes the offset and the denominator of each entry of the flat observation vector, the normalization
+        is then a fused subtract and divide into the float32 buffer, without intermediate dicts or lists.
 
-        :param input_obs: Input observation: Un-normalized observations as specified in the observer.
-        :return: Normalized observation.
+        :param spec: Observation spec of the observer
+        :return: None
         """
-        # normalization is done here, so if the rule is changed it is automatically adjusted in step and reset
-        input_obs["soc"] = (input_obs["soc"])  # soc is already normalized
-        input_obs["hours_left"] = list(np.divide(input_obs["hours_left"], self.max_time_left))  # max hours of entire db
+
+        self.spec = spec
+
+        # name of the observation part: (offset, denominator)
+        rules = {"soc": (0, 1),  # soc is already normalized
+                 "hours_left": (0, self.max_time_left)}  # max hours of entire db
         # normalize spot price between 0 and 1, there are negative values
         # formula: z_i = (x_i - min(x))/(max(x) - min(x))
         if self.price_flag:
-            input_obs["price"] = list(np.divide(np.subtract(input_obs["price"], self.min_price),
-                                                np.subtract(self.max_price, self.min_price)))
-            input_obs["tariff"] = list(np.divide(np.subtract(input_obs["tariff"], self.min_tariff),
-                                                 np.subtract(self.max_tariff, self.min_tariff)))
-
-        if not self.price_flag:
-            output_obs = np.array(self.flatten_obs(input_obs), dtype=np.float32)
-            if self.aux:
-                input_obs["there"] = list(np.divide(input_obs["there"], 1))  # there
-                input_obs["target_soc"] = list(np.divide(input_obs["target_soc"], self.max_soc))  # target soc
-                input_obs["charging_left"] = list(np.divide(input_obs["charging_left"], self.max_soc))  # charging left
-                input_obs["hours_needed"] = list(np.divide(input_obs["hours_needed"], self.max_hours_needed))  # hours needed
-                input_obs["laxity"] = list(np.divide(input_obs["laxity"], self.max_laxity))  # laxity
-                input_obs["evse_power"] = list(np.divide(input_obs["evse_power"], self.max_evse))  # evse power
-                output_obs = np.array(self.flatten_obs(input_obs), dtype=np.float32)
-
-        elif not self.building_flag and not self.pv_flag:
-            output_obs = np.concatenate(
-                (input_obs["soc"], input_obs["hours_left"], input_obs["price"],
-                 input_obs["tariff"]), dtype=np.float32)
-            if self.aux:
-                input_obs["there"] = list(np.divide(input_obs["there"], 1))  # there
-                input_obs["target_soc"] = list(np.divide(input_obs["target_soc"], self.max_soc))  # target soc
-                input_obs["charging_left"] = list(np.divide(input_obs["charging_left"], self.max_soc))  # charging left
-                input_obs["hours_needed"] = list(np.divide(input_obs["hours_needed"], self.max_hours_needed))  # hours needed
-                input_obs["laxity"] = list(np.divide(input_obs["laxity"], self.max_laxity))  # laxity
-                input_obs["evse_power"] = list(np.divide(input_obs["evse_power"], self.max_evse))  # evse power
-                # input obs of month, week and hour sin/cos don't need to be normalized
-                output_obs = np.array(self.flatten_obs(input_obs), dtype=np.float32)
-
-        elif self.building_flag and not self.pv_flag:
-            input_obs["building_load"] = list(np.divide(input_obs["building_load"], self.max_building))
-            output_obs = np.concatenate(
-                (input_obs["soc"], input_obs["hours_left"], input_obs["price"],
-                 input_obs["tariff"], input_obs["building_load"]
-                 ), dtype=np.float32)
-
-            if self.aux:
-                input_obs["there"] = list(np.divide(input_obs["there"], 1))  # there
-                input_obs["target_soc"] = list(np.divide(input_obs["target_soc"], self.max_soc))  # target soc
-                input_obs["charging_left"] = list(np.divide(input_obs["charging_left"], self.max_soc))  # charging left
-                input_obs["hours_needed"] = list(np.divide(input_obs["hours_needed"], self.max_hours_needed))  # hours needed
-                input_obs["laxity"] = list(np.divide(input_obs["laxity"], self.max_laxity))  # laxity
-                input_obs["evse_power"] = list(np.divide(input_obs["evse_power"], self.max_evse))  # evse power
-                input_obs["grid_cap"] = list(np.divide(input_obs["grid_cap"], self.max_grid))  # grid connection
-                input_obs["avail_grid_cap"] = list(np.divide(input_obs["avail_grid_cap"], self.max_grid))  # available grid
-                input_obs["possible_avg_action"] = list(np.divide(input_obs["possible_avg_action"], 1))  # possible avg action per car
-                # input obs of month, week and hour sin/cos don't need to be normalized
-                output_obs = np.array(self.flatten_obs(input_obs), dtype=np.float32)
-
-        elif not self.building_flag and self.pv_flag:
-            input_obs["building_load"] = list(np.divide(input_obs["building_load"], self.max_building))
-            output_obs = np.concatenate(
-                (input_obs["soc"], input_obs["hours_left"], input_obs["price"],
-                 input_obs["tariff"], input_obs["pv"]
-                 ), dtype=np.float32)
-
-            if self.aux:
-                input_obs["there"] = list(np.divide(input_obs["there"], 1))  # there
-                input_obs["target_soc"] = list(np.divide(input_obs["target_soc"], self.max_soc))  # target soc
-                input_obs["charging_left"] = list(np.divide(input_obs["charging_left"], self.max_soc))  # charging left
-                input_obs["hours_needed"] = list(np.divide(input_obs["hours_needed"], self.max_hours_needed))  # hours needed
-                input_obs["laxity"] = list(np.divide(input_obs["laxity"], self.max_laxity))  # laxity
-                input_obs["evse_power"] = list(np.divide(input_obs["evse_power"], self.max_evse))  # evse power
-                # input obs of month, week and hour sin/cos don't need to be normalized
-                output_obs = np.array(self.flatten_obs(input_obs), dtype=np.float32)
-
-        elif self.building_flag and self.pv_flag:
-            input_obs["building_load"] = list(np.divide(input_obs["building_load"], self.max_building))
-            input_obs["pv"] = list(np.divide(input_obs["pv"], self.max_pv))
-            output_obs = np.concatenate(
-                (input_obs["soc"], input_obs["hours_left"], input_obs["price"],
-                 input_obs["tariff"], input_obs["building_load"], input_obs["pv"]
-                 ), dtype=np.float32)
-
-            if self.aux:
-                input_obs["there"] = list(np.divide(input_obs["there"], 1))  # there
-                input_obs["target_soc"] = list(np.divide(input_obs["target_soc"], self.max_soc))  # target soc
-                input_obs["charging_left"] = list(np.divide(input_obs["charging_left"], self.max_soc))  # charging left
-                input_obs["hours_needed"] = list(np.divide(input_obs["hours_needed"], self.max_hours_needed))  # hours needed
-                input_obs["laxity"] = list(np.divide(input_obs["laxity"], self.max_laxity))  # laxity
-                input_obs["evse_power"] = list(np.divide(input_obs["evse_power"], self.max_evse))  # evse power
-                input_obs["grid_cap"] = list(np.divide(input_obs["grid_cap"], self.max_grid))  # grid connection
-                input_obs["avail_grid_cap"] = list(np.divide(input_obs["avail_grid_cap"], self.max_grid))  # available grid
-                input_obs["possible_avg_action"] = list(np.divide(input_obs["possible_avg_action"], 1))  # possible avg action per car
-                # input obs of month, week and hour sin/cos don't need to be normalized
-                output_obs = np.array(self.flatten_obs(input_obs), dtype=np.float32)
-
-        else:
-            output_obs = None
-            raise RuntimeError("Problem with included information. Check building and PV flags.")
-
-        return output_obs
+            rules["price"] = (self.min_price, np.subtract(self.max_price, self.min_price))
+            rules["tariff"] = (self.min_tariff, np.subtract(self.max_tariff, self.min_tariff))
+        if self.building_flag:
+            rules["building_load"] = (0, self.max_building)
+        if self.pv_flag:
+            rules["pv"] = (0, self.max_pv)
+        if self.aux:
+            rules["there"] = (0, 1)
+            rules["target_soc"] = (0, self.max_soc)
+            rules["charging_left"] = (0, self.max_soc)
+            rules["hours_needed"] = (0, self.max_hours_needed)
+            rules["laxity"] = (0, self.max_laxity)
+            rules["evse_power"] = (0, self.max_evse)
+            rules["grid_cap"] = (0, self.max_grid)  # grid connection
+            rules["avail_grid_cap"] = (0, self.max_grid)  # available grid
+            rules["possible_avg_action"] = (0, 1)  # possible avg action per car
+            # month, week and hour sin/cos don't need to be normalized
+
+        self.offset = np.zeros(spec.dim)
+        self.denominator = np.ones(spec.dim)
+        for name, (offset, denominator) in rules.items():
+            if name in spec.slices:
+                self.offset[spec.slices[name]] = offset
+                self.denominator[spec.slices[name]] = denominator
+        # scratch buffer, so that no temporary arrays are allocated at each step
+        self.shifted = np.zeros(spec.dim)
+
+    def normalize_flat(self, obs: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """
+        Min/max normalization of the flat observation vector: (obs - offset) / denominator, computed in float64 and
+        written into the float32 buffer.
+
+        :param obs: Un-normalized observation vector, as written by the observer, or (K, dim) for K envs
+        :param out: float32 buffer of the same shape
+        :return: The buffer with the normalized observation
+        """
+        if self.shifted.shape != obs.shape:
+            # stacked observations of a FleetVecEnv, the scratch buffer is reallocated if the shape changes
+            self.shifted = np.zeros(obs.shape)
+        np.subtract(obs, self.offset, out=self.shifted)
+        return np.divide(self.shifted, self.denominator, out=out)
+
+    def normalize_obs(self, input_obs: dict) -> np.ndarray:
+        """
+        Normalization of the dict form of an observation, requires set_spec to be called before.
+
+        :param input_obs: Input observation: Un-normalized observations as specified in the observer.
+        :return: Normalized observation.
+        """
+        obs = self.spec.from_dict(input_obs)
+        return self.normalize_flat(obs, np.zeros(self.spec.dim, dtype=np.float32))
 
     def make_boundaries(self, dim: tuple[int]) -> tuple[float, float] | tuple[np.ndarray, np.ndarray]:
         """
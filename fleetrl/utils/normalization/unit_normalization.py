@@ -20,6 +20,17 @@ class UnitNormalization(Normalization):
         """
         return np.array(self.flatten_obs(obs), dtype=np.float32)
 
+    def normalize_flat(self, obs: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """
+        No normalization, the observation is only cast to float32.
+
+        :param obs: Un-normalized observation vector
+        :param out: float32 buffer of the same length
+        :return: The buffer
+        """
+        np.copyto(out, obs, casting="same_kind")
+        return out
+
     def make_boundaries(self, dim: tuple[int]) -> tuple[float, float] | tuple[np.ndarray, np.ndarray]:
         """
         The bounds can be -inf and inf. This is the least restricting path and allows for cross-compatibility of agents
@@ -0,0 +1,97 @@
+import numpy as np
+
+
+class ObservationSpec:
+    """
+    Layout of the flat observation vector. Each part of the observation (soc, hours_left, price, ...) has a name and
+    a fixed slice in the vector, in the order in which the observer writes it.
+
+    - Built by the observer at env construction (see Observer.make_spec), available as FleetEnv.obs_spec
+    - Bounds of the observation space are set by the env, depending on the normalization
+    - Consumers (evaluation, benchmarks) look up parts by name instead of hard-coding offsets, e.g. on a matrix of
+      stacked observations: spec.view(spec.stack(log["Observation"]), "soc") is a zero-copy (T, num_cars) view
+    """
+
+    def __init__(self, parts: list[tuple[str, int]], scalars: tuple[str, ...] = ()):
+        """
+        :param parts: List of (name, size) of each part, in the order of the observation vector
+        :param scalars: Names of parts with size 1 that are single floats in the dict form (e.g. month_sin)
+        """
+
+        self.names: list[str] = [name for name, _ in parts]
+        self.slices: dict[str, slice] = {}
+
+        start = 0
+        for name, size in parts:
+            self.slices[name] = slice(start, start + size)
+            start += size
+
+        self.dim: int = start  # length of the observation vector
+        self.scalars: set[str] = {name for name in scalars if name in self.slices}
+
+        # bounds of the observation space, set by the env (see set_bounds)
+        self.low: np.ndarray = None
+        self.high: np.ndarray = None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.slices
+
+    def set_bounds(self, low: np.ndarray, high: np.ndarray) -> None:
+        """
+        :param low: Lower bounds of the observation space, length dim
+        :param high: Upper bounds of the observation space, length dim
+        :return: None
+        """
+        self.low = low
+        self.high = high
+
+    def bounds(self, name: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        :param name: Name of the part, e.g. "price"
+        :return: Lower and upper bounds of the part
+        """
+        return self.low[self.slices[name]], self.high[self.slices[name]]
+
+    def index(self, name: str) -> int:
+        """
+        :param name: Name of the part, e.g. "evse_power"
+        :return: Index of the first entry of the part in the observation vector
+        """
+        return self.slices[name].start
+
+    def view(self, obs: np.ndarray, name: str) -> np.ndarray:
+        """
+        :param obs: Observation vector, or matrix of stacked observations with shape (T, dim)
+        :param name: Name of the part, e.g. "soc"
+        :return: View (no copy) of the part, shape (size,) or (T, size)
+        """
+        return obs[..., self.slices[name]]
+
+    def stack(self, observations) -> np.ndarray:
+        """
+        :param observations: Sequence of observation vectors, e.g. the Observation column of the log
+        :return: Matrix of shape (T, dim)
+        """
+        if len(observations) == 0:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack(list(observations))
+
+    def to_dict(self, obs: np.ndarray) -> dict:
+        """
+        :param obs: Flat observation vector
+        :return: Dict of lists (or floats for scalar parts) with the different parts of the observation
+        """
+        return {name: obs[self.slices[name].start] if name in self.scalars else list(obs[self.slices[name]])
+                for name in self.names}
+
+    def from_dict(self, obs: dict, out: np.ndarray = None) -> np.ndarray:
+        """
+        :param obs: Dict with the different parts of the observation
+        :param out: Optional buffer to write the observation to
+        :return: Flat observation vector
+        """
+        if out is None:
+            out = np.zeros(self.dim)
+        for name in self.names:
+            out[self.slices[name]] = obs[name]
+        return out
@@ -1,43 +1,207 @@
 import numpy as np
 import pandas as pd
+from fleetrl.utils.data_processing.timeseries_store import TimeSeriesStore, LookaheadWindow
+from fleetrl.utils.observation.observation_spec import ObservationSpec
 from fleetrl.utils.load_calculation.load_calculation import LoadCalculation
 from fleetrl.fleet_env.config.ev_config import EvConfig
 
+# calendar features, single floats in the dict form of the observation
+CALENDAR = ("month_sin", "month_cos", "week_sin", "week_cos", "hour_sin", "hour_cos")
+
 class Observer:
     """
     Parent class for observer modules.
+
+    The observer writes the observation into a preallocated flat buffer. The layout of the buffer is described by the
+    observation spec (see make_spec). The dict form of the observation is only built on request, see get_obs.
+    The parts are written with out[..., slice], so the same code writes the observations of K envs into a
+    (K, spec.dim) buffer, given an array of K time indices.
     """
+
+    spec: ObservationSpec = None  # layout of the observation, set by make_spec
+    windows: dict[str, LookaheadWindow] = None  # hourly lookahead windows of the site fields, set by build_windows
+    obs_buffer: np.ndarray = None  # buffer of get_obs, allocated on the first call
+
+    def make_spec(self, num_cars: int, price_lookahead: int, bl_pv_lookahead: int, aux: bool) -> ObservationSpec:
+        """
+        :param num_cars: number of cars in the model
+        :param price_lookahead: lookahead window for spot price
+        :param bl_pv_lookahead: lookahead window for building load and pv
+        :param aux: Include auxiliary information that might help the agent to learn the problem
+        :return: Layout of the observation vector, also stored in self.spec. Built once, at env construction
+        """
+
+        raise NotImplementedError("This is an abstract class")
+
+    def set_spec(self, spec: ObservationSpec) -> ObservationSpec:
+        """
+        Stores the spec built by make_spec. The env, the normalizer and the evaluation read the spec by reference
+        (FleetEnv.obs_spec, including the bounds of the observation space), so it must not be replaced later.
+
+        :param spec: Layout of the observation vector
+        :return: The spec
+        """
+
+        if self.spec is not None:
+            raise RuntimeError("The observation spec is built once at env construction and cannot be rebuilt.")
+        self.spec = spec
+        return spec
+
+    def build_windows(self, store: TimeSeriesStore, ev_conf: EvConfig, price_lookahead: int, bl_pv_lookahead: int):
+        """
+        Builds the hourly lookahead windows of the site fields in the store. The windows are kept by the observer, not
+        by the store, so envs that share a store can use different markups. Price and tariff are adjusted for markups
+        and fees.
+
+        :param store: dense time series store from the env
+        :param ev_conf: EV config with markups, multiplier and feed-in deduction
+        :param price_lookahead: Lookahead in hours for price and tariff
+        :param bl_pv_lookahead: Lookahead in hours for building load and pv
+        :return: None
+        """
+
+        hours = store.hours()
+        self.windows = {}
+        if store.spot is not None:
+            self.windows["price"] = store.lookahead_window(store.spot, price_lookahead, ev_conf.fixed_markup,
+                                                           ev_conf.variable_multiplier, hours)
+        if store.tariff is not None:
+            self.windows["tariff"] = store.lookahead_window(store.tariff, price_lookahead,
+                                                            factor=1 - ev_conf.feed_in_deduction, hours=hours)
+        if store.load is not None:
+            self.windows["load"] = store.lookahead_window(store.load, bl_pv_lookahead, hours=hours)
+        if store.pv is not None:
+            self.windows["pv"] = store.lookahead_window(store.pv, bl_pv_lookahead, hours=hours)
+
+    def observe(self,
+                store: TimeSeriesStore,
+                t: int,
+                ev_conf: EvConfig,
+                load_calc: LoadCalculation,
+                aux: bool,
+                target_soc: list,
+                out: np.ndarray) -> np.ndarray:
+
+        """
+        :param store: dense time series store from the env
+        :param t: integer index of the current time step in the store, or array of K indices, one per env of a
+            FleetVecEnv. The K observations are then written in one go
+        :param ev_conf: EV config needed for batt capacity and other params
+        :param load_calc: Load calc module needed for grid connection and other params
+        :param aux: Include auxiliary information that might help the agent to learn the problem
+        :param target_soc: A list of target soc values, one for each car, or (K, num_cars)
+        :param out: float64 buffer of length spec.dim, or (K, spec.dim) for an array of time indices, the
+            un-normalized observation is written into it
+        :return: The buffer
+        """
+
+        raise NotImplementedError("This is an abstract class")
+
     def get_obs(self,
-                db: pd.DataFrame,
+                store: TimeSeriesStore,
                 price_lookahead: int,
                 bl_pv_lookahead:int,
-                time: pd.Timestamp,
+                t: int,
                 ev_conf: EvConfig,
                 load_calc: LoadCalculation,
                 aux: bool,
                 target_soc: list) -> dict:
 
         """
-        :param db: database from the env
-        :param price_lookahead: lookahead window for spot price
-        :param bl_pv_lookahead: lookahead window for building load and pv
-        :param time: current time of time step
+        Dict form of the observation, e.g. for get_dist_factor. The env itself works on the flat buffer. The
+        observation is written into a buffer of the observer that is allocated once, with the layout of self.spec.
+
+        :param store: dense time series store from the env
+        :param price_lookahead: lookahead window for spot price, must match the spec built at env construction
+        :param bl_pv_lookahead: lookahead window for building load and pv, must match the spec
+        :param t: integer index of the current time step in the store
         :param ev_conf: EV config needed for batt capacity and other params
         :param load_calc: Load calc module needed for grid connection and other params
         :param aux: Include auxiliary information that might help the agent to learn the problem
         :param target_soc: A list of target soc values, one for each car
-        :return: Returns a list of np arrays that make up different parts of the observation.
+        :return: Returns a dict of lists that make up different parts of the observation.
         """
 
-        raise NotImplementedError("This is an abstract class")
+        if self.obs_buffer is None:
+            self.obs_buffer = np.zeros(self.spec.dim)
+        obs = self.observe(store, t, ev_conf, load_calc, aux, target_soc, out=self.obs_buffer)
+        return self.spec.to_dict(obs)
+
+    @staticmethod
+    def aux_parts(num_cars: int) -> list[tuple[str, int]]:
+        """
+        :param num_cars: number of cars in the model
+        :return: Layout of the auxiliary observations of the cars
+        """
+        return [("there", num_cars),  # boolean, is the car i there or not
+                ("target_soc", num_cars),  # target soc of car i
+                ("charging_left", num_cars),  # charging % left
+                ("hours_needed", num_cars),  # hours needed to get to target soc
+                ("laxity", num_cars),  # laxity factor
+                ("evse_power", 1)]  # evse power in kW
+
+    @staticmethod
+    def calendar_parts() -> list[tuple[str, int]]:
+        """
+        :return: Layout of month, weekday and hour in sin/cos
+        """
+        return [(name, 1) for name in CALENDAR]
+
+    def write_aux(self,
+                  store: TimeSeriesStore,
+                  t: int,
+                  ev_conf: EvConfig,
+                  load_calc: LoadCalculation,
+                  target_soc: list,
+                  out: np.ndarray) -> None:
+        """
+        Writes the auxiliary observations of the cars and the calendar features into the buffer.
+
+        :param store: dense time series store from the env
+        :param t: integer index of the current time step in the store, or array of K indices
+        :param ev_conf: EV config needed for batt capacity and other params
+        :param load_calc: Load calc module needed for grid connection and other params
+        :param target_soc: A list of target soc values, one for each car, or (K, num_cars)
+        :param out: Observation buffer, spec.dim or (K, spec.dim)
+        :return: None
+        """
+
+        sl = self.spec.slices
+        soc = store.soc_on_return[t]
+        hours_left = store.time_left[t]
+
+        # target soc
+        there = store.there[t]
+        target_soc = target_soc * there
+        charging_left = np.subtract(target_soc, soc)
+        hours_needed = charging_left * load_calc.batt_cap / (load_calc.evse_max_power * ev_conf.charging_eff)
+        laxity = np.subtract(hours_left / (np.add(hours_needed, 0.001)), 1) * there
+        laxity = np.clip(laxity, 0, 5)
+
+        out[..., sl["there"]] = there
+        out[..., sl["target_soc"]] = target_soc
+        out[..., sl["charging_left"]] = charging_left
+        out[..., sl["hours_needed"]] = hours_needed
+        out[..., sl["laxity"]] = laxity
+        # could also be a vector
+        out[..., self.spec.index("evse_power")] = load_calc.evse_max_power
+
+        out[..., self.spec.index("month_sin")] = np.sin(2 * np.pi * store.month[t] / 12)
+        out[..., self.spec.index("month_cos")] = np.cos(2 * np.pi * store.month[t] / 12)
+
+        out[..., self.spec.index("week_sin")] = np.sin(2 * np.pi * store.weekday[t] / 7)
+        out[..., self.spec.index("week_cos")] = np.cos(2 * np.pi * store.weekday[t] / 7)
+
+        out[..., self.spec.index("hour_sin")] = np.sin(2 * np.pi * store.hour[t] / 24)
+        out[..., self.spec.index("hour_cos")] = np.cos(2 * np.pi * store.hour[t] / 24)
 
     # Always the same, so can be defined in base class
     @staticmethod
-    def get_trip_len(db: pd.DataFrame, car: int, time: pd.Timestamp) -> float:
+    def get_trip_len(store: TimeSeriesStore, car: int, t: int) -> float:
         """
-        :param db: from the env
+        :param store: dense time series store from the env
         :param car: car ID
-        :param time: current timestamp
+        :param t: integer index of the current time step
         :return: length of trip in hours as a float
         """
         raise NotImplementedError("This is an abstract class")
@@ -1,7 +1,9 @@
 import numpy as np
 import pandas as pd
 
-from fleetrl.utils.observation.observer import Observer
+from fleetrl.utils.observation.observer import Observer, CALENDAR
+from fleetrl.utils.observation.observation_spec import ObservationSpec
+from fleetrl.utils.data_processing.timeseries_store import TimeSeriesStore
 from fleetrl.utils.load_calculation.load_calculation import LoadCalculation
 from fleetrl.fleet_env.config.ev_config import EvConfig
 
@@ -11,91 +13,69 @@ class ObserverSocTimeOnly(Observer):
     Observer that only regards SOC and time left, but not charging cost, PV or building laod
     """
 
-    def get_obs(self,
-                db: pd.DataFrame,
-                price_lookahead: int,
-                bl_pv_lookahead: int,
-                time: pd.Timestamp,
+    def make_spec(self, num_cars: int, price_lookahead: int, bl_pv_lookahead: int, aux: bool) -> ObservationSpec:
+        """
+        :param num_cars: Number of cars in the model
+        :param price_lookahead: Lookahead in hours for price
+        :param bl_pv_lookahead: Lookahead in hours for PV and building
+        :param aux: Flag to include extra information on the problem or not
+        :return: Layout of the observation vector
+        """
+
+        parts = [("soc", num_cars),  # state of charge
+                 ("hours_left", num_cars)]  # hours left at the charger
+        if aux:
+            parts += self.aux_parts(num_cars)
+            parts += self.calendar_parts()
+
+        return self.set_spec(ObservationSpec(parts, scalars=CALENDAR))
+
+    def observe(self,
+                store: TimeSeriesStore,
+                t: int,
                 ev_conf: EvConfig,
                 load_calc: LoadCalculation,
                 aux: bool,
-                target_soc: list) -> dict:
+                target_soc: list,
+                out: np.ndarray) -> np.ndarray:
 
         """
-        - define the starting and ending time via lookahead, np.where returns the index in the dataframe
-        - add lookahead + 2 here because of rounding issues with the resample function on square times (00:00)
-        - get data of price and date from the specific indices
-        - resample data to only include one value per hour (the others are duplicates)
-        - only take into account the current value, and the specified hours of lookahead
+        - soc, time left and plugged-in flags are the row of the store at the current time index t
+        - hourly lookahead windows are built by the observer (see build_windows), the observation is a row
+        - prices in the windows are already adjusted with markups and multipliers
+        - the values are written into the slices of the observation spec, no intermediate dict or lists
 
-        :param db: Database from env
-        :param price_lookahead: Lookahead in hours for price
-        :param bl_pv_lookahead: Lookahead in hours for PV and building
-        :param time: Current time
+        :param store: Dense time series store from env
+        :param t: Integer index of the current time step in the store, or array of K indices (FleetVecEnv)
         :param ev_conf: EV config data, used for battery capacity, etc.
         :param load_calc: Load calc module, used for grid connection, etc.
         :param aux: Flag to include extra information on the problem or not. Can help with training
-        :param target_soc: List for the current target SOC of each car
-        :return: Dict of lists with different parts of the observation
+        :param target_soc: List for the current target SOC of each car, or (K, num_cars)
+        :param out: Buffer of length spec.dim, or (K, spec.dim) for an array of time indices
+        :return: The buffer with the un-normalized observation
         """
 
+        sl = self.spec.slices
+
         # soc and time left always present in environment
-        soc = db.loc[(db['date'] == time), 'SOC_on_return'].values
-        hours_left = db.loc[(db['date'] == time), 'time_left'].values
-
-        ###
-        # Auxiliary observations that might make it easier for the agent
-        # target soc
-        there = db.loc[db["date"] == time, "There"].values
-        target_soc = target_soc * there
-        # maybe need to typecast to list
-        charging_left = np.subtract(target_soc, soc)
-        hours_needed = charging_left * load_calc.batt_cap / (load_calc.evse_max_power * ev_conf.charging_eff)
-        laxity = np.subtract(hours_left / (np.add(hours_needed, 0.001)), 1) * there
-        laxity = np.clip(laxity, 0, 5)
-        # could also be a vector
-        evse_power = load_calc.evse_max_power * np.ones(1)
-
-        month_sin = np.sin(2 * np.pi * time.month / 12)
-        month_cos = np.cos(2 * np.pi * time.month / 12)
-
-        week_sin = np.sin(2 * np.pi * time.weekday() / 7)
-        week_cos = np.cos(2 * np.pi * time.weekday() / 7)
-
-        hour_sin = np.sin(2 * np.pi * time.hour / 24)
-        hour_cos = np.cos(2 * np.pi * time.hour / 24)
-
-        obs = {
-            "soc": list(soc),  # state of charge
-            "hours_left": list(hours_left),  # hours left at the charger
-            "there": list(there),  # boolean, is the car i there or not
-            "target_soc": list(target_soc),  # target soc of car i
-            "charging_left": list(charging_left),  # charging % left
-            "hours_needed": list(hours_needed),  # hours needed to get to target soc
-            "laxity": list(laxity),  # laxity factor
-            "evse_power": list(evse_power),  # evse power in kW
-            "month_sin": month_sin,  # month in sin, and so on
-            "month_cos": month_cos,
-            "week_sin": week_sin,
-            "week_cos": week_cos,
-            "hour_sin": hour_sin,
-            "hour_cos": hour_cos
-        }
+        out[..., sl["soc"]] = store.soc_on_return[t]
+        out[..., sl["hours_left"]] = store.time_left[t]
 
         if aux:
-            return obs
-        else:
-            return {key: obs[key] for key in ["soc", "hours_left"]}
+            # Auxiliary observations that might make it easier for the agent
+            self.write_aux(store, t, ev_conf, load_calc, target_soc, out)
+
+        return out
 
     @staticmethod
-    def get_trip_len(db: pd.DataFrame, car: int, time: pd.Timestamp) -> float:
+    def get_trip_len(store: TimeSeriesStore, car: int, t: int) -> float:
         """
-        :param db: from the env
+        :param store: Dense time series store from the env
         :param car: car ID
-        :param time: current timestamp
+        :param t: integer index of the current time step
         :return: length of trip in hours as a float
         """
 
-        trip_len = db.loc[(db["ID"] == car) & (db["date"] == time), "last_trip_total_length_hours"].values
+        trip_len = store.last_trip_length[t, car]
 
         return trip_len
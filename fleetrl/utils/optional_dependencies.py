@@ -0,0 +1,14 @@
+def import_pyarrow(purpose: str):
+    """
+    pyarrow is optional (pip install fleetrl[parquet]), it is only needed for the parquet files of the streamed log
+    and of the generated schedules. It is imported on demand.
+
+    :param purpose: What pyarrow is needed for, used in the error message
+    :return: pyarrow and pyarrow.parquet modules
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as err:
+        raise ImportError(f"{purpose} requires pyarrow: pip install pyarrow") from err
+    return pa, pq
@@ -0,0 +1,123 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from fleetrl.utils.schedule.schedule_config import ScheduleType
+from fleetrl.utils.schedule.schedule_generator import ScheduleGenerator
+from fleetrl.utils.schedule.schedule_writer import ScheduleWriter
+
+
+def _generate_vehicle(args: tuple) -> pd.DataFrame:
+    """
+    Generates the schedule of one vehicle, module level so it can be sent to worker processes.
+
+    :param args: env_config, schedule type, vehicle ID, seed sequence of the vehicle
+    :return: pd.DataFrame of the schedule
+    """
+    env_config, schedule_type, vehicle_id, seed_sequence = args
+    schedule_gen = ScheduleGenerator(env_config=env_config,
+                                     schedule_type=schedule_type,
+                                     vehicle_id=vehicle_id,
+                                     rng=np.random.default_rng(seed_sequence))
+    return schedule_gen.generate_schedule()
+
+
+class FleetScheduleGenerator:
+    """
+    Generates the schedules of a fleet. Each vehicle gets its own random number generator, spawned from one
+    SeedSequence of the seed in env_config, so the vehicles are independent of each other and of the order in which
+    they are generated. The vehicles are distributed over a process pool and the results are merged in vehicle order:
+    the output is the same for any number of workers.
+
+    Large fleets can be streamed to disk vehicle by vehicle (see write), so the fleet is never held in memory at once.
+
+    Daemon processes cannot start child processes, e.g. the workers of SubprocVecEnv. In a daemon process, the vehicles
+    are therefore always generated in this process, regardless of the number of workers.
+    """
+
+    def __init__(self,
+                 env_config: dict,
+                 schedule_type: ScheduleType,
+                 n_evs: int,
+                 workers: int = None):
+        """
+        :param env_config: Includes all necessary parameters to specify schedule generation, see ScheduleGenerator
+        :param schedule_type: Use-case LMD/UT/CT
+        :param n_evs: Number of vehicles, the IDs are 0 to n_evs-1
+        :param workers: Number of worker processes. 1 or None generates in this process, which is also used in daemon
+            processes (e.g. SubprocVecEnv workers) since they cannot have children
+        """
+
+        self.env_config = env_config
+        self.schedule_type = schedule_type
+        self.n_evs = n_evs
+        self.workers = min(workers if workers is not None else 1, max(n_evs, 1))
+        if multiprocessing.current_process().daemon:
+            self.workers = 1
+
+        # one independent stream per vehicle
+        self.seed_sequences = np.random.SeedSequence(env_config["seed"]).spawn(n_evs)
+
+    def vehicle_tasks(self, vehicles=None) -> list[tuple]:
+        """
+        :param vehicles: Vehicle IDs to generate, all if None
+        :return: Arguments of _generate_vehicle for each vehicle
+        """
+        vehicles = range(self.n_evs) if vehicles is None else vehicles
+        return [(self.env_config, self.schedule_type, str(i), self.seed_sequences[i]) for i in vehicles]
+
+    def generate_vehicles(self, vehicles=None):
+        """
+        Generates the vehicles one by one, in vehicle order.
+
+        :param vehicles: Vehicle IDs to generate, all if None
+        :return: Iterator over the pd.DataFrame of each vehicle
+        """
+
+        tasks = self.vehicle_tasks(vehicles)
+        if self.workers == 1:
+            yield from map(_generate_vehicle, tasks)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            # map returns the results in the order of the tasks
+            yield from pool.map(_generate_vehicle, tasks, chunksize=max(len(tasks) // (4 * self.workers), 1))
+
+    def generate(self) -> pd.DataFrame:
+        """
+        :return: pd.DataFrame of the schedules of all vehicles, in vehicle order
+        """
+        return pd.concat(self.generate_vehicles())
+
+    def write(self, path: str, file_format: str = "parquet", batch_size: int = 1) -> str:
+        """
+        Streams the schedules to disk, in vehicle order. Only one batch of vehicles is held in memory.
+
+        :param path: Output path. Directory for "parquet", file for "csv"
+        :param file_format: "parquet": columnar files with compact dtypes and a manifest, see ScheduleWriter.
+            "csv": one csv file in the same format as generate().to_csv
+        :param batch_size: Number of vehicles per parquet file
+        :return: Output path
+        """
+
+        if file_format == "parquet":
+            writer = ScheduleWriter(path)
+            batch = []
+            for schedule in self.generate_vehicles():
+                batch.append(schedule)
+                if len(batch) == batch_size:
+                    writer.write(pd.concat(batch))
+                    batch = []
+            if len(batch) > 0:
+                writer.write(pd.concat(batch))
+
+        elif file_format == "csv":
+            for i, schedule in enumerate(self.generate_vehicles()):
+                schedule.to_csv(path, mode="w" if i == 0 else "a", header=(i == 0))
+
+        else:
+            raise ValueError(f"Unknown schedule format: {file_format}. Use 'parquet' or 'csv'.")
+
+        return path
@@ -1,23 +1,24 @@
-import datetime
-import math
 import pandas as pd
 import numpy as np
-import datetime as dt
-import time
-import os
 
 from fleetrl.utils.schedule.schedule_config import ScheduleConfig, ScheduleType
 
 class ScheduleGenerator:
     """
-    Probabilistic schedule generator. Loops through each 15 min timeslot in the yearly dataframe and generates a row
-    entry. The format is kept similar to emobpy to enable compatability and ease of use.
+    Probabilistic schedule generator. The random parameters of each day (departure, pause, return, distance) are drawn
+    as arrays for all days at once. The 15 min timeslots of the yearly dataframe are then compared with the parameters
+    of their day to find the trips, and the consumption of all driving timeslots is sampled at once. The format is
+    kept similar to emobpy to enable compatability and ease of use.
     """
 
+    # time of day is rounded to the closest quarter hour
+    minutes = np.asarray([0, 15, 30, 45])
+
     def __init__(self,
                  env_config: dict,
                  schedule_type: ScheduleType = ScheduleType.Delivery,
-                 vehicle_id: str = "0"):
+                 vehicle_id: str = "0",
+                 rng: np.random.Generator = None):
 
         """
         Initialise seed, directories, and other parameters.
@@ -25,11 +26,12 @@ class ScheduleGenerator:
         :param env_config: Includes all necessary parameters to specify schedule generation
         :param schedule_type: Use-case LMD/UT/CT
         :param vehicle_id: Vehicle ID column
+        :param rng: Random number generator of this vehicle, see FleetScheduleGenerator. Seeded with the seed in
+            env_config if not specified
         """
 
         # Set seed for reproducibility
-        seed = env_config["seed"]
-        np.random.seed(seed)
+        self.rng = rng if rng is not None else np.random.default_rng(env_config["seed"])
 
         # define schedule type
         self.schedule_type = schedule_type
@@ -68,624 +70,289 @@ class ScheduleGenerator:
         :return: pd.DataFrame of the schedule
         """
 
-        # make DataFrame and a date range, from start to end
-        ev_schedule = pd.DataFrame()
-        ev_schedule["date"] = pd.date_range(start=self.starting_date, end=self.ending_date, freq = self.freq)
+        ev_schedule = self.make_date_range(skip_sunday=True)
+        days, weekday, day_index = self.get_days(ev_schedule)
 
-        if ev_schedule["date"][0].weekday() == 6:
-            print("First day is a Sunday, skipping it...")
+        # Assuming no operation on Sundays
+        trips = [self.draw_single_trips(days, weekday, sunday_probability=0.0)]
 
-            while ev_schedule["date"][0].weekday() == 6:
-                ev_schedule.drop(index=0, inplace=True)
+        return self.set_trips(ev_schedule, day_index, trips)
 
-            assert ev_schedule["date"][0].weekday != 6, "Error, first day is still a Sunday."
+    def generate_caretaker(self):
 
-            new_start = ev_schedule["date"][0]
-            print(f"Now starting on date: {new_start}")
+        """
+        Caretaker generator. Lunch break, operations on Sunday, chance for emergency trips at night
+        :return: pd.DataFrame of the schedule
+        """
 
-        # Loop through each date entry and create the other entries
-        for step in ev_schedule["date"]:
-
-            # if new day, specify new random values
-            if (step.hour == 0) and (step.minute == 0):
-
-                # weekdays
-                if step.weekday() < 5:
-
-                    # time mean and std dev in config
-                    dep_time = np.random.normal(self.sc.dep_mean_wd, self.sc.dep_dev_wd)
-                    # split number and decimals, use number and turn to int
-                    dep_hour = int(math.modf(dep_time)[1])
-                    dep_hour = min([dep_hour, self.sc.max_dep])
-                    dep_hour = max([dep_hour, self.sc.min_dep])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    # split number and decimals, use decimals and choose the closest minute
-                    closest_index = np.abs(minutes - int(math.modf(dep_time)[0]*60)).argmin()
-                    dep_min = minutes[closest_index]
-
-                    ret_time = np.random.normal(self.sc.ret_mean_wd, self.sc.ret_dev_wd)
-                    ret_hour = int(math.modf(ret_time)[1])
-                    # clip return to a maximum
-                    ret_hour = min([ret_hour, self.sc.max_return_hour])
-                    ret_hour = max([ret_hour, self.sc.min_return])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    closest_index = np.abs(minutes - int(math.modf(ret_time)[0]*60)).argmin()
-                    ret_min = minutes[closest_index]
-
-                    # make dates for easier comparison
-                    dep_date = dt.datetime(step.year, step.month, step.day, hour=dep_hour, minute=dep_min)
-                    ret_date = dt.datetime(step.year, step.month, step.day, hour=ret_hour, minute=ret_min)
-
-                    # amount of time steps per trip
-                    trip_steps = (ret_date - dep_date).total_seconds() / 3600 * 4
-
-                    # total distance travelled that day
-                    total_distance = np.random.normal(self.sc.avg_distance_wd, self.sc.dev_distance_wd)
-                    total_distance = max([total_distance, self.sc.min_distance])
-                    total_distance = min([total_distance, self.sc.max_distance])
-                    if total_distance < 0:
-                        raise ValueError("Distance is negative")
-
-                # weekend
-                elif step.weekday() == 5:
-                    dep_time = np.random.normal(self.sc.dep_mean_we, self.sc.dep_dev_we)
-                    dep_hour = int(math.modf(dep_time)[1])
-                    dep_hour = min([dep_hour, self.sc.max_dep])
-                    dep_hour = max([dep_hour, self.sc.min_dep])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    closest_index = np.abs(minutes - int(math.modf(dep_time)[0]*60)).argmin()
-                    dep_min = minutes[closest_index]
-
-                    ret_time = np.random.normal(self.sc.ret_mean_we, self.sc.ret_dev_we)
-                    ret_hour = int(math.modf(ret_time)[1])
-                    # clip return to a maximum
-                    ret_hour = min([ret_hour, self.sc.max_return_hour])
-                    ret_hour = max([ret_hour, self.sc.min_return])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    closest_index = np.abs(minutes - int(math.modf(ret_time)[0]*60)).argmin()
-                    ret_min = minutes[closest_index]
-
-                    dep_date = dt.datetime(step.year, step.month, step.day, hour=dep_hour, minute=dep_min)
-                    ret_date = dt.datetime(step.year, step.month, step.day, hour=ret_hour, minute=ret_min)
-
-                    if dep_date > ret_date:
-                        raise RuntimeError("Schedule statistics produce unrealistic schedule. dep > ret.")
-
-                    trip_steps = (ret_date - dep_date).total_seconds() / 3600 * 4
-                    total_distance = np.random.normal(self.sc.avg_distance_we, self.sc.dev_distance_we)
-                    total_distance = max([total_distance, self.sc.min_distance])
-                    total_distance = min([total_distance, self.sc.max_distance])
-                    if total_distance < 0:
-                        raise ValueError("Distance is negative")
-
-                # Assuming no operation on Sundays
+        ev_schedule = self.make_date_range(skip_sunday=False)
+        days, weekday, day_index = self.get_days(ev_schedule)
+        weekend = weekday >= 5
+
+        # time mean and std dev in config, weekdays and weekends
+        dep = np.where(weekend,
+                       self.draw_time(self.sc.dep_mean_we, self.sc.dep_dev_we, len(days),
+                                      self.sc.min_dep, self.sc.max_dep),
+                       self.draw_time(self.sc.dep_mean_wd, self.sc.dep_dev_wd, len(days),
+                                      self.sc.min_dep, self.sc.max_dep))
+        pause_beg = np.where(weekend,
+                             self.draw_time(self.sc.pause_beg_mean_we, self.sc.pause_beg_dev_we, len(days)),
+                             self.draw_time(self.sc.pause_beg_mean_wd, self.sc.pause_beg_dev_wd, len(days)))
+        pause_end = np.where(weekend,
+                             self.draw_time(self.sc.pause_end_mean_we, self.sc.pause_end_dev_we, len(days)),
+                             self.draw_time(self.sc.pause_end_mean_wd, self.sc.pause_end_dev_wd, len(days)))
+        ret = np.where(weekend,
+                       self.draw_time(self.sc.ret_mean_we, self.sc.ret_dev_we, len(days),
+                                      self.sc.min_return_we, self.sc.max_return_hour),
+                       self.draw_time(self.sc.ret_mean_wd, self.sc.ret_dev_wd, len(days),
+                                      self.sc.min_return_wd, self.sc.max_return_hour))
+
+        # pause must end after it begins
+        pause_end = np.where(pause_end < pause_beg, pause_beg + np.timedelta64(15, "m"), pause_end)
+
+        # total distance travelled that day
+        total_distance = np.where(weekend,
+                                  self.draw_distance(self.sc.avg_distance_we, self.sc.dev_distance_we, len(days),
+                                                     self.sc.min_distance, self.sc.max_distance),
+                                  self.draw_distance(self.sc.avg_distance_wd, self.sc.dev_distance_wd, len(days),
+                                                     self.sc.min_distance, self.sc.max_distance))
+
+        every_day = np.ones(len(days), dtype=bool)
+        trips = [self.make_trip(every_day, days + dep, days + pause_beg, total_distance, self.sc.total_cons_clip),
+                 self.make_trip(every_day, days + pause_end, days + ret, total_distance,
+                                self.sc.total_cons_clip_afternoon)]
+
+        # emergency in the night, decided at the last timeslot of the day, overwrites other trips
+        dates = ev_schedule["date"]
+        last_slot = np.zeros(len(days), dtype=bool)
+        last_slot[day_index[((dates.dt.hour == 23) & (dates.dt.minute == 45)).values]] = True
+        emergency = last_slot & (self.rng.random(len(days)) < self.sc.prob_emergency)
+        em_distance = self.draw_distance(self.sc.avg_distance_em, self.sc.dev_distance_em, len(days),
+                                         self.sc.min_em_distance)
+        em_start = days + np.timedelta64(2, "h")
+        em_end = days + np.timedelta64(4, "h")
+        # the trip from 2:00 to 4:00 includes both timeslots, the distance is split into 8 parts
+        trips.append(self.make_trip(emergency, em_start, em_end, em_distance, self.sc.total_cons_clip,
+                                    trip_steps=np.full(len(days), 8.0), inclusive=True))
+
+        return self.set_trips(ev_schedule, day_index, trips)
 
-            # if trip is ongoing
-            if (step >= dep_date) and (step < ret_date):
-
-                # dividing the total distance into equal parts
-                ev_schedule.loc[ev_schedule["date"] == step, "Distance_km"] = total_distance / trip_steps
-
-                # sampling consumption in kWh / km based on Emobpy German case statistics
-                # Clipping to min
-                cons_rating = max([np.random.normal(self.sc.consumption_mean, self.sc.consumption_std),
-                                   self.sc.consumption_min])
-                # Clipping to max
-                cons_rating = min([cons_rating, self.sc.consumption_max])
-                # Clipping such that the maximum amount of energy per trip is not exceeded
-                cons_rating = min([cons_rating, self.sc.total_cons_clip / total_distance])
-
-                ev_schedule.loc[ev_schedule["date"] == step, "Consumption_kWh"] = (total_distance / trip_steps) * cons_rating
-
-                # set relevant entries
-                ev_schedule.loc[ev_schedule["date"] == step, "Location"] = "driving"
-                ev_schedule.loc[ev_schedule["date"] == step, "ChargingStation"] = "none"
-                ev_schedule.loc[ev_schedule["date"] == step, "ID"] = str(self.vehicle_id)
-                ev_schedule.loc[ev_schedule["date"] == step, "PowerRating_kW"] = 0.0
-
-            else:
-                ev_schedule.loc[ev_schedule["date"] == step, "Distance_km"] = 0.0
-                ev_schedule.loc[ev_schedule["date"] == step, "Consumption_kWh"] = 0.0
-                ev_schedule.loc[ev_schedule["date"] == step, "Location"] = "home"
-                ev_schedule.loc[ev_schedule["date"] == step, "ChargingStation"] = "home"
-                ev_schedule.loc[ev_schedule["date"] == step, "ID"] = str(self.vehicle_id)
-                ev_schedule.loc[ev_schedule["date"] == step, "PowerRating_kW"] = self.sc.charging_power
+    def generate_utility(self):
 
-        return ev_schedule
+        """
+        Utility generation. Chance for operations on Sunday.
+        :return: pd.DataFrame of the schedule.
+        """
 
-    def generate_caretaker(self):
+        ev_schedule = self.make_date_range(skip_sunday=True)
+        days, weekday, day_index = self.get_days(ev_schedule)
+
+        # Assuming normally no operation on Sundays, apart from unlikely emergencies
+        trips = [self.draw_single_trips(days, weekday, sunday_probability=0.05)]
+
+        return self.set_trips(ev_schedule, day_index, trips)
+
+    def generate_custom(self):
 
         """
-        Caretaker generator. Lunch break, operations on Sunday, chance for emergency trips at night
+        Custom schedule generator. Saturdays operations occur but at reduced levels, no operations on Sunday.
         :return: pd.DataFrame of the schedule
         """
 
-        # make DataFrame and a date range, from start to end
-        ev_schedule = pd.DataFrame()
-        ev_schedule["date"] = pd.date_range(start=self.starting_date, end=self.ending_date, freq = self.freq)
-
-        # Loop through each date entry and create the other entries
-        for step in ev_schedule["date"]:
-
-            # if new day, specify new random values
-            if (step.hour == 0) and (step.minute == 0):
-
-                # weekdays
-                if step.weekday() < 5:
-
-                    # time mean and std dev in config
-                    dep_time = np.random.normal(self.sc.dep_mean_wd, self.sc.dep_dev_wd)
-                    dep_hour = int(math.modf(dep_time)[1])
-                    dep_hour = min([dep_hour, self.sc.max_dep])
-                    dep_hour = max([dep_hour, self.sc.min_dep])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    closest_index = np.abs(minutes - int(math.modf(dep_time)[0]*60)).argmin()
-                    dep_min = minutes[closest_index]
-
-                    pause_beg_time = np.random.normal(self.sc.pause_beg_mean_wd, self.sc.pause_beg_dev_wd)
-                    pause_beg_hour = int(math.modf(pause_beg_time)[1])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    closest_index = np.abs(minutes - int(math.modf(pause_beg_time)[0] * 60)).argmin()
-                    pause_beg_min = minutes[closest_index]
-
-                    pause_end_time = np.random.normal(self.sc.pause_end_mean_wd, self.sc.pause_end_dev_wd)
-                    pause_end_hour = int(math.modf(pause_end_time)[1])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    closest_index = np.abs(minutes - int(math.modf(pause_end_time)[0] * 60)).argmin()
-                    pause_end_min = minutes[closest_index]
-
-                    ret_time = np.random.normal(self.sc.ret_mean_wd, self.sc.ret_dev_wd)
-                    ret_hour = int(math.modf(ret_time)[1])
-                    # clip return to a maximum
-                    ret_hour = min([ret_hour, self.sc.max_return_hour])
-                    ret_hour = max([ret_hour, self.sc.min_return_wd])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    closest_index = np.abs(minutes - int(math.modf(ret_time)[0] * 60)).argmin()
-                    ret_min = minutes[closest_index]
-
-                    # make dates for easier comparison
-                    dep_date = dt.datetime(step.year, step.month, step.day, hour=dep_hour, minute=dep_min)
-                    pause_beg_date = dt.datetime(step.year, step.month, step.day, hour=pause_beg_hour, minute=pause_beg_min)
-                    pause_end_date = dt.datetime(step.year, step.month, step.day, hour=pause_end_hour, minute=pause_end_min)
-                    if (pause_end_date - pause_beg_date).total_seconds() < 0:
-                        diff = (pause_end_date - pause_beg_date).total_seconds()
-                        pause_end_date += dt.timedelta(seconds=abs(diff))
-                        pause_end_date += dt.timedelta(minutes=15)
-                    ret_date = dt.datetime(step.year, step.month, step.day, hour=ret_hour, minute=ret_min)
-
-                    # amount of time steps per trip
-                    first_trip_steps = (pause_beg_date - dep_date).total_seconds() / 3600 * 4
-                    second_trip_steps = (ret_date - pause_end_date).total_seconds() / 3600 * 4
-                    total_distance = np.random.normal(self.sc.avg_distance_wd, self.sc.dev_distance_wd)
-                    total_distance = max([total_distance, self.sc.min_distance])
-
-                    # total distance travelled that day
-                    total_distance = np.random.normal(self.sc.avg_distance_wd, self.sc.dev_distance_wd)
-                    total_distance = max([total_distance, self.sc.min_distance])
-                    total_distance = min([total_distance, self.sc.max_distance])
-                    if total_distance < 0:
-                        raise ValueError("Distance is negative")
-
-                # weekend
-                else:
-                    dep_time = np.random.normal(self.sc.dep_mean_we, self.sc.dep_dev_we)
-                    dep_hour = int(math.modf(dep_time)[1])
-                    dep_hour = min([dep_hour, self.sc.max_dep])
-                    dep_hour = max([dep_hour, self.sc.min_dep])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    closest_index = np.abs(minutes - int(math.modf(dep_time)[0] * 60)).argmin()
-                    dep_min = minutes[closest_index]
-
-                    pause_beg_time = np.random.normal(self.sc.pause_beg_mean_we, self.sc.pause_beg_dev_we)
-                    pause_beg_hour = int(math.modf(pause_beg_time)[1])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    closest_index = np.abs(minutes - int(math.modf(pause_beg_time)[0] * 60)).argmin()
-                    pause_beg_min = minutes[closest_index]
-
-                    pause_end_time = np.random.normal(self.sc.pause_end_mean_we, self.sc.pause_end_dev_we)
-                    pause_end_hour = int(math.modf(pause_end_time)[1])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    closest_index = np.abs(minutes - int(math.modf(pause_end_time)[0] * 60)).argmin()
-                    pause_end_min = minutes[closest_index]
-
-                    ret_time = np.random.normal(self.sc.ret_mean_we, self.sc.ret_dev_we)
-                    ret_hour = int(math.modf(ret_time)[1])
-                    ret_hour = min([ret_hour, self.sc.max_return_hour])
-                    ret_hour = max([ret_hour, self.sc.min_return_we])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    closest_index = np.abs(minutes - int(math.modf(ret_time)[0] * 60)).argmin()
-                    ret_min = minutes[closest_index]
-
-                    dep_date = dt.datetime(step.year, step.month, step.day, hour=dep_hour, minute=dep_min)
-                    pause_beg_date = dt.datetime(step.year, step.month, step.day, hour=pause_beg_hour, minute=pause_beg_min)
-                    pause_end_date = dt.datetime(step.year, step.month, step.day, hour=pause_end_hour, minute=pause_end_min)
-                    if (pause_end_date - pause_beg_date).total_seconds() < 0:
-                        diff = (pause_end_date - pause_beg_date).total_seconds()
-                        pause_end_date += dt.timedelta(seconds=abs(diff))
-                        pause_end_date += dt.timedelta(minutes=15)
-                    ret_date = dt.datetime(step.year, step.month, step.day, hour=ret_hour, minute=ret_min)
-
-                    first_trip_steps = (pause_beg_date - dep_date).total_seconds() / 3600 * 4
-                    second_trip_steps = (ret_date - pause_end_date).total_seconds() / 3600 * 4
-                    total_distance = np.random.normal(self.sc.avg_distance_we, self.sc.dev_distance_we)
-                    total_distance = max([total_distance, self.sc.min_distance])
-                    total_distance = min([total_distance, self.sc.max_distance])
-                    if total_distance < 0:
-                        raise ValueError("Distance is negative")
+        ev_schedule = self.make_date_range(skip_sunday=True)
+        days, weekday, day_index = self.get_days(ev_schedule)
 
-            # if trip is ongoing
-            if (step >= dep_date) and (step < pause_beg_date):
-
-                # dividing the total distance into equal parts
-                ev_schedule.loc[ev_schedule["date"] == step, "Distance_km"] = total_distance / first_trip_steps
-
-                # sampling consumption in kWh / km based on Emobpy German case statistics
-                # Clipping to min
-                cons_rating = max([np.random.normal(self.sc.consumption_mean, self.sc.consumption_std),
-                                   self.sc.consumption_min])
-                # Clipping to max
-                cons_rating = min([cons_rating, self.sc.consumption_max])
-                # Clipping such that the maximum amount of energy per trip is not exceeded
-                cons_rating = min([cons_rating, self.sc.total_cons_clip / total_distance])
-                ev_schedule.loc[ev_schedule["date"] == step, "Consumption_kWh"] = (total_distance / first_trip_steps) * cons_rating
-
-                # set relevant entries
-                ev_schedule.loc[ev_schedule["date"] == step, "Location"] = "driving"
-                ev_schedule.loc[ev_schedule["date"] == step, "ChargingStation"] = "none"
-                ev_schedule.loc[ev_schedule["date"] == step, "ID"] = str(self.vehicle_id)
-                ev_schedule.loc[ev_schedule["date"] == step, "PowerRating_kW"] = 0.0
-
-            elif (step >= pause_end_date) and (step < ret_date):
-                # dividing the total distance into equal parts
-                ev_schedule.loc[ev_schedule["date"] == step, "Distance_km"] = total_distance / second_trip_steps
-
-                # sampling consumption in kWh / km based on Emobpy German case statistics
-                # Clipping to min
-                cons_rating = max([np.random.normal(self.sc.consumption_mean, self.sc.consumption_std),
-                                   self.sc.consumption_min])
-                # Clipping to max
-                cons_rating = min([cons_rating, self.sc.consumption_max])
-                # Clipping such that the maximum amount of energy per trip is not exceeded
-                cons_rating = min([cons_rating, self.sc.total_cons_clip_afternoon / total_distance])
-                ev_schedule.loc[ev_schedule["date"] == step, "Consumption_kWh"] = (total_distance / second_trip_steps) * cons_rating
-
-                # set relevant entries
-                ev_schedule.loc[ev_schedule["date"] == step, "Location"] = "driving"
-                ev_schedule.loc[ev_schedule["date"] == step, "ChargingStation"] = "none"
-                ev_schedule.loc[ev_schedule["date"] == step, "ID"] = str(self.vehicle_id)
-                ev_schedule.loc[ev_schedule["date"] == step, "PowerRating_kW"] = 0.0
-
-            else:
-                ev_schedule.loc[ev_schedule["date"] == step, "Distance_km"] = 0.0
-                ev_schedule.loc[ev_schedule["date"] == step, "Consumption_kWh"] = 0.0
-                ev_schedule.loc[ev_schedule["date"] == step, "Location"] = "home"
-                ev_schedule.loc[ev_schedule["date"] == step, "ChargingStation"] = "home"
-                ev_schedule.loc[ev_schedule["date"] == step, "ID"] = str(self.vehicle_id)
-                ev_schedule.loc[ev_schedule["date"] == step, "PowerRating_kW"] = self.sc.charging_power
-
-            if step == dt.datetime(step.year, step.month, step.day, hour=23, minute=45):
-                if np.random.random() > 0.98:
-                    # emergency
-                    em_start_date = dt.datetime(step.year, step.month, step.day, hour=2, minute=0)
-                    em_end_date = dt.datetime(step.year, step.month, step.day, hour=4, minute=0)
-                    dr = pd.date_range(start=em_start_date, end=em_end_date, freq="15T")
-                    trip_steps = (em_end_date - em_start_date).total_seconds() / 3600 * 4
-                    total_distance = np.random.normal(self.sc.avg_distance_em, self.sc.dev_distance_em)
-                    total_distance = max([total_distance, self.sc.min_em_distance])
-
-                    for step in dr:
-                        # dividing the total distance into equal parts
-                        ev_schedule.loc[ev_schedule["date"] == step, "Distance_km"] = total_distance / trip_steps
-
-                        # sampling consumption in kWh / km based on Emobpy German case statistics
-                        # Clipping to min
-                        cons_rating = max([np.random.normal(self.sc.consumption_mean, self.sc.consumption_std),
-                                           self.sc.consumption_min])
-                        # Clipping to max
-                        cons_rating = min([cons_rating, self.sc.consumption_max])
-                        # Clipping such that the maximum amount of energy per trip is not exceeded
-                        cons_rating = min([cons_rating, self.sc.total_cons_clip / total_distance])
-                        ev_schedule.loc[ev_schedule[
-                                            "date"] == step, "Consumption_kWh"] = (total_distance / trip_steps) * cons_rating
-
-                        # set relevant entries
-                        ev_schedule.loc[ev_schedule["date"] == step, "Location"] = "driving"
-                        ev_schedule.loc[ev_schedule["date"] == step, "ChargingStation"] = "none"
-                        ev_schedule.loc[ev_schedule["date"] == step, "ID"] = str(self.vehicle_id)
-                        ev_schedule.loc[ev_schedule["date"] == step, "PowerRating_kW"] = 0.0
+        # Assuming no operation on Sundays
+        trips = [self.draw_single_trips(days, weekday, sunday_probability=0.0)]
 
-        return ev_schedule
+        return self.set_trips(ev_schedule, day_index, trips)
 
-    def generate_utility(self):
+    def make_date_range(self, skip_sunday: bool) -> pd.DataFrame:
 
         """
-        Utility generation. Chance for operations on Sunday.
-        :return: pd.DataFrame of the schedule.
+        :param skip_sunday: Skip the first day if it is a Sunday
+        :return: pd.DataFrame with a date range, from start to end
         """
 
-        # make DataFrame and a date range, from start to end
         ev_schedule = pd.DataFrame()
-        ev_schedule["date"] = pd.date_range(start=self.starting_date, end=self.ending_date, freq = self.freq)
+        ev_schedule["date"] = pd.date_range(start=self.starting_date, end=self.ending_date, freq=self.freq)
 
-        if ev_schedule["date"][0].weekday() == 6:
+        if skip_sunday and ev_schedule["date"][0].weekday() == 6:
             print("First day is a Sunday, skipping it...")
 
-            while ev_schedule["date"][0].weekday() == 6:
-                ev_schedule.drop(index=0, inplace=True)
-
-            assert ev_schedule["date"][0].weekday != 6, "Error, first day is still a Sunday."
+            ev_schedule = ev_schedule[(ev_schedule["date"].dt.weekday != 6).cummax()].reset_index(drop=True)
 
             new_start = ev_schedule["date"][0]
             print(f"Now starting on date: {new_start}")
 
-        # Loop through each date entry and create the other entries
-        for step in ev_schedule["date"]:
-
-            # if new day, specify new random values
-            if (step.hour == 0) and (step.minute == 0):
-
-                # weekdays
-                if step.weekday() < 5:
-
-                    # time mean and std dev in config
-                    dep_time = np.random.normal(self.sc.dep_mean_wd, self.sc.dep_dev_wd)
-                    # split number and decimals, use number and turn to int
-                    dep_hour = int(math.modf(dep_time)[1])
-                    dep_hour = min([dep_hour, self.sc.max_dep])
-                    dep_hour = max([dep_hour, self.sc.min_dep])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    # split number and decimals, use decimals and choose the closest minute
-                    closest_index = np.abs(minutes - int(math.modf(dep_time)[0]*60)).argmin()
-                    dep_min = minutes[closest_index]
-
-                    ret_time = np.random.normal(self.sc.ret_mean_wd, self.sc.ret_dev_wd)
-                    ret_hour = int(math.modf(ret_time)[1])
-                    # clip return to a maximum
-                    ret_hour = min([ret_hour, self.sc.max_return_hour])
-                    ret_hour = max([ret_hour, self.sc.min_return])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    closest_index = np.abs(minutes - int(math.modf(ret_time)[0]*60)).argmin()
-                    ret_min = minutes[closest_index]
-
-                    # make dates for easier comparison
-                    dep_date = dt.datetime(step.year, step.month, step.day, hour=dep_hour, minute=dep_min)
-                    ret_date = dt.datetime(step.year, step.month, step.day, hour=ret_hour, minute=ret_min)
-
-                    # amount of time steps per trip
-                    trip_steps = (ret_date - dep_date).total_seconds() / 3600 * 4
-
-                    # total distance travelled that day
-                    total_distance = np.random.normal(self.sc.avg_distance_wd, self.sc.dev_distance_wd)
-                    total_distance = max([total_distance, self.sc.min_distance])
-                    total_distance = min([total_distance, self.sc.max_distance])
-                    if total_distance < 0:
-                        raise ValueError("Distance is negative")
-
-                # weekend
-                elif step.weekday() == 5:
-                    dep_time = np.random.normal(self.sc.dep_mean_we, self.sc.dep_dev_we)
-                    dep_hour = int(math.modf(dep_time)[1])
-                    dep_hour = min([dep_hour, self.sc.max_dep])
-                    dep_hour = max([dep_hour, self.sc.min_dep])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    closest_index = np.abs(minutes - int(math.modf(dep_time)[0]*60)).argmin()
-                    dep_min = minutes[closest_index]
-
-                    ret_time = np.random.normal(self.sc.ret_mean_we, self.sc.ret_dev_we)
-                    ret_hour = int(math.modf(ret_time)[1])
-                    # clip return to a maximum
-                    ret_hour = min([ret_hour, self.sc.max_return_hour])
-                    ret_hour = max([ret_hour, self.sc.min_return])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    closest_index = np.abs(minutes - int(math.modf(ret_time)[0]*60)).argmin()
-                    ret_min = minutes[closest_index]
-
-                    dep_date = dt.datetime(step.year, step.month, step.day, hour=dep_hour, minute=dep_min)
-                    ret_date = dt.datetime(step.year, step.month, step.day, hour=ret_hour, minute=ret_min)
-
-                    if dep_date > ret_date:
-                        raise RuntimeError("Schedule statistics produce unrealistic schedule. dep > ret.")
-
-                    trip_steps = (ret_date - dep_date).total_seconds() / 3600 * 4
-                    total_distance = np.random.normal(self.sc.avg_distance_we, self.sc.dev_distance_we)
-                    total_distance = max([total_distance, self.sc.min_distance])
-                    total_distance = min([total_distance, self.sc.max_distance])
-                    if total_distance < 0:
-                        raise ValueError("Distance is negative")
-
-                elif (step.weekday() == 6) and (np.random.random() > 0.95):
-                    dep_time = np.random.normal(self.sc.dep_mean_we, self.sc.dep_dev_we)
-                    dep_hour = int(math.modf(dep_time)[1])
-                    dep_hour = min([dep_hour, self.sc.max_dep])
-                    dep_hour = max([dep_hour, self.sc.min_dep])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    closest_index = np.abs(minutes - int(math.modf(dep_time)[0] * 60)).argmin()
-                    dep_min = minutes[closest_index]
-
-                    ret_time = np.random.normal(self.sc.ret_mean_we, self.sc.ret_dev_we)
-                    ret_hour = int(math.modf(ret_time)[1])
-                    # clip return to a maximum
-                    ret_hour = min([ret_hour, self.sc.max_return_hour])
-                    ret_hour = max([ret_hour, self.sc.min_return])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    closest_index = np.abs(minutes - int(math.modf(ret_time)[0] * 60)).argmin()
-                    ret_min = minutes[closest_index]
-
-                    dep_date = dt.datetime(step.year, step.month, step.day, hour=dep_hour, minute=dep_min)
-                    ret_date = dt.datetime(step.year, step.month, step.day, hour=ret_hour, minute=ret_min)
-
-                    if dep_date > ret_date:
-                        raise RuntimeError("Schedule statistics produce unrealistic schedule. dep > ret.")
-
-                    trip_steps = (ret_date - dep_date).total_seconds() / 3600 * 4
-                    total_distance = np.random.normal(self.sc.avg_distance_we, self.sc.dev_distance_we)
-                    total_distance = max([total_distance, self.sc.min_distance])
-                    total_distance = min([total_distance, self.sc.max_distance])
-                    if total_distance < 0:
-                        raise ValueError("Distance is negative")
-
-                # Assuming normally no operation on Sundays, apart from unlikely emergencies
+        return ev_schedule
 
-            # if trip is ongoing
-            if (step >= dep_date) and (step < ret_date):
-
-                # dividing the total distance into equal parts
-                ev_schedule.loc[ev_schedule["date"] == step, "Distance_km"] = total_distance / trip_steps
-
-                # sampling consumption in kWh / km based on Emobpy German case statistics
-                # Clipping to min
-                cons_rating = max([np.random.normal(self.sc.consumption_mean, self.sc.consumption_std),
-                                   self.sc.consumption_min])
-                # Clipping to max
-                cons_rating = min([cons_rating, self.sc.consumption_max])
-                # Clipping such that the maximum amount of energy per trip is not exceeded
-                cons_rating = min([cons_rating, self.sc.total_cons_clip / total_distance])
-                ev_schedule.loc[ev_schedule["date"] == step, "Consumption_kWh"] = (total_distance / trip_steps) * cons_rating
-
-                # set relevant entries
-                ev_schedule.loc[ev_schedule["date"] == step, "Location"] = "driving"
-                ev_schedule.loc[ev_schedule["date"] == step, "ChargingStation"] = "none"
-                ev_schedule.loc[ev_schedule["date"] == step, "ID"] = str(self.vehicle_id)
-                ev_schedule.loc[ev_schedule["date"] == step, "PowerRating_kW"] = 0.0
-
-            else:
-                ev_schedule.loc[ev_schedule["date"] == step, "Distance_km"] = 0.0
-                ev_schedule.loc[ev_schedule["date"] == step, "Consumption_kWh"] = 0.0
-                ev_schedule.loc[ev_schedule["date"] == step, "Location"] = "home"
-                ev_schedule.loc[ev_schedule["date"] == step, "ChargingStation"] = "home"
-                ev_schedule.loc[ev_schedule["date"] == step, "ID"] = str(self.vehicle_id)
-                ev_schedule.loc[ev_schedule["date"] == step, "PowerRating_kW"] = self.sc.charging_power
+    @staticmethod
+    def get_days(ev_schedule: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
 
-        return ev_schedule
+        """
+        :param ev_schedule: pd.DataFrame with the date range
+        :return: Days in the date range (datetime64[D]), weekday of each day (Monday = 0), index of the day of each
+            timeslot
+        """
 
-    def generate_custom(self):
+        days, day_index = np.unique(ev_schedule["date"].values.astype("datetime64[D]"), return_inverse=True)
+        # 1970-01-01 was a Thursday
+        weekday = (days.astype(np.int64) + 3) % 7
+        return days, weekday, day_index
+
+    def draw_time(self, mean: float, dev: float, n: int, min_hour: int = None, max_hour: int = None) -> np.ndarray:
 
         """
-        Custom schedule generator. Saturdays operations occur but at reduced levels, no operations on Sunday.
-        :return: pd.DataFrame of the schedule
+        Draws a time of day for n days. The hour is clipped to the limits, the decimals are rounded to the closest
+        quarter hour.
+
+        :param mean: Mean time of day in hours
+        :param dev: Std deviation in hours
+        :param n: Number of days
+        :param min_hour: Hour must be bigger or equal to this value
+        :param max_hour: Hour must be smaller or equal to this value
+        :return: Time of day, timedelta64[m]
         """
 
-        # make DataFrame and a date range, from start to end
-        ev_schedule = pd.DataFrame()
-        ev_schedule["date"] = pd.date_range(start=self.starting_date, end=self.ending_date, freq = self.freq)
+        time = self.rng.normal(mean, dev, n)
+        # split number and decimals, use number and turn to int
+        decimals, hours = np.modf(time)
+        hours = hours.astype(int)
+        if max_hour is not None:
+            hours = np.minimum(hours, max_hour)
+        if min_hour is not None:
+            hours = np.maximum(hours, min_hour)
+        # use decimals and choose the closest minute
+        closest_index = np.abs(self.minutes - (decimals * 60).astype(int)[:, None]).argmin(axis=1)
+        return (hours * 60 + self.minutes[closest_index]).astype("timedelta64[m]")
 
-        if ev_schedule["date"][0].weekday() == 6:
-            print("First day is a Sunday, skipping it...")
+    def draw_distance(self, mean: float, dev: float, n: int, min_distance: float, max_distance: float = None) -> np.ndarray:
+
+        """
+        :param mean: Mean distance travelled per day
+        :param dev: Std deviation of the distance
+        :param n: Number of days
+        :param min_distance: Minimum distance
+        :param max_distance: Maximum distance
+        :return: Total distance travelled each day
+        """
 
-            while ev_schedule["date"][0].weekday() == 6:
-                ev_schedule.drop(index=0, inplace=True)
+        total_distance = np.maximum(self.rng.normal(mean, dev, n), min_distance)
+        if max_distance is not None:
+            total_distance = np.minimum(total_distance, max_distance)
+        if np.any(total_distance < 0):
+            raise ValueError("Distance is negative")
+        return total_distance
 
-            assert ev_schedule["date"][0].weekday != 6, "Error, first day is still a Sunday."
+    def draw_single_trips(self, days: np.ndarray, weekday: np.ndarray, sunday_probability: float) -> dict:
 
-            new_start = ev_schedule["date"][0]
-            print(f"Now starting on date: {new_start}")
+        """
+        One trip per day, from departure to return. Saturdays with reduced levels, Sundays only with the given
+        probability.
+
+        :param days: Days in the date range
+        :param weekday: Weekday of each day
+        :param sunday_probability: Probability of operations on a Sunday
+        :return: Trip, see make_trip
+        """
+
+        weekend = weekday >= 5
+
+        # time mean and std dev in config, weekdays and weekends
+        dep = np.where(weekend,
+                       self.draw_time(self.sc.dep_mean_we, self.sc.dep_dev_we, len(days),
+                                      self.sc.min_dep, self.sc.max_dep),
+                       self.draw_time(self.sc.dep_mean_wd, self.sc.dep_dev_wd, len(days),
+                                      self.sc.min_dep, self.sc.max_dep))
+        ret = np.where(weekend,
+                       self.draw_time(self.sc.ret_mean_we, self.sc.ret_dev_we, len(days),
+                                      self.sc.min_return, self.sc.max_return_hour),
+                       self.draw_time(self.sc.ret_mean_wd, self.sc.ret_dev_wd, len(days),
+                                      self.sc.min_return, self.sc.max_return_hour))
+
+        # total distance travelled that day
+        total_distance = np.where(weekend,
+                                  self.draw_distance(self.sc.avg_distance_we, self.sc.dev_distance_we, len(days),
+                                                     self.sc.min_distance, self.sc.max_distance),
+                                  self.draw_distance(self.sc.avg_distance_wd, self.sc.dev_distance_wd, len(days),
+                                                     self.sc.min_distance, self.sc.max_distance))
+
+        active = (weekday < 6) | (self.rng.random(len(days)) < sunday_probability)
+
+        if np.any(active & weekend & (dep > ret)):
+            raise RuntimeError("Schedule statistics produce unrealistic schedule. dep > ret.")
+
+        return self.make_trip(active, days + dep, days + ret, total_distance, self.sc.total_cons_clip)
+
+    @staticmethod
+    def make_trip(active: np.ndarray,
+                  start: np.ndarray,
+                  end: np.ndarray,
+                  total_distance: np.ndarray,
+                  cons_clip: float,
+                  trip_steps: np.ndarray = None,
+                  inclusive: bool = False) -> dict:
+
+        """
+        :param active: Days with this trip
+        :param start: Start of the trip on each day, datetime64
+        :param end: End of the trip on each day, datetime64
+        :param total_distance: Distance of the trip on each day
+        :param cons_clip: Max kWh that the trip can use
+        :param trip_steps: Number of parts the distance is divided into, default: amount of 15 min steps of the trip
+        :param inclusive: The timeslot at the end is part of the trip
+        :return: Trip, dict with one array per parameter, one entry per day
+        """
+
+        if trip_steps is None:
+            trip_steps = (end - start).astype("timedelta64[m]").astype(float) / 15
+
+        return {"active": active, "start": start, "end": end, "total_distance": total_distance,
+                "cons_clip": cons_clip, "trip_steps": trip_steps, "inclusive": inclusive}
+
+    def set_trips(self, ev_schedule: pd.DataFrame, day_index: np.ndarray, trips: list[dict]) -> pd.DataFrame:
+
+        """
+        Sets the entries of all timeslots. Later trips overwrite earlier ones.
+
+        :param ev_schedule: pd.DataFrame with the date range
+        :param day_index: Index of the day of each timeslot
+        :param trips: List of trips, see make_trip
+        :return: pd.DataFrame of the schedule
+        """
 
-        # Loop through each date entry and create the other entries
-        for step in ev_schedule["date"]:
-
-            # if new day, specify new random values
-            if (step.hour == 0) and (step.minute == 0):
-
-                # weekdays
-                if step.weekday() < 5:
-
-                    # time mean and std dev in config
-                    dep_time = np.random.normal(self.sc.dep_mean_wd, self.sc.dep_dev_wd)
-                    # split number and decimals, use number and turn to int
-                    dep_hour = int(math.modf(dep_time)[1])
-                    dep_hour = min([dep_hour, self.sc.max_dep])
-                    dep_hour = max([dep_hour, self.sc.min_dep])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    # split number and decimals, use decimals and choose the closest minute
-                    closest_index = np.abs(minutes - int(math.modf(dep_time)[0]*60)).argmin()
-                    dep_min = minutes[closest_index]
-
-                    ret_time = np.random.normal(self.sc.ret_mean_wd, self.sc.ret_dev_wd)
-                    ret_hour = int(math.modf(ret_time)[1])
-                    # clip return to a maximum
-                    ret_hour = min([ret_hour, self.sc.max_return_hour])
-                    ret_hour = max([ret_hour, self.sc.min_return])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    closest_index = np.abs(minutes - int(math.modf(ret_time)[0]*60)).argmin()
-                    ret_min = minutes[closest_index]
-
-                    # make dates for easier comparison
-                    dep_date = dt.datetime(step.year, step.month, step.day, hour=dep_hour, minute=dep_min)
-                    ret_date = dt.datetime(step.year, step.month, step.day, hour=ret_hour, minute=ret_min)
-
-                    # amount of time steps per trip
-                    trip_steps = (ret_date - dep_date).total_seconds() / 3600 * 4
-
-                    # total distance travelled that day
-                    total_distance = np.random.normal(self.sc.avg_distance_wd, self.sc.dev_distance_wd)
-                    total_distance = max([total_distance, self.sc.min_distance])
-                    total_distance = min([total_distance, self.sc.max_distance])
-                    if total_distance < 0:
-                        raise ValueError("Distance is negative")
-
-                # weekend
-                elif step.weekday() == 5:
-                    dep_time = np.random.normal(self.sc.dep_mean_we, self.sc.dep_dev_we)
-                    dep_hour = int(math.modf(dep_time)[1])
-                    dep_hour = min([dep_hour, self.sc.max_dep])
-                    dep_hour = max([dep_hour, self.sc.min_dep])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    closest_index = np.abs(minutes - int(math.modf(dep_time)[0]*60)).argmin()
-                    dep_min = minutes[closest_index]
-
-                    ret_time = np.random.normal(self.sc.ret_mean_we, self.sc.ret_dev_we)
-                    ret_hour = int(math.modf(ret_time)[1])
-                    # clip return to a maximum
-                    ret_hour = min([ret_hour, self.sc.max_return_hour])
-                    ret_hour = max([ret_hour, self.sc.min_return])
-                    minutes = np.asarray([0, 15, 30, 45])
-                    closest_index = np.abs(minutes - int(math.modf(ret_time)[0]*60)).argmin()
-                    ret_min = minutes[closest_index]
-
-                    dep_date = dt.datetime(step.year, step.month, step.day, hour=dep_hour, minute=dep_min)
-                    ret_date = dt.datetime(step.year, step.month, step.day, hour=ret_hour, minute=ret_min)
-
-                    if dep_date > ret_date:
-                        raise RuntimeError("Schedule statistics produce unrealistic schedule. dep > ret.")
-
-                    trip_steps = (ret_date - dep_date).total_seconds() / 3600 * 4
-                    total_distance = np.random.normal(self.sc.avg_distance_we, self.sc.dev_distance_we)
-                    total_distance = max([total_distance, self.sc.min_distance])
-                    total_distance = min([total_distance, self.sc.max_distance])
-                    if total_distance < 0:
-                        raise ValueError("Distance is negative")
-
-                # Assuming no operation on Sundays
+        dates = ev_schedule["date"].values
+        distance = np.zeros(len(dates))
+        consumption = np.zeros(len(dates))
+        driving = np.zeros(len(dates), dtype=bool)
 
+        for trip in trips:
             # if trip is ongoing
-            if (step >= dep_date) and (step < ret_date):
-
-                # dividing the total distance into equal parts
-                ev_schedule.loc[ev_schedule["date"] == step, "Distance_km"] = total_distance / trip_steps
-
-                # sampling consumption in kWh / km based on Emobpy German case statistics
-                # Clipping to min
-                cons_rating = max([np.random.normal(self.sc.consumption_mean, self.sc.consumption_std),
-                                   self.sc.consumption_min])
-                # Clipping to max
-                cons_rating = min([cons_rating, self.sc.consumption_max])
-                # Clipping such that the maximum amount of energy per trip is not exceeded
-                cons_rating = min([cons_rating, self.sc.total_cons_clip / total_distance])
-
-                ev_schedule.loc[ev_schedule["date"] == step, "Consumption_kWh"] = (total_distance / trip_steps) * cons_rating
-
-                # set relevant entries
-                ev_schedule.loc[ev_schedule["date"] == step, "Location"] = "driving"
-                ev_schedule.loc[ev_schedule["date"] == step, "ChargingStation"] = "none"
-                ev_schedule.loc[ev_schedule["date"] == step, "ID"] = str(self.vehicle_id)
-                ev_schedule.loc[ev_schedule["date"] == step, "PowerRating_kW"] = 0.0
-
-            else:
-                ev_schedule.loc[ev_schedule["date"] == step, "Distance_km"] = 0.0
-                ev_schedule.loc[ev_schedule["date"] == step, "Consumption_kWh"] = 0.0
-                ev_schedule.loc[ev_schedule["date"] == step, "Location"] = "home"
-                ev_schedule.loc[ev_schedule["date"] == step, "ChargingStation"] = "home"
-                ev_schedule.loc[ev_schedule["date"] == step, "ID"] = str(self.vehicle_id)
-                ev_schedule.loc[ev_schedule["date"] == step, "PowerRating_kW"] = self.sc.charging_power
+            after_end = dates > trip["end"][day_index] if trip["inclusive"] else dates >= trip["end"][day_index]
+            ongoing = trip["active"][day_index] & (dates >= trip["start"][day_index]) & ~after_end
+            day = day_index[ongoing]
+
+            # dividing the total distance into equal parts
+            step_distance = trip["total_distance"][day] / trip["trip_steps"][day]
+
+            # sampling consumption in kWh / km based on Emobpy German case statistics
+            # Clipping to min and max
+            cons_rating = np.clip(self.rng.normal(self.sc.consumption_mean, self.sc.consumption_std, len(day)),
+                                  self.sc.consumption_min, self.sc.consumption_max)
+            # Clipping such that the maximum amount of energy per trip is not exceeded
+            cons_rating = np.minimum(cons_rating, trip["cons_clip"] / trip["total_distance"][day])
+
+            distance[ongoing] = step_distance
+            consumption[ongoing] = step_distance * cons_rating
+            driving[ongoing] = True
+
+        # set relevant entries
+        ev_schedule["Distance_km"] = distance
+        ev_schedule["Consumption_kWh"] = consumption
+        ev_schedule["Location"] = np.where(driving, "driving", "home").astype(object)
+        ev_schedule["ChargingStation"] = np.where(driving, "none", "home").astype(object)
+        ev_schedule["ID"] = str(self.vehicle_id)
+        ev_schedule["PowerRating_kW"] = np.where(driving, 0.0, float(self.sc.charging_power))
 
         return ev_schedule
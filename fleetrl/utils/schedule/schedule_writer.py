@@ -0,0 +1,170 @@
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+from fleetrl.utils.optional_dependencies import import_pyarrow
+
+
+class ScheduleWriter:
+    """
+    Appendable columnar storage of a generated schedule. Vehicles (or batches of vehicles) are written one by one as
+    parquet files, so only one batch is held in memory at a time. A manifest lists the files, the vehicle IDs and
+    their row ranges in the complete schedule.
+
+    Compact dtypes are used instead of the pandas object columns:
+
+    - Distance, consumption and power rating as float32 (float_dtype)
+    - Location and ChargingStation dictionary-encoded
+    - ID as int32 if all IDs are numbers, like read_csv would parse them, otherwise dictionary-encoded strings
+    """
+
+    manifest_name = "manifest.json"
+
+    def __init__(self, path: str, float_dtype=np.float32, append: bool = False):
+        """
+        :param path: Directory of the schedule, created if necessary
+        :param float_dtype: Data type of the float columns
+        :param append: Continue an existing schedule in the directory. Otherwise, its files are replaced
+        """
+
+        self.path: str = path
+        self.float_dtype = float_dtype
+        os.makedirs(self.path, exist_ok=True)
+
+        self.manifest: dict = {"rows": 0, "files": [], "vehicles": []}
+        if ScheduleReader.is_schedule_dir(self.path):
+            existing = ScheduleReader(self.path)
+            if append:
+                self.manifest = existing.manifest
+            else:
+                for file in existing.files:
+                    os.remove(file)
+
+    def write(self, schedule: pd.DataFrame) -> None:
+        """
+        Appends the schedules of one or more vehicles, the rows of each vehicle must be consecutive.
+
+        :param schedule: pd.DataFrame of the schedule, format of ScheduleGenerator
+        :return: None
+        """
+
+        pa, pq = import_pyarrow("Writing or reading schedules as parquet files")
+
+        ids = schedule["ID"].to_numpy()
+        numeric_ids = pd.to_numeric(schedule["ID"], errors="coerce")
+        integer_ids = bool(numeric_ids.notna().all() and (numeric_ids % 1 == 0).all())
+
+        columns = {"date": pa.array(schedule["date"].to_numpy()),
+                   "Distance_km": pa.array(schedule["Distance_km"].to_numpy(self.float_dtype)),
+                   "Consumption_kWh": pa.array(schedule["Consumption_kWh"].to_numpy(self.float_dtype)),
+                   "Location": pa.array(schedule["Location"].to_numpy()).dictionary_encode(),
+                   "ChargingStation": pa.array(schedule["ChargingStation"].to_numpy()).dictionary_encode(),
+                   "ID": (pa.array(numeric_ids.to_numpy(np.int32)) if integer_ids
+                          else pa.array(ids.astype(str)).dictionary_encode()),
+                   "PowerRating_kW": pa.array(schedule["PowerRating_kW"].to_numpy(self.float_dtype))}
+        table = pa.Table.from_arrays(list(columns.values()), names=list(columns))
+
+        file_name = f"part-{len(self.manifest['files']):06d}.parquet"
+        pq.write_table(table, os.path.join(self.path, file_name))
+
+        # row range of each vehicle in the complete schedule
+        offset = self.manifest["rows"]
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if len(ids) else np.zeros(0, dtype=int)
+        stops = np.r_[starts[1:], len(ids)]
+        for start, stop in zip(starts, stops):
+            self.manifest["vehicles"].append({"id": str(ids[start]), "file": file_name,
+                                              "start": offset + int(start), "stop": offset + int(stop)})
+
+        self.manifest["files"].append({"file": file_name, "start": offset, "stop": offset + len(schedule)})
+        self.manifest["rows"] = offset + len(schedule)
+        self.write_manifest()
+
+    def write_manifest(self) -> None:
+        """
+        Writes the manifest, it is updated after every file so the schedule stays readable if writing is interrupted.
+
+        :return: None
+        """
+        with open(os.path.join(self.path, self.manifest_name), "w") as file:
+            json.dump(self.manifest, file, indent=1)
+
+    def reader(self) -> "ScheduleReader":
+        """
+        :return: Reader of the schedule directory
+        """
+        return ScheduleReader(self.path)
+
+
+class ScheduleReader:
+    """
+    Reads a schedule that was written by ScheduleWriter, in the same format as the schedule csv file read by
+    pd.read_csv. The manifest is used to only read the files of the requested vehicles.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Schedule directory, written by ScheduleWriter
+        """
+        self.path: str = path
+        with open(os.path.join(self.path, ScheduleWriter.manifest_name), "r") as file:
+            self.manifest: dict = json.load(file)
+
+    @staticmethod
+    def is_schedule_dir(path: str) -> bool:
+        """
+        :param path: Path of a schedule
+        :return: True if the path is a schedule directory written by ScheduleWriter
+        """
+        return os.path.isfile(os.path.join(path, ScheduleWriter.manifest_name))
+
+    @property
+    def files(self) -> list[str]:
+        """
+        :return: Manifest and data files, in the written order
+        """
+        return ([os.path.join(self.path, ScheduleWriter.manifest_name)]
+                + [os.path.join(self.path, entry["file"]) for entry in self.manifest["files"]])
+
+    @property
+    def vehicles(self) -> list[str]:
+        """
+        :return: Vehicle IDs, in the written order
+        """
+        return [entry["id"] for entry in self.manifest["vehicles"]]
+
+    def read(self, vehicles: list[str] = None) -> pd.DataFrame:
+        """
+        :param vehicles: Vehicle IDs to read, default all vehicles
+        :return: pd.DataFrame of the schedule, float64 and object columns like the csv file
+        """
+
+        pa, pq = import_pyarrow("Writing or reading schedules as parquet files")
+
+        # row ranges to read from each file, in the written order
+        file_starts = {entry["file"]: entry["start"] for entry in self.manifest["files"]}
+        wanted = None if vehicles is None else {str(vehicle) for vehicle in vehicles}
+        ranges: dict[str, list[tuple[int, int]]] = {}
+        for entry in self.manifest["vehicles"]:
+            if wanted is None or entry["id"] in wanted:
+                offset = file_starts[entry["file"]]
+                ranges.setdefault(entry["file"], []).append((entry["start"] - offset, entry["stop"] - offset))
+
+        tables = []
+        for file_name, file_ranges in ranges.items():
+            table = pq.read_table(os.path.join(self.path, file_name))
+            tables.extend(table.slice(start, stop - start) for start, stop in file_ranges)
+
+        if len(tables) == 0:
+            return pd.DataFrame(columns=["date", "Distance_km", "Consumption_kWh", "Location", "ChargingStation",
+                                         "ID", "PowerRating_kW"])
+
+        table = pa.concat_tables(tables)
+        schedule = pd.DataFrame({name: table.column(name).to_numpy() for name in table.column_names})
+
+        for name in ["Distance_km", "Consumption_kWh", "PowerRating_kW"]:
+            schedule[name] = schedule[name].astype(np.float64)
+        schedule["ID"] = schedule["ID"].astype(np.int64 if pa.types.is_integer(table.schema.field("ID").type)
+                                               else object)
+        return schedule
@@ -3,5 +3,7 @@ from setuptools import setup
 setup(name='fleetrl',
       version='0.0.1',
       include=["fleetrl*"],
-      include_package_data=True
+      include_package_data=True,
+      # parquet files of the streamed log and of the generated schedules
+      extras_require={"parquet": ["pyarrow"]}
       )